@@ -0,0 +1,35 @@
+"""Performance benchmarks of qrest.
+
+Each module in this package benchmarks one aspect of qrest. Its function
+``run`` returns the measurements as a dictionary that maps the name of each
+measurement to its value, and the module can be executed to print them, e.g.::
+
+  $ python -m benchmark.serialization
+
+The benchmarks do not access the network. Run ``python -m benchmark`` to run
+all of them and to compare their results with a baseline.
+
+"""
+
+import logging
+import timeit
+from typing import Callable
+
+# qrest warns for each response that is processed without options, which would flood the output
+logging.getLogger("qrest").setLevel(logging.ERROR)
+
+
+def time_per_call(function: Callable, number: int = 1000, repeat: int = 5) -> float:
+    """Return the best time in seconds that a single call of the given function took.
+
+    The function is called ``number`` times in a row, which is repeated ``repeat`` times.
+
+    """
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def print_results(results: dict):
+    """Print the given measurements, one per line."""
+    width = max(len(name) for name in results)
+    for name, value in results.items():
+        print(f"{name:<{width}}  {value:.6g}")
@@ -0,0 +1,162 @@
+"""Run the benchmarks and compare their results with a stored baseline.
+
+To run all benchmarks and store their results as a baseline::
+
+  $ python -m benchmark run --output baseline.json
+
+To run them again after a change and compare the results with that baseline::
+
+  $ python -m benchmark compare baseline.json
+
+The command exits with status 1 when a measurement got worse by more than the
+threshold, 20% by default. Measurements whose name ends with ``_per_s`` are
+better when they are higher, all other measurements are better when they are
+lower. Both commands accept the names of the benchmarks to run and option
+``--quick`` for a fast run with fewer repetitions. Option ``--results`` of
+command compare takes the results from a file instead of running the
+benchmarks.
+
+"""
+
+import argparse
+import datetime
+import importlib
+import json
+import platform
+import sys
+from typing import Dict, Iterable, List
+
+import qrest
+
+from . import print_results
+
+BENCHMARKS = (
+    "startup",
+    "importtime",
+    "memory",
+    "retention",
+    "url",
+    "overhead",
+    "serialization",
+    "parse",
+    "endtoend",
+)
+"""the modules of the benchmark package that are run by default"""
+
+DEFAULT_THRESHOLD = 0.2
+
+
+def run_benchmarks(names: Iterable[str], quick: bool = False) -> dict:
+    """Return the results of the given benchmarks together with a description of the run."""
+    results = {}
+    for name in names:
+        print(f"running {name}", file=sys.stderr)
+        module = importlib.import_module(f"benchmark.{name}")
+        results[name] = module.run(quick=quick)
+    return {
+        "metadata": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "qrest": qrest.__version__,
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def higher_is_better(name: str) -> bool:
+    """Return True if a higher value of the measurement with the given name is better."""
+    return name.endswith("_per_s")
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[tuple]:
+    """Return the change of each measurement that is in both the given runs.
+
+    Each change is a tuple (name, baseline value, current value, relative change, verdict),
+    where the verdict is "worse", "better" or an empty string if the change is within the
+    threshold.
+
+    """
+    changes = []
+    for module, measurements in current["results"].items():
+        baseline_measurements: Dict[str, float] = baseline["results"].get(module, {})
+        for name, value in measurements.items():
+            if name not in baseline_measurements:
+                continue
+            reference = baseline_measurements[name]
+            change = (value - reference) / reference if reference else 0.0
+            improvement = change if higher_is_better(name) else -change
+            verdict = ""
+            if improvement < -threshold:
+                verdict = "worse"
+            elif improvement > threshold:
+                verdict = "better"
+            changes.append((f"{module}.{name}", reference, value, change, verdict))
+    return changes
+
+
+def print_changes(changes: List[tuple]):
+    """Print the given changes, one measurement per line."""
+    width = max((len(change[0]) for change in changes), default=0)
+    print(f"{'measurement':<{width}}  {'baseline':>12}  {'current':>12}  {'change':>8}")
+    for name, reference, value, change, verdict in changes:
+        print(f"{name:<{width}}  {reference:12.6g}  {value:12.6g}  {change:+8.1%}  {verdict}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmark", description=__doc__.split("\n")[0]
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--output", help="the JSON file to store the results in")
+
+    compare_parser = commands.add_parser("compare", help="compare the results with a baseline")
+    compare_parser.add_argument("baseline", help="the JSON file with the baseline results")
+    compare_parser.add_argument(
+        "--results", help="the JSON file with the results to compare, by default they are measured"
+    )
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="the relative change that counts as a regression (default: %(default)s)",
+    )
+
+    for command_parser in (run_parser, compare_parser):
+        command_parser.add_argument("names", nargs="*", metavar="benchmark", help="the benchmarks")
+        command_parser.add_argument("--quick", action="store_true", help="do a fast run")
+    arguments = parser.parse_args(argv)
+
+    if arguments.command == "run":
+        current = run_benchmarks(arguments.names or BENCHMARKS, arguments.quick)
+        print_results(
+            {
+                f"{module}.{name}": value
+                for module, results in current["results"].items()
+                for name, value in results.items()
+            }
+        )
+        if arguments.output:
+            with open(arguments.output, "w") as f:
+                json.dump(current, f, indent=2)
+        return 0
+
+    with open(arguments.baseline) as f:
+        baseline = json.load(f)
+    if arguments.results:
+        with open(arguments.results) as f:
+            current = json.load(f)
+    else:
+        names = arguments.names or [name for name in BENCHMARKS if name in baseline["results"]]
+        # measurements of a quick run are only comparable to those of another quick run
+        current = run_benchmarks(names, arguments.quick or baseline["metadata"]["quick"])
+    changes = compare(baseline, current, arguments.threshold)
+    print_changes(changes)
+    return 1 if any(change[4] == "worse" for change in changes) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
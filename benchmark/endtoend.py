@@ -0,0 +1,124 @@
+"""Measure the number of calls per second against a local stand-in of the JSONPlaceholder service.
+
+The calls go through the complete stack: the check of the parameters, the
+request over a connection to localhost and the parsing of the response. The
+stand-in is the mock server of module qrest.mockserver, generated from the
+resources of this module, which serves records of about the size of a post.
+The payload of ``all_posts`` is measured for 100 and 1000 posts and each
+other resource gets as many records as JSONPlaceholder returns for it.
+
+"""
+
+import sys
+import time
+
+import qrest
+from qrest import APIConfig, BodyParameter, QueryParameter, ResourceConfig
+from qrest.mockserver import Faults, MockServer
+
+from . import print_results
+
+PAYLOAD_SIZES = (100, 1000)
+"""the number of posts of the server"""
+
+RECORD_SIZE = 200
+"""the approximate size in bytes of a serialized post"""
+
+
+class Config(APIConfig):
+    url = "http://127.0.0.1"
+
+
+class AllPosts(ResourceConfig):
+    name = "all_posts"
+    path = ["posts"]
+    method = "GET"
+
+
+class FilterPosts(ResourceConfig):
+    name = "filter_posts"
+    path = ["posts"]
+    method = "GET"
+
+    user_id = QueryParameter(name="userId")
+
+
+class SinglePost(ResourceConfig):
+    name = "single_post"
+    path = ["posts", "{item}"]
+    method = "GET"
+
+
+class Comments(ResourceConfig):
+    name = "comments"
+    path = ["posts", "{post_id}", "comments"]
+    method = "GET"
+
+
+class CreatePost(ResourceConfig):
+    name = "create_post"
+    path = ["posts"]
+    method = "POST"
+    headers = {"Content-type": "application/json; charset=UTF-8"}
+
+    title = BodyParameter(name="title", required=True)
+    content = BodyParameter(name="body", required=True)
+    user_id = BodyParameter(name="userId", default=101)
+
+
+def calls_per_second(function, duration: float) -> float:
+    """Return the number of times the given function can be called per second."""
+    function()
+    count = 0
+    start = time.perf_counter()
+    while True:
+        function()
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            return count / elapsed
+
+
+def serve(records: int, latency: float = 0.0) -> MockServer:
+    """Return a mock server for the resources of this module with the given number of records.
+
+    :param latency: the time in seconds the server waits before it sends each response
+    """
+    faults = Faults(latency=f"fixed:{latency}")
+    return MockServer(
+        sys.modules[__name__], faults=faults, records=records, record_size=RECORD_SIZE
+    )
+
+
+def create_api(url: str) -> qrest.API:
+    """Return an API for the stand-in server at the given URL."""
+    Config.url = url
+    return qrest.API(sys.modules[__name__])
+
+
+def run(quick: bool = False, latency: float = 0.0) -> dict:
+    """Return the calls per second of each resource.
+
+    :param latency: the time in seconds the server waits before it sends each response
+    """
+    duration = 0.2 if quick else 2.0
+
+    calls = [(f"all_posts.{count}", count, lambda api: api.all_posts()) for count in PAYLOAD_SIZES]
+    # the number of records JSONPlaceholder returns for each of the other resources
+    calls += [
+        ("filter_posts", 10, lambda api: api.filter_posts(user_id=1)),
+        ("single_post", 1, lambda api: api.single_post(item=1)),
+        ("comments", 5, lambda api: api.comments(post_id=1)),
+        ("create_post", 1, lambda api: api.create_post(title="foo", content="bar")),
+    ]
+
+    results = {}
+    for name, records, call in calls:
+        with serve(records, latency) as server:
+            api = create_api(server.url)
+            results[f"{name}.calls_per_s"] = calls_per_second(lambda: call(api), duration)
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
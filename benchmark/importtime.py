@@ -0,0 +1,41 @@
+"""Measure the time it takes to import qrest, and to import it together with requests.
+
+Each import is measured in a fresh interpreter using ``python -X importtime``,
+which reports the cumulative import time of each module.
+
+"""
+
+import subprocess
+import sys
+
+from . import print_results
+
+
+def import_time(statement: str, module: str) -> float:
+    """Return the cumulative time in seconds to import the given module using the given statement.
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        check=True,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    ).stderr
+    for line in stderr.splitlines():
+        # each line has the format "import time: <self us> | <cumulative us> | <name>"
+        _, cumulative, name = line.rsplit("|", 2)
+        if name.strip() == module:
+            return int(cumulative) / 1e6
+    raise ValueError(f"module {module} was not imported")
+
+
+def run(quick: bool = False) -> dict:
+    """Return the best import times of a number of runs."""
+    repeat = 3 if quick else 10
+    return {
+        "qrest_s": min(import_time("import qrest", "qrest") for _ in range(repeat)),
+        "requests_s": min(import_time("import requests", "requests") for _ in range(repeat)),
+    }
+
+
+if __name__ == "__main__":
+    print_results(run())
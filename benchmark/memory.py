@@ -0,0 +1,52 @@
+"""Measure the memory per endpoint of a configuration module and of the API created from it.
+
+The memory is measured using tracemalloc for a generated module with 1000
+endpoints, see module ``benchmark.startup``.
+
+"""
+
+import gc
+import sys
+import tempfile
+import tracemalloc
+from typing import Tuple
+
+import qrest
+
+from . import print_results
+from .startup import create_module
+
+
+def allocated(function) -> Tuple[int, object]:
+    """Return the number of bytes that remain allocated after calling the given function,
+    together with the result of the function.
+    """
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    result = function()
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] - before, result
+
+
+def run(quick: bool = False) -> dict:
+    """Return the number of bytes per endpoint."""
+    count = 100 if quick else 1000
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        tracemalloc.start()
+        try:
+            size, module = allocated(lambda: create_module(count, directory))
+            results["module.bytes_per_endpoint"] = size / count
+            size, _ = allocated(lambda: qrest.API(module))
+            results["api.bytes_per_endpoint"] = size / count
+            size, _ = allocated(lambda: qrest.API(module, lazy=True))
+            results["lazy_api.bytes_per_endpoint"] = size / count
+        finally:
+            tracemalloc.stop()
+            del sys.modules[module.__name__]
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
@@ -0,0 +1,41 @@
+"""Measure the per-call overhead of qrest: the check of the parameters and the construction of
+the URL and of the query parameters of a request.
+
+The resources are the ones of module ``benchmark.endtoend``, which mirror the
+JSONPlaceholder configuration of the tests.
+
+"""
+
+from . import print_results, time_per_call
+from .endtoend import create_api
+
+
+def run(quick: bool = False) -> dict:
+    """Return the time per call of each step of each resource."""
+    api = create_api("http://127.0.0.1")
+    number = 1000 if quick else 100000
+
+    results = {}
+    for resource, arguments in [
+        (api.all_posts, {}),
+        (api.filter_posts, {"user_id": 1}),
+        (api.comments, {"post_id": 1}),
+        (api.create_post, {"title": "foo", "content": "bar"}),
+    ]:
+
+        def check():
+            resource.cleaned_data = {}
+            resource.check(**arguments)
+
+        results[f"{resource.name}.check_s"] = time_per_call(check, number=number)
+        results[f"{resource.name}.query_url_s"] = time_per_call(
+            lambda: resource.query_url, number=number
+        )
+        results[f"{resource.name}.query_parameters_s"] = time_per_call(
+            lambda: resource.query_parameters, number=number
+        )
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
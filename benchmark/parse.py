@@ -0,0 +1,62 @@
+"""Measure the throughput and the peak memory of parsing JSON and CSV responses.
+
+The responses hold 10000 posts, see module ``benchmark.serialization``. The
+throughput is the size of the body in megabytes divided by the time to parse
+it, the peak memory is the largest amount of memory allocated during parsing
+according to tracemalloc.
+
+"""
+
+import csv
+import io
+import json
+import tracemalloc
+
+from qrest.response import CSVResponse, JSONResponse
+
+from . import print_results, time_per_call
+from .serialization import create_posts, create_response
+
+
+def create_csv(posts: list) -> bytes:
+    """Return the given posts as CSV, without the fields that hold a list."""
+    fields = [field for field, value in posts[0].items() if not isinstance(value, list)]
+    text = io.StringIO()
+    writer = csv.DictWriter(text, fields, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(posts)
+    return text.getvalue().encode("utf-8")
+
+
+def peak_memory(function) -> int:
+    """Return the peak number of bytes allocated while calling the given function."""
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(quick: bool = False) -> dict:
+    """Return the throughput and peak memory for each content type."""
+    posts = create_posts(1000 if quick else 10000)
+    number = 5 if quick else 20
+
+    results = {}
+    for name, content, content_type, response_class in [
+        ("json", json.dumps(posts).encode("utf-8"), "application/json", JSONResponse),
+        ("csv", create_csv(posts), "text/csv", CSVResponse),
+    ]:
+        response = create_response(content, content_type)
+
+        def parse():
+            response_class()(response).fetch()
+
+        results[f"{name}.mb_per_s"] = len(content) / 1e6 / time_per_call(parse, number=number)
+        results[f"{name}.peak_bytes"] = peak_memory(parse)
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
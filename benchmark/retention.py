@@ -0,0 +1,52 @@
+"""Measure the memory that an API retains after calls of its resources, with and without
+memory-lean mode.
+
+Each of the resources ``all_posts``, ``filter_posts``, ``single_post`` and
+``comments`` of the end-to-end benchmark is called once against a local
+mock server that returns 1000 records for each, see ``benchmark.endtoend``. The
+results of the calls are dropped, so the memory that remains allocated
+according to tracemalloc is what the API keeps until the next call.
+
+"""
+
+import tracemalloc
+
+from qrest import APIConfig
+
+from . import print_results
+from .endtoend import Config, create_api, serve
+from .memory import allocated
+
+
+def call_resources(api):
+    """Call each of the resources of the given API once and drop the results."""
+    api.all_posts()
+    api.filter_posts(user_id=1)
+    api.single_post(item=1)
+    api.comments(post_id=1)
+
+
+def run(quick: bool = False) -> dict:
+    """Return the number of bytes retained after the calls, in default and memory-lean mode."""
+    results = {}
+    with serve(records=100 if quick else 1000) as server:
+        for name, memory_lean in [("default", False), ("lean", True)]:
+            Config.memory_lean = memory_lean
+            try:
+                api = create_api(server.url)
+                # the first calls import and initialize the transport, which is not retained data
+                call_resources(api)
+                api = create_api(server.url)
+                tracemalloc.start()
+                try:
+                    size, _ = allocated(lambda: call_resources(api))
+                finally:
+                    tracemalloc.stop()
+            finally:
+                Config.memory_lean = APIConfig.memory_lean
+            results[f"{name}.retained_bytes"] = size
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
@@ -0,0 +1,82 @@
+"""Compare the payload size and the encode and decode times of JSON, MessagePack and CBOR.
+
+Formats whose optional package is not installed are skipped.
+
+"""
+
+import importlib.util
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from qrest.body import encode_body
+from qrest.response import CBORResponse, JSONResponse, MsgPackResponse
+
+from . import print_results, time_per_call
+
+FORMATS = {
+    # format: (content type, response class, package required)
+    "json": ("application/json", JSONResponse, None),
+    "msgpack": ("application/msgpack", MsgPackResponse, "msgpack"),
+    "cbor": ("application/cbor", CBORResponse, "cbor2"),
+}
+
+
+def create_posts(count: int) -> list:
+    """Return a list of posts similar to the ones of the JSONPlaceholder service."""
+    return [
+        {
+            "userId": i % 10,
+            "id": i,
+            "title": f"sunt aut facere repellat provident occaecati {i}",
+            "body": "quia et suscipit\nsuscipit recusandae consequuntur expedita et cum",
+            "score": i * 0.5,
+            "tags": ["a", "b", "c"],
+        }
+        for i in range(count)
+    ]
+
+
+def create_response(content: bytes, content_type: str) -> requests.Response:
+    """Return a requests.Response with the given body that has already been read."""
+    response = requests.Response()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict({"Content-Type": content_type})
+    response._content = content
+    return response
+
+
+def encode(posts: list, body_format: str) -> bytes:
+    """Return the given posts encoded in the given format."""
+    arguments = encode_body(posts, body_format)
+    if "json" in arguments:
+        # requests serializes JSON bodies in the same way
+        return requests.models.complexjson.dumps(arguments["json"]).encode("utf-8")
+    return arguments["data"]
+
+
+def run(quick: bool = False) -> dict:
+    """Return the measurements for each of the available formats."""
+    posts = create_posts(100 if quick else 10000)
+    number = 5 if quick else 20
+
+    results = {}
+    for body_format, (content_type, response_class, package) in FORMATS.items():
+        if package and not importlib.util.find_spec(package):
+            continue
+
+        content = encode(posts, body_format)
+        response = create_response(content, content_type)
+
+        results[f"{body_format}.size_bytes"] = len(content)
+        results[f"{body_format}.encode_s"] = time_per_call(
+            lambda: encode(posts, body_format), number=number
+        )
+        results[f"{body_format}.decode_s"] = time_per_call(
+            lambda: response_class()(response).fetch(), number=number
+        )
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
@@ -0,0 +1,96 @@
+"""Compare the time to create an API from a configuration module in its different modes.
+
+The configuration modules are generated and contain 10, 100 and 1000 endpoints.
+In lazy mode, the time includes the access of two endpoints, which is what a
+typical short-lived process does. In cached mode, the endpoints are restored
+from a cache file that has been written before.
+
+"""
+
+import importlib.util
+import os
+import sys
+import tempfile
+import types
+
+import qrest
+
+from . import print_results, time_per_call
+
+ENDPOINT_COUNTS = (10, 100, 1000)
+
+_HEADER = '''
+from qrest import APIConfig, BodyParameter, QueryParameter, ResourceConfig
+
+
+class Config(APIConfig):
+    url = "http://localhost"
+    default_headers = {"Content-type": "application/json; charset=UTF-8"}
+'''
+
+_ENDPOINT = '''
+
+class Endpoint{i}(ResourceConfig):
+    name = "endpoint_{i}"
+    path = ["api", "v1", "items{i}", "{{item}}"]
+    method = "POST"
+    description = "endpoint number {i}"
+
+    user_id = QueryParameter(name="userId")
+    title = BodyParameter(name="title", required=True)
+'''
+
+
+def create_module(endpoint_count: int, directory: str) -> types.ModuleType:
+    """Return a configuration module with the given number of endpoints, whose source is
+    written to the given directory."""
+    name = f"benchmark_config_{endpoint_count}"
+    path = os.path.join(directory, f"{name}.py")
+    with open(path, "w") as f:
+        f.write(_HEADER + "".join(_ENDPOINT.format(i=i) for i in range(endpoint_count)))
+
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    # qrest only retrieves the classes that are defined in the module itself
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def create_lazy_api(module: types.ModuleType, **kwargs) -> qrest.API:
+    """Return a lazy API for the given module after the access of two of its endpoints."""
+    api = qrest.API(module, lazy=True, **kwargs)
+    _ = api.endpoint_0, api.endpoint_1  # noqa
+    return api
+
+
+def run(quick: bool = False) -> dict:
+    """Return the startup times for each of the endpoint counts."""
+    counts = ENDPOINT_COUNTS[:2] if quick else ENDPOINT_COUNTS
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for count in counts:
+            module = create_module(count, directory)
+            cache_path = os.path.join(directory, f"cache_{count}.json")
+            number = max(1, 1000 // count)
+
+            def cached():
+                return qrest.API(module, cache_path=cache_path)
+
+            def lazy_cached():
+                return create_lazy_api(module, cache_path=cache_path)
+
+            results[f"eager.{count}_s"] = time_per_call(lambda: qrest.API(module), number=number)
+            results[f"lazy.{count}_s"] = time_per_call(
+                lambda: create_lazy_api(module), number=number
+            )
+            cached()
+            results[f"cached.{count}_s"] = time_per_call(cached, number=number)
+            results[f"lazy_cached.{count}_s"] = time_per_call(lazy_cached, number=number)
+            del sys.modules[module.__name__]
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
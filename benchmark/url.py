@@ -0,0 +1,47 @@
+"""Measure the time to construct the URL of a request, with and without path parameters.
+
+"""
+
+import sys
+
+import qrest
+from qrest import APIConfig, ResourceConfig
+
+from . import print_results, time_per_call
+
+
+class Config(APIConfig):
+    url = "https://jsonplaceholder.typicode.com"
+
+
+class AllPosts(ResourceConfig):
+    name = "all_posts"
+    path = ["posts"]
+    method = "GET"
+
+
+class Comment(ResourceConfig):
+    name = "comment"
+    path = ["posts", "{post_id}", "comments", "{comment_id}"]
+    method = "GET"
+
+
+def run(quick: bool = False) -> dict:
+    """Return the time per URL for each of the resources."""
+    api = qrest.API(sys.modules[__name__])
+    number = 1000 if quick else 100000
+
+    results = {}
+    for resource, arguments in [
+        (api.all_posts, {}),
+        (api.comment, {"post_id": 1, "comment_id": "a b"}),
+    ]:
+        resource.check(**arguments)
+        results[f"{resource.name}.query_url_s"] = time_per_call(
+            lambda: resource.query_url, number=number
+        )
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
@@ -6,15 +6,17 @@ This module handle authentication against a variety of REST services
 import os
 import logging
 from typing import Optional
-from netrc import netrc
 from urllib.parse import urlparse
-import requests
 
 from abc import ABC, abstractmethod
 
 # ================================================================================================
 # local imports
 from ..exception import RestCredentailsError
+from ..utils import import_requests
+
+# the authentication classes derive from the one of requests, so this module imports requests
+requests = import_requests()
 
 logger = logging.getLogger(__name__)
 
@@ -150,8 +152,10 @@ class NetRCAuth(RESTAuthentication):
                 self.netrc_path = os.path.expanduser(netrc_path)
             except AttributeError as e:
                 raise ValueError('could not expand netrc-path. error is "%s"' % str(e))
+            from netrc import netrc
+
             nrc = netrc(file=self.netrc_path)
-            host = urlparse(self.rest_client.config.url).hostname
+            host = urlparse(self.rest_client.config.urls[0]).hostname
             try:
                 (netrc_login, _, netrc_password) = nrc.authenticators(host)
             except TypeError:
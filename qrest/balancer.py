@@ -0,0 +1,261 @@
+"""This module contains the client-side load balancing of requests across replicas of a server.
+
+An APIConfig whose url is a list of base URLs spreads the requests of its
+resources across these replicas::
+
+  class MyConfig(APIConfig):
+      url = ["https://replica1.example.com/api", "https://replica2.example.com/api"]
+      balancing = BalancingConfig(policy="ewma", max_failures=3, ejection_time=30.0)
+
+The policy selects the replica for each request, one of
+
+- ``"round_robin"``, each replica in turn,
+- ``"least_outstanding"``, the replica with the fewest requests in progress,
+- ``"ewma"``, the replica with the lowest exponentially weighted moving
+  average of its latency, weighted by its number of requests in progress,
+
+or an instance of a subclass of Policy.
+
+The health of each replica is tracked passively: a request that fails to
+connect, times out or gets a 5xx response counts as a failure of its replica.
+After ``max_failures`` consecutive failures, the replica is ejected for
+``ejection_time`` seconds, during which it is only used when all replicas are
+ejected. A failed request whose method is in RETRYABLE_METHODS is retried on
+another replica, at most ``retries`` times. Each retry is counted in attribute
+``retries`` of the timing of the response.
+
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Union
+
+# ================================================================================================
+# local imports
+from .exception import RestClientConfigurationError
+from .utils import import_requests
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_METHODS = ("GET", "PUT")
+"""the methods of the requests that are safe to send again to another replica
+
+These are the idempotent methods among those that a ResourceConfig supports.
+"""
+
+
+# ================================================================================================
+class Replica:
+    """A base URL of the server and the statistics of the requests sent to it."""
+
+    __slots__ = ("index", "url", "outstanding", "latency", "failures", "ejected_until")
+
+    def __init__(self, index: int, url: str):
+        self.index = index
+        """the position of the base URL in the list of the APIConfig"""
+
+        self.url = url
+        """the base URL"""
+
+        self.outstanding = 0
+        """the number of requests in progress"""
+
+        self.latency: Optional[float] = None
+        """the moving average of the latency in seconds, None before the first response"""
+
+        self.failures = 0
+        """the number of consecutive failed requests"""
+
+        self.ejected_until = 0.0
+        """the time.monotonic() until which the replica is ejected"""
+
+
+class Policy:
+    """Selects the replica for a request."""
+
+    def select(self, replicas: List[Replica]) -> Replica:
+        """Return one of the given replicas, which are healthy unless all replicas are ejected.
+
+        The caller holds the lock of the load balancer, so the statistics of the replicas do
+        not change during the call.
+        """
+        raise NotImplementedError
+
+
+class RoundRobin(Policy):
+    """Selects each replica in turn."""
+
+    def __init__(self):
+        self._next = 0
+
+    def select(self, replicas: List[Replica]) -> Replica:
+        replica = replicas[self._next % len(replicas)]
+        self._next += 1
+        return replica
+
+
+class LeastOutstanding(RoundRobin):
+    """Selects the replica with the fewest requests in progress, in turn when there is a tie."""
+
+    def select(self, replicas: List[Replica]) -> Replica:
+        start = self._next % len(replicas)
+        self._next += 1
+        rotated = replicas[start:] + replicas[:start]
+        return min(rotated, key=lambda replica: replica.outstanding)
+
+
+class EWMALatency(RoundRobin):
+    """Selects the replica with the lowest expected latency.
+
+    The expected latency is the moving average of the latency times the number
+    of requests in progress plus one. A replica without responses yet is
+    selected first, so each replica gets measured.
+
+    """
+
+    def select(self, replicas: List[Replica]) -> Replica:
+        start = self._next % len(replicas)
+        self._next += 1
+        rotated = replicas[start:] + replicas[:start]
+        return min(rotated, key=lambda r: (r.latency or 0.0) * (r.outstanding + 1))
+
+
+POLICIES = {
+    "round_robin": RoundRobin,
+    "least_outstanding": LeastOutstanding,
+    "ewma": EWMALatency,
+}
+"""the policies that can be configured by name"""
+
+
+# ================================================================================================
+class BalancingConfig:
+    """Configuration of the load balancing across the base URLs of an APIConfig.
+
+    An instance can be assigned to attribute ``balancing`` of an APIConfig
+    whose url is a list of base URLs.
+
+    """
+
+    def __init__(
+        self,
+        policy: Union[str, Policy] = "round_robin",
+        max_failures: int = 3,
+        ejection_time: float = 30.0,
+        retries: int = 1,
+        decay: float = 0.3,
+    ):
+        """
+        :param policy: the name of the policy that selects a replica for each request, see
+            POLICIES, or an instance of a subclass of Policy
+        :param max_failures: the number of consecutive failures after which a replica is ejected
+        :param ejection_time: the number of seconds a replica remains ejected
+        :param retries: the maximum number of times a failed idempotent request is sent to
+            another replica
+        :param decay: the weight of the latest latency in the moving average of the latency
+        """
+        self.policy = policy
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+        self.retries = retries
+        self.decay = decay
+
+    def validate(self):
+        """Check the configuration and raise a RestClientConfigurationError if it is invalid."""
+        if not isinstance(self.policy, Policy) and self.policy not in POLICIES:
+            raise RestClientConfigurationError(
+                "policy must be a Policy or one of %s" % ", ".join(POLICIES)
+            )
+        if not isinstance(self.max_failures, int) or self.max_failures < 1:
+            raise RestClientConfigurationError("max_failures must be a positive integer")
+        if not isinstance(self.ejection_time, (int, float)) or self.ejection_time < 0:
+            raise RestClientConfigurationError("ejection_time must be a non-negative number")
+        if not isinstance(self.retries, int) or self.retries < 0:
+            raise RestClientConfigurationError("retries must be a non-negative integer")
+        if not isinstance(self.decay, (int, float)) or not 0 < self.decay <= 1:
+            raise RestClientConfigurationError("decay must be a number in (0, 1]")
+
+
+# ================================================================================================
+class LoadBalancer:
+    """Selects a replica for each request and tracks the health of each replica."""
+
+    def __init__(self, urls: Sequence[str], config: Optional[BalancingConfig] = None):
+        """
+        :param urls: the base URLs of the replicas
+        :param config: the configuration of the load balancing. If None, the default
+            BalancingConfig is used
+        """
+        self.config = config or BalancingConfig()
+        policy = self.config.policy
+        self.policy = POLICIES[policy]() if isinstance(policy, str) else policy
+        self.replicas = [Replica(index, url) for index, url in enumerate(urls)]
+        self._lock = threading.Lock()
+
+    def acquire(self, exclude: Sequence[Replica] = ()) -> Replica:
+        """Return the replica for the next request and count the request as in progress.
+
+        :param exclude: the replicas that should not be selected, unless no other replica is left
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [r for r in self.replicas if r not in exclude] or self.replicas
+            healthy = [r for r in candidates if r.ejected_until <= now]
+            # when all replicas are ejected, sending the request is better than failing it
+            replica = self.policy.select(healthy or candidates)
+            replica.outstanding += 1
+        return replica
+
+    def release(self, replica: Replica, latency: float, failed: bool):
+        """Record the end of a request to the given replica."""
+        with self._lock:
+            replica.outstanding -= 1
+            if not failed:
+                replica.failures = 0
+                decay = self.config.decay
+                previous = replica.latency
+                replica.latency = latency if previous is None else (
+                    decay * latency + (1 - decay) * previous
+                )
+                return
+            replica.failures += 1
+            if replica.failures >= self.config.max_failures:
+                replica.failures = 0
+                replica.ejected_until = time.monotonic() + self.config.ejection_time
+                logger.warning(
+                    "ejected replica %s for %s seconds", replica.url, self.config.ejection_time
+                )
+
+    def send(self, send: Callable, idempotent: bool, timing=None):
+        """Send a request to a replica and return its response, retrying on another replica.
+
+        :param send: the function that sends the request to the given Replica and returns the
+            requests.Response
+        :param idempotent: True iff the request can be sent again after a failure
+        :param timing: the qrest.instrumentation.Timing of the request, whose retries are counted
+        """
+        requests = import_requests()
+        tried: List[Replica] = []
+        while True:
+            replica = self.acquire(exclude=tried)
+            tried.append(replica)
+            retry = idempotent and len(tried) <= self.config.retries
+            start = time.perf_counter()
+            failed = True
+            try:
+                response = send(replica)
+                failed = response.status_code >= 500
+            except (requests.ConnectionError, requests.Timeout):
+                if not retry:
+                    raise
+            else:
+                if not (failed and retry):
+                    return response
+                response.close()
+            finally:
+                # any other exception counts as a failure as well, and is raised
+                self.release(replica, time.perf_counter() - start, failed=failed)
+            logger.debug("retrying the request to replica %s on another replica", replica.url)
+            if timing is not None:
+                timing.retries += 1
@@ -0,0 +1,365 @@
+"""This module contains the collapsing of many single-id calls into a few multi-id requests.
+
+Many REST APIs accept a list of ids in a single query parameter, which is
+configured as ``QueryParameter(multiple=True)``. A RequestCollapser takes
+single-id calls of such a resource and sends them as few requests as the
+server allows::
+
+  users = RequestCollapser(api.users, parameter="ids", key="id", max_ids=50)
+  results = users.call_many([{"ids": 1}, {"ids": 2}, {"ids": 3, "active": True}])
+
+Calls with the same other arguments are collapsed into one request, or more
+when the number of ids or the length of the URL exceeds the configured
+maximum. Each result is the record of the response whose key field equals the
+id of the call, or None when the response has no such record. The key field
+and the id are compared as strings, so an id ``"7"`` matches a key ``7``. Ids
+that occur in several calls are requested once.
+
+The response must be a list of records, possibly within the extract_section
+of a JSONResource.
+
+A MicroBatcher collapses the calls that independent parts of a program make
+within a short time window. Each call returns a future at once, and the calls
+are sent together when the window has passed or enough calls have arrived::
+
+  batcher = MicroBatcher(users, window=0.005)
+  first = batcher.submit(ids=1)
+  second = batcher.submit(ids=2)
+  print(first.result(), second.result())
+
+or from a coroutine::
+
+  user = await batcher.load_async(ids=1)
+
+Within a ``request_scope()``, a call with the same arguments as an earlier
+call of the scope gets the future of that call instead of a new request. The
+scope is kept in a context variable, so it applies to the current thread or
+asyncio task and to the tasks it creates.
+
+"""
+
+import asyncio
+import contextlib
+import contextvars
+import functools
+import threading
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+# ================================================================================================
+# local imports
+from .exception import (
+    RestClientConfigurationError,
+    RestClientQueryError,
+    RestClientResourceError,
+)
+
+
+# ================================================================================================
+class RequestCollapser:
+    """Sends single-id calls of a resource as requests for many ids at once."""
+
+    def __init__(
+        self,
+        resource,
+        parameter: str,
+        key: str,
+        max_ids: int = 100,
+        max_url_length: int = 2048,
+        delimiter: Optional[str] = None,
+    ):
+        """
+        :param resource: the qrest.resource.Resource to call
+        :param parameter: the name of the query parameter of the resource that takes the ids. It
+            must be configured with ``multiple=True``
+        :param key: the field of each record in the response that holds its id
+        :param max_ids: the maximum number of ids in a single request
+        :param max_url_length: the maximum length of the URL of a request, including the query
+        :param delimiter: if set, the ids are sent as a single value joined by this delimiter, e.g.
+            ``ids=1,2,3``, instead of as a repeated parameter ``ids=1&ids=2&ids=3``
+
+        :raises RestClientConfigurationError: when the parameter is not a multiple query
+            parameter of the resource or a maximum is not a positive integer
+        """
+        if parameter not in resource.config.multiple_parameters:
+            raise RestClientConfigurationError(
+                f"parameter '{parameter}' of resource {resource.name} is not multiple"
+            )
+        for name, value in (("max_ids", max_ids), ("max_url_length", max_url_length)):
+            if not isinstance(value, int) or value <= 0:
+                raise RestClientConfigurationError(f"{name} must be a positive integer")
+        if delimiter is not None and not isinstance(delimiter, str):
+            raise RestClientConfigurationError("delimiter must be a string")
+
+        self.resource = resource
+        self.parameter = parameter
+        self.key = key
+        self.max_ids = max_ids
+        self.max_url_length = max_url_length
+        self.delimiter = delimiter
+
+        self._rest_name = resource.config.parameters[parameter].name
+
+    def call_many(self, calls: Iterable[dict]) -> list:
+        """Return the result of each of the given calls, in the same order.
+
+        :param calls: the keyword arguments of each call. The value of the parameter is a single
+            id
+
+        :raises RestClientQueryError: when a call has no single id
+        :raises RestClientResourceError: when a response cannot be split into records
+        """
+        calls = list(calls)
+        results: list = [None] * len(calls)
+        for group in self._groups(enumerate(calls)):
+            for common, chunk, answered in self._requests(group):
+                records = self._fetch(common, chunk)
+                for index, item_id in answered:
+                    results[index] = records.get(str(item_id))
+        return results
+
+    def _item_id(self, index: int, kwargs: dict):
+        """Return the single id of the given call.
+
+        :raises RestClientQueryError: when the call has no single id
+        """
+        item_id = kwargs.get(self.parameter)
+        # a bool is an int, but True is not an id
+        if isinstance(item_id, bool) or not isinstance(item_id, (str, int)):
+            raise RestClientQueryError(
+                f"call {index} must have a single id for parameter '{self.parameter}'"
+            )
+        return item_id
+
+    def _groups(self, calls: Iterable[Tuple[int, dict]]) -> List[List[tuple]]:
+        """Return the given calls with their index grouped by their other arguments.
+
+        Each call in a group is a tuple of its index, its id and its other arguments.
+
+        :raises RestClientQueryError: when a call has no single id
+        """
+        groups: Dict[str, List[tuple]] = {}
+        for index, kwargs in calls:
+            item_id = self._item_id(index, kwargs)
+            common = {name: value for name, value in kwargs.items() if name != self.parameter}
+            groups.setdefault(repr(sorted(common.items())), []).append((index, item_id, common))
+        return list(groups.values())
+
+    def _requests(self, group: List[tuple]) -> List[Tuple[dict, list, list]]:
+        """Return the requests that answer the calls of the given group.
+
+        Each request is a tuple of the other arguments, the chunk of ids to request and the
+        index and id of each call that the records of the request answer.
+        """
+        common = group[0][2]
+        ids = list(dict.fromkeys(item_id for _, item_id, _ in group))
+        requests = []
+        for chunk in self._chunks(common, ids):
+            in_chunk = set(chunk)
+            answered = [(index, item_id) for index, item_id, _ in group if item_id in in_chunk]
+            requests.append((common, chunk, answered))
+        return requests
+
+    def _chunks(self, common: dict, ids: list) -> Iterable[list]:
+        """Yield the ids in chunks that respect the maximum number of ids and URL length."""
+        chunk: list = []
+        length = 0
+        for item_id in ids:
+            if not chunk:
+                length = self._url_length(dict(common, **{self.parameter: [item_id]}))
+            else:
+                length += self._id_length(item_id)
+                if len(chunk) == self.max_ids or length > self.max_url_length:
+                    yield chunk
+                    chunk = []
+                    length = self._url_length(dict(common, **{self.parameter: [item_id]}))
+            chunk.append(item_id)
+        if chunk:
+            yield chunk
+
+    def _url_length(self, kwargs: dict) -> int:
+        """Return the length of the URL of a request with the given arguments."""
+        # the resource may be sending another request, so its cleaned_data is left alone
+        resource = self.resource
+        data = resource._clean(kwargs)
+        query = urlencode(resource._split_parameters(data)["request"], doseq=True)
+        return len(resource.path_template.format(data)) + 1 + len(query)
+
+    def _id_length(self, item_id) -> int:
+        """Return the number of characters another id adds to the URL."""
+        if self.delimiter is None:
+            separator = "&" + quote(self._rest_name, safe="") + "="
+        else:
+            separator = quote(self.delimiter, safe="")
+        return len(separator) + len(quote(str(item_id), safe=""))
+
+    def _fetch(self, common: dict, chunk: list) -> Dict[str, dict]:
+        """Request the records of the given ids and return them by their id as a string."""
+        ids = chunk if self.delimiter is None else self.delimiter.join(str(i) for i in chunk)
+        data = self.resource(**dict(common, **{self.parameter: ids}))
+        if not isinstance(data, list):
+            raise RestClientResourceError(
+                f"the response of resource {self.resource.name} is not a list of records"
+            )
+        try:
+            return {str(record[self.key]): record for record in data}
+        except (KeyError, TypeError) as e:
+            raise RestClientResourceError(
+                f"a record of resource {self.resource.name} has no key field '{self.key}'"
+            ) from e
+
+
+# ================================================================================================
+_memo: contextvars.ContextVar = contextvars.ContextVar("qrest_batch_memo", default=None)
+
+
+@contextlib.contextmanager
+def request_scope():
+    """Memoize the calls of all micro-batchers within the block, e.g. the handling of a request."""
+    token = _memo.set({})
+    try:
+        yield
+    finally:
+        _memo.reset(token)
+
+
+def _forget_failure(memo: dict, key: tuple, future: Future):
+    """Remove the given future from the memo of the request scope when its call has failed, so
+    that a later call with the same arguments is sent again."""
+    if future.cancelled() or future.exception() is not None:
+        if memo.get(key) is future:
+            del memo[key]
+
+
+class MicroBatcher:
+    """Coalesces the single-id calls that arrive within a time window into multi-id requests."""
+
+    def __init__(
+        self,
+        collapser: RequestCollapser,
+        window: float = 0.002,
+        max_batch: Optional[int] = None,
+        metrics=None,
+    ):
+        """
+        :param collapser: the RequestCollapser that sends the calls of a batch
+        :param window: the time in seconds a batch waits for more calls after its first call
+        :param max_batch: the number of calls at which a batch is sent without waiting for the
+            end of the window. It defaults to the max_ids of the collapser
+        :param metrics: an optional qrest.metrics.MetricsRegistry that counts each call answered
+            from the request scope as a cache hit
+
+        :raises RestClientConfigurationError: when the window or the batch size is invalid
+        """
+        if not isinstance(window, (int, float)) or window < 0:
+            raise RestClientConfigurationError("window must be a non-negative number")
+        max_batch = collapser.max_ids if max_batch is None else max_batch
+        if not isinstance(max_batch, int) or max_batch <= 0:
+            raise RestClientConfigurationError("max_batch must be a positive integer")
+
+        self.collapser = collapser
+        self.window = window
+        self.max_batch = max_batch
+        self.metrics = metrics
+
+        self._pending: List[Tuple[dict, Future]] = []
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+        # a resource holds the data of the call it is sending, so batches are sent one at a time
+        self._send_lock = threading.Lock()
+
+    def submit(self, **kwargs) -> Future:
+        """Add a call with the given keyword arguments to the batch and return its future."""
+        memo = _memo.get()
+        if memo is not None:
+            key = (id(self), repr(sorted(kwargs.items())))
+            future = memo.get(key)
+            if future is not None:
+                if self.metrics is not None:
+                    self.metrics.cache_hit(self.collapser.resource.name)
+                return future
+            future = memo[key] = Future()
+            future.add_done_callback(functools.partial(_forget_failure, memo, key))
+        else:
+            future = Future()
+
+        with self._lock:
+            self._pending.append((kwargs, future))
+            if len(self._pending) >= self.max_batch:
+                batch = self._take()
+                # the batch is sent in the context of its last call, e.g. with the cassette in use
+                context = contextvars.copy_context()
+                threading.Thread(
+                    target=context.run, args=(self._send, batch), daemon=True
+                ).start()
+            elif self._timer is None:
+                # the batch is sent in the context of its first call
+                context = contextvars.copy_context()
+                self._timer = threading.Timer(self.window, context.run, args=(self.flush,))
+                self._timer.daemon = True
+                self._timer.start()
+        return future
+
+    def load(self, **kwargs):
+        """Add a call to the batch and return its result when the batch has been sent."""
+        return self.submit(**kwargs).result()
+
+    async def load_async(self, **kwargs):
+        """Add a call to the batch and return its result without blocking the event loop."""
+        return await asyncio.wrap_future(self.submit(**kwargs))
+
+    def flush(self):
+        """Send the pending calls now, in the current thread."""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._send(batch)
+
+    def _take(self) -> List[Tuple[dict, Future]]:
+        """Return the pending calls and start a new batch. The caller holds the lock."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        return batch
+
+    def _send(self, batch: List[Tuple[dict, Future]]):
+        """Send the calls of the given batch and set the result or exception of each future.
+
+        Each request of the batch is sent separately, so an error only fails the futures of the
+        calls that the request would answer.
+        """
+        outcomes = []
+        calls = []
+        for index, (kwargs, future) in enumerate(batch):
+            try:
+                self.collapser._item_id(index, kwargs)
+            except RestClientQueryError as e:
+                outcomes.append((future, None, e))
+            else:
+                calls.append((index, kwargs))
+
+        with self._send_lock:
+            for group in self.collapser._groups(calls):
+                try:
+                    requests = self.collapser._requests(group)
+                except Exception as e:
+                    # e.g. the other arguments of the calls are invalid
+                    outcomes.extend((batch[index][1], None, e) for index, _, _ in group)
+                    continue
+                for common, chunk, answered in requests:
+                    try:
+                        records = self.collapser._fetch(common, chunk)
+                    except Exception as e:
+                        outcomes.extend((batch[index][1], None, e) for index, _ in answered)
+                    else:
+                        outcomes.extend(
+                            (batch[index][1], records.get(str(item_id)), None)
+                            for index, item_id in answered
+                        )
+        for future, result, exception in outcomes:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
@@ -0,0 +1,161 @@
+"""This module contains the functions that turn the body of a request into the
+payload that is actually sent to the REST server.
+
+A JSON body that is a dictionary, list or string is handed to requests, which
+serializes it at once. Large bodies can be streamed instead: an iterator or
+generator of records is serialized one record at a time and sent with chunked
+transfer encoding, and file-like objects and mmap buffers are sent as-is.
+
+Encodings "msgpack" and "cbor" serialize the body in a binary format. They
+require the optional packages msgpack and cbor2 respectively.
+
+"""
+
+import json
+import mmap
+from collections.abc import Iterator
+from typing import Iterable, Optional
+
+# ================================================================================================
+# local imports
+from .exception import RestClientConfigurationError
+from .utils import import_optional
+
+BODY_ENCODINGS = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "msgpack": "application/msgpack",
+    "cbor": "application/cbor",
+}
+"""maps the supported body encodings to their content type"""
+
+OPTIONAL_PACKAGES = {"msgpack": ("msgpack", "msgpack"), "cbor": ("cbor2", "cbor")}
+"""maps the body encodings that require an optional package to that package and its extra"""
+
+CHUNK_SIZE = 64 * 1024
+"""the minimum size in bytes of each chunk of a streamed body"""
+
+
+# ================================================================================================
+def check_encoding(encoding: str):
+    """Raise a RestClientConfigurationError if the given body encoding cannot be used."""
+    if encoding not in BODY_ENCODINGS:
+        raise RestClientConfigurationError(
+            "encoding must be one of %s" % ", ".join(BODY_ENCODINGS)
+        )
+    if encoding in OPTIONAL_PACKAGES:
+        import_optional(*OPTIONAL_PACKAGES[encoding])
+
+
+def is_stream(body) -> bool:
+    """Return True iff the given body is sent without serializing it in full first."""
+    return isinstance(body, (Iterator, mmap.mmap)) or hasattr(body, "read")
+
+
+def encode_body(body, encoding: str = "json") -> dict:
+    """Return the keyword arguments for requests.request that send the given body.
+
+    :param body: the body as assembled from the BodyParameter values
+    :param encoding: one of the keys of BODY_ENCODINGS
+
+    :return: a dictionary with either key ``json``, which lets requests serialize the body, or
+        key ``data``, which holds the payload to send
+    """
+    check_encoding(encoding)
+
+    if isinstance(body, mmap.mmap):
+        # a memoryview lets the transport send the mapped pages without copying them, see
+        # function release_body
+        return {"data": memoryview(body)}
+    if hasattr(body, "read"):
+        return {"data": body}
+    if isinstance(body, Iterator):
+        return {"data": _chunk(_serialize(body, encoding))}
+    if encoding == "json":
+        return {"json": body}
+    if encoding == "msgpack":
+        return {"data": import_optional("msgpack", "msgpack").packb(body)}
+    if encoding == "cbor":
+        return {"data": import_optional("cbor2", "cbor").dumps(body)}
+
+    records = body if isinstance(body, list) else [body]
+    return {"data": b"".join(_serialize(records, encoding))}
+
+
+def release_body(arguments: dict):
+    """Release the view of an mmap buffer in the given keyword arguments of encode_body.
+
+    The mmap can only be closed once its view has been released, so this is
+    called as soon as the request has been sent.
+
+    """
+    data = arguments.get("data")
+    if isinstance(data, memoryview):
+        data.release()
+
+
+def content_type(body, encoding: str = "json") -> Optional[str]:
+    """Return the content type of the encoded body, or None when it is unknown.
+
+    The content type of file-like objects and mmap buffers is unknown, as these
+    are sent without inspection.
+
+    """
+    if isinstance(body, mmap.mmap) or hasattr(body, "read"):
+        return None
+    return BODY_ENCODINGS[encoding]
+
+
+# ================================================================================================
+def _serialize(records: Iterable, encoding: str) -> Iterable[bytes]:
+    """Yield the serialized records one at a time.
+
+    JSON records form an array and NDJSON records a line each. MessagePack has
+    no arrays of unknown length, so its records are concatenated. CBOR records
+    form an array of indefinite length.
+
+    """
+    if encoding == "ndjson":
+        for record in records:
+            yield json.dumps(record).encode("utf-8") + b"\n"
+        return
+    if encoding == "msgpack":
+        packer = import_optional("msgpack", "msgpack").Packer()
+        for record in records:
+            yield packer.pack(record)
+        return
+    if encoding == "cbor":
+        dumps = import_optional("cbor2", "cbor").dumps
+        yield b"\x9f"
+        for record in records:
+            yield dumps(record)
+        yield b"\xff"
+        return
+
+    separator = b"["
+    for record in records:
+        yield separator + json.dumps(record).encode("utf-8")
+        separator = b","
+    # an empty iterator results in an empty JSON array
+    yield b"[]" if separator == b"[" else b"]"
+
+
+def _chunk(pieces: Iterable[bytes], chunk_size: int = CHUNK_SIZE) -> Iterable[bytes]:
+    """Combine the given pieces into chunks of at least chunk_size bytes.
+
+    Each chunk yielded ends up as a separate chunk of the HTTP message, so
+    yielding each serialized record on its own would add a lot of framing and
+    system calls for small records.
+
+    """
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= chunk_size:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
@@ -0,0 +1,194 @@
+"""This module contains the cache of the compiled configuration of an API.
+
+Creating an API validates each ResourceConfig and APIConfig, which is repeated
+at every start of a process although the configuration rarely changes. The
+cache file stores each endpoint that has been validated in compiled form: the
+class attributes from which its ResourceConfig is initialized and a
+description of each of its parameters. As long as the fingerprint of the
+configuration matches, the endpoints are created from these attributes without
+searching the classes for them and without validation.
+
+The fingerprint covers the version of qrest, the format of the cache file, the
+qualified names of the configuration classes and the source files of the
+modules that define them. It does not depend on the state of the objects that
+the classes refer to, such as the processors, which changes when an API is
+created. The parameters of an endpoint can be defined in another module,
+whose source is not part of the fingerprint, so their descriptions are
+compared when the endpoint is restored, and an endpoint whose parameters have
+changed is created and validated as usual.
+
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+from typing import Callable, Dict, List, Optional, Type
+
+# ================================================================================================
+# local imports
+from . import __version__
+from .conf import OPTIONAL_ATTRIBUTES, APIConfig, ParameterConfig, ResourceConfig
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 3
+"""the version of the format of the cache file"""
+
+
+# ================================================================================================
+def fingerprint(
+    api_config: Type[APIConfig], resource_configs: List[Type[ResourceConfig]]
+) -> Optional[str]:
+    """Return the fingerprint of the given configuration classes.
+
+    :return: the fingerprint, or None when the source file of a module that defines one of the
+        classes cannot be read, in which case the configuration cannot be cached
+    """
+    classes = [api_config, *resource_configs]
+    names = "\n".join(_qualified_name(cls) for cls in classes)
+    digest = hashlib.sha256(f"{CACHE_VERSION} {__version__}\n{names}\n".encode("utf-8"))
+    modules = set()
+    for cls in classes:
+        for klass in cls.__mro__:
+            if klass in (APIConfig, ResourceConfig, object):
+                # the base classes are covered by the version of qrest
+                break
+            modules.add(klass.__module__)
+
+    for name in sorted(modules):
+        path = getattr(sys.modules.get(name), "__file__", None)
+        try:
+            with open(path, "rb") as f:
+                source = f.read()
+        except (OSError, TypeError):
+            logger.debug("the API is not cached, the source of module %s cannot be read", name)
+            return None
+        digest.update(f"{name} {len(source)}\n".encode("utf-8"))
+        digest.update(source)
+    return digest.hexdigest()
+
+
+def _qualified_name(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _describe_parameter(parameter: ParameterConfig) -> str:
+    """Return a description of the given parameter that does not depend on the process."""
+    key = parameter._interning_key()
+    if key is None:
+        # a parameter that is not interned can hold anything, which is described as well as
+        # its representation allows
+        key = (type(parameter), sorted(vars(parameter).items()))
+    return repr(key)
+
+
+def restore_api_config(cls: Type[APIConfig], endpoints) -> APIConfig:
+    """Return the APIConfig of the given class for the given endpoints without validation.
+
+    The defaults of the APIConfig, such as its default headers, are applied to the endpoints.
+
+    """
+    config = cls.__new__(cls)
+    config.endpoints = endpoints
+    config._apply_defaults(validate=False)
+    return config
+
+
+# ================================================================================================
+def load(
+    path: str, key: str, resource_configs: List[Type[ResourceConfig]]
+) -> Optional[Dict[str, Callable[[], ResourceConfig]]]:
+    """Return a function to restore each endpoint from the given cache file.
+
+    :param path: the path to the cache file
+    :param key: the fingerprint of the configuration classes
+    :param resource_configs: the ResourceConfig subclasses of the configuration modules
+
+    :return: a dictionary that maps each endpoint name to a function that returns its
+        ResourceConfig, or None when the cache file does not exist or is out-of-date
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get("version") != CACHE_VERSION or cache.get("key") != key:
+        return None
+
+    classes = {_qualified_name(c): c for c in resource_configs}
+    entries = cache["endpoints"]
+    if {entry["class"] for entry in entries.values()} != set(classes):
+        return None
+
+    # the parameters, which several endpoints can share, and their descriptions by their id
+    described: Dict[int, tuple] = {}
+
+    def describe(parameter) -> Optional[str]:
+        if not isinstance(parameter, ParameterConfig):
+            return None
+        item = described.get(id(parameter))
+        if item is None or item[0] is not parameter:
+            item = described[id(parameter)] = (parameter, _describe_parameter(parameter))
+        return item[1]
+
+    def factory(cls, entry):
+        def restore():
+            parameters = entry["parameters"]
+            for name, description in parameters.items():
+                if describe(getattr(cls, name, None)) != description:
+                    # e.g. a parameter that is imported from another module has changed
+                    return cls.create()
+            # the endpoint has been validated when the cache file was written
+            return cls._construct(entry["attributes"], list(parameters), validate=False)
+
+        return restore
+
+    return {name: factory(classes[entry["class"]], entry) for name, entry in entries.items()}
+
+
+def save(path: str, key: str, endpoints: Dict[str, ResourceConfig]):
+    """Write the given validated endpoints to the given cache file.
+
+    The file is replaced atomically, so processes that start at the same time
+    never read a partially written file. Errors are logged and otherwise
+    ignored, as the cache is only an optimization.
+
+    """
+    entries = {}
+    for name, config in endpoints.items():
+        cls = type(config)
+        entries[name] = {
+            "class": _qualified_name(cls),
+            "attributes": _defined_attributes(cls),
+            # the parameters of the instance are the ParameterConfig class attributes
+            "parameters": {
+                attribute: _describe_parameter(parameter)
+                for attribute, parameter in config.parameters.items()
+            },
+        }
+    cache = {"version": CACHE_VERSION, "key": key, "endpoints": entries}
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        fd, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning("could not write the API cache to %s: %s", path, e)
+
+
+def _defined_attributes(cls: Type[ResourceConfig]) -> List[str]:
+    """Return the names of the optional attributes that the given subclass defines."""
+    defined = set()
+    for klass in cls.__mro__:
+        if klass in (ResourceConfig, object):
+            break
+        defined.update(vars(klass))
+    return [attribute for attribute in OPTIONAL_ATTRIBUTES if attribute in defined]
@@ -0,0 +1,237 @@
+"""This module contains cassettes, which record responses and replay them without a network.
+
+To record the responses of the calls in a block, use::
+
+  with Cassette("posts.zip", mode="record"):
+      api.all_posts()
+      api.single_post(item=1)
+
+To replay them, for example to benchmark the parsing of the responses on a
+machine without network access, use::
+
+  with Cassette("posts.zip", emulate_latency=True):
+      api.all_posts()
+
+A cassette takes the place of the HTTP request in method Resource._send, so
+everything else, from the check of the parameters to the parsing of the
+response, runs as usual. A request is identified by its method, its URL
+including the query parameters and its body. The body of a streamed request
+is not part of its identity. When a request has been recorded several times,
+the responses are replayed in the order in which they were recorded, and the
+last one is repeated.
+
+The cassette in use applies to the current thread or asyncio task and to the
+tasks it creates, and the requests that qrest sends from its own threads, such
+as hedged requests and the batches of a MicroBatcher, use the cassette of the
+call. When the block ends, the cassette that was in use before is used again.
+
+The cassette is a zip archive with an index ``index.json`` and a member for
+each distinct response body. The bodies are stored as they were received, so
+a compressed response is decompressed again on replay.
+
+"""
+
+import contextvars
+import io
+import json
+import os
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, List
+
+# ================================================================================================
+# local imports
+from .exception import RestClientCassetteError, RestClientConfigurationError
+from .utils import import_requests
+
+CASSETTE_VERSION = 1
+"""the version of the layout of the cassette archive"""
+
+MODES = ("record", "replay")
+
+active: contextvars.ContextVar = contextvars.ContextVar("qrest_cassette", default=None)
+"""the Cassette that is in use, or None when requests are sent over the network
+
+The cassette is kept in a context variable, so it applies to the current thread or asyncio
+task and to the tasks it creates.
+"""
+
+
+def request_key(prepared) -> str:
+    """Return the key that identifies the given requests.PreparedRequest in a cassette."""
+    import hashlib
+
+    body = prepared.body
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest() if isinstance(body, bytes) else "-"
+    return f"{prepared.method} {prepared.url} {digest}"
+
+
+# ================================================================================================
+class Cassette:
+    """Records the responses to requests in an archive, or replays them from it."""
+
+    def __init__(self, path: str, mode: str = "replay", emulate_latency: bool = False):
+        """
+        :param path: the path to the zip archive
+        :param mode: "record" to send the requests and record the responses, which are written
+            to the archive when the cassette is closed, or "replay" to return the recorded
+            responses without sending the requests
+        :param emulate_latency: if True, each replayed response takes as long as it took when it
+            was recorded
+
+        :raises RestClientConfigurationError: when the mode is unknown
+        """
+        if mode not in MODES:
+            raise RestClientConfigurationError("mode must be one of %s" % ", ".join(MODES))
+        self.path = path
+        self.mode = mode
+        self.emulate_latency = emulate_latency
+
+        self._interactions: Dict[str, List[dict]] = {}
+        self._bodies: Dict[str, bytes] = {}
+        self._replayed: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # the tokens to restore the cassette that was in use before each use of this one
+        self._tokens: List[contextvars.Token] = []
+        if mode == "replay":
+            self._load()
+
+    def request(self, method: str, url: str, **kwargs):
+        """Return the response to the request with the arguments of requests.request.
+
+        :raises RestClientCassetteError: when a replayed request has not been recorded
+        """
+        requests = import_requests()
+        prepared = requests.Request(
+            method=method,
+            url=url,
+            params=kwargs.get("params"),
+            headers=kwargs.get("headers"),
+            data=kwargs.get("data"),
+            json=kwargs.get("json"),
+        ).prepare()
+        key = request_key(prepared)
+
+        if self.mode == "record":
+            interaction, body = self._record(method, url, kwargs)
+            with self._lock:
+                self._interactions.setdefault(key, []).append(interaction)
+                self._bodies[interaction["body"]] = body
+        else:
+            with self._lock:
+                interactions = self._interactions.get(key)
+                if not interactions:
+                    raise RestClientCassetteError(f"{self.path} has no response to {key}")
+                index = self._replayed.get(key, 0)
+                self._replayed[key] = index + 1
+            interaction = interactions[min(index, len(interactions) - 1)]
+            body = self._bodies[interaction["body"]]
+            if self.emulate_latency:
+                time.sleep(interaction["duration"])
+        return _build_response(prepared, interaction, body, kwargs.get("stream", False))
+
+    def _record(self, method: str, url: str, kwargs: dict):
+        """Send the request and return the recorded interaction and its body as received."""
+        import hashlib
+
+        requests = import_requests()
+        start = time.perf_counter()
+        response = requests.request(method=method, url=url, **dict(kwargs, stream=True))
+        try:
+            body = response.raw.read(decode_content=False)
+        finally:
+            response.close()
+        interaction = {
+            "status": response.status_code,
+            "reason": response.reason,
+            "url": response.url,
+            "headers": list(response.headers.items()),
+            "elapsed": response.elapsed.total_seconds(),
+            "duration": time.perf_counter() - start,
+            "body": hashlib.sha256(body).hexdigest(),
+        }
+        return interaction, body
+
+    def _load(self):
+        """Read the recorded interactions and bodies from the archive.
+
+        :raises RestClientCassetteError: when the archive cannot be read
+        """
+        import zipfile
+
+        try:
+            with zipfile.ZipFile(self.path) as archive:
+                index = json.loads(archive.read("index.json"))
+                if index.get("version") != CASSETTE_VERSION:
+                    raise RestClientCassetteError(f"{self.path} has an unsupported version")
+                self._interactions = index["interactions"]
+                self._bodies = {
+                    name: archive.read(f"bodies/{name}")
+                    for name in {i["body"] for items in self._interactions.values() for i in items}
+                }
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+            raise RestClientCassetteError(f"cannot read cassette {self.path}: {e}") from e
+
+    def save(self):
+        """Write the recorded interactions to the archive, which is replaced atomically."""
+        import tempfile
+        import zipfile
+
+        index = {"version": CASSETTE_VERSION, "interactions": self._interactions}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                with zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED) as archive:
+                    archive.writestr("index.json", json.dumps(index))
+                    for name, body in self._bodies.items():
+                        archive.writestr(f"bodies/{name}", body)
+            os.replace(temporary_path, self.path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+    def __enter__(self) -> "Cassette":
+        self._tokens.append(active.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        active.reset(self._tokens.pop())
+        if self.mode == "record":
+            self.save()
+
+
+def _build_response(prepared, interaction: dict, body: bytes, stream: bool):
+    """Return the requests.Response of the given interaction.
+
+    The body is read through a urllib3 response, so it is decompressed and
+    counted in the same way as a body that is received over the network.
+
+    """
+    requests = import_requests()
+    from urllib3.response import HTTPResponse
+
+    headers = requests.structures.CaseInsensitiveDict(interaction["headers"])
+    response = requests.Response()
+    response.status_code = interaction["status"]
+    response.reason = interaction["reason"]
+    response.url = interaction["url"]
+    response.headers = headers
+    response.encoding = requests.utils.get_encoding_from_headers(headers)
+    response.request = prepared
+    response.elapsed = timedelta(seconds=interaction["elapsed"])
+    response.raw = HTTPResponse(
+        body=io.BytesIO(body),
+        headers=dict(headers),
+        status=interaction["status"],
+        reason=interaction["reason"],
+        preload_content=False,
+        decode_content=True,
+    )
+    if not stream:
+        # read the body, just like requests does for a response that is not streamed
+        response.content
+    return response
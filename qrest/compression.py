@@ -0,0 +1,192 @@
+"""This module contains the configuration of the compression of request bodies
+and responses, and the functions that apply it.
+
+Request bodies are compressed by qrest itself. Responses are decompressed by
+the transport while they are read, qrest only advertises which encodings it
+accepts.
+
+"""
+
+import json
+import zlib
+from collections.abc import Iterator
+from typing import Iterable, Optional, Sequence, Tuple
+
+# ================================================================================================
+# local imports
+from .exception import RestClientConfigurationError
+from .utils import import_optional, set_header
+
+REQUEST_ENCODINGS = ("gzip", "deflate", "br")
+"""the encodings that can be used to compress request bodies"""
+
+RESPONSE_ENCODINGS = ("gzip", "deflate", "br", "identity")
+"""the encodings that can be advertised for responses"""
+
+
+# ================================================================================================
+class CompressionConfig:
+    """Configuration of the compression of request bodies and responses.
+
+    An instance can be assigned to attribute ``compression`` of an APIConfig,
+    which makes it the default for all endpoints, or to attribute
+    ``compression`` of a ResourceConfig.
+
+    """
+
+    def __init__(
+        self,
+        request_encoding: Optional[str] = "gzip",
+        threshold: int = 1024,
+        accept_encoding: Optional[Sequence[str]] = ("gzip", "deflate"),
+        stream_responses: bool = True,
+    ):
+        """
+        :param request_encoding: the encoding to compress request bodies with, one of "gzip",
+            "deflate" or "br". Use None to send request bodies uncompressed
+        :param threshold: the minimum size in bytes of a request body to compress it. Streamed
+            bodies have an unknown size and are always compressed
+        :param accept_encoding: the encodings the server may use to compress the response. Use
+            None to leave the Accept-Encoding header to the transport
+        :param stream_responses: if True, the response body is decompressed while the response
+            reads it instead of the transport reading it into memory first. A CSV response is
+            then parsed one line at a time, but a JSON response is still read into a single
+            string before it is decoded
+        """
+        self.request_encoding = request_encoding
+        self.threshold = threshold
+        self.accept_encoding = accept_encoding
+        self.stream_responses = stream_responses
+
+    def validate(self):
+        """Check the configuration and raise a RestClientConfigurationError if it is invalid."""
+        if self.request_encoding and self.request_encoding not in REQUEST_ENCODINGS:
+            raise RestClientConfigurationError(
+                "request_encoding must be one of %s" % ", ".join(REQUEST_ENCODINGS)
+            )
+        if not isinstance(self.threshold, int) or self.threshold < 0:
+            raise RestClientConfigurationError("threshold must be a non-negative integer")
+        if self.accept_encoding is not None:
+            if isinstance(self.accept_encoding, str):
+                raise RestClientConfigurationError("accept_encoding must be a list of encodings")
+            for encoding in self.accept_encoding:
+                if encoding not in RESPONSE_ENCODINGS:
+                    raise RestClientConfigurationError(
+                        "accept_encoding can only contain %s" % ", ".join(RESPONSE_ENCODINGS)
+                    )
+        if not isinstance(self.stream_responses, bool):
+            raise RestClientConfigurationError("stream_responses is not True or False")
+
+        # the transport can only decode brotli responses when the brotli package is available
+        if self.request_encoding == "br" or "br" in (self.accept_encoding or ()):
+            import_optional("brotli", extra="brotli")
+
+    def apply(
+        self, arguments: dict, headers: dict, stats: "CompressionStats"
+    ) -> Tuple[dict, dict]:
+        """Return the request arguments and headers with the compression applied.
+
+        :param arguments: the keyword arguments for requests.request that send the body, as
+            returned by qrest.body.encode_body
+        :param headers: the headers of the request
+        :param stats: the statistics to update with the sizes of the request body
+        """
+        if self.accept_encoding is not None:
+            accepted = ", ".join(self.accept_encoding) or "identity"
+            headers = set_header(headers, "Accept-Encoding", accepted)
+
+        if not self.request_encoding:
+            return arguments, headers
+
+        data = arguments.get("data")
+        if "json" in arguments:
+            if not arguments["json"]:
+                return arguments, headers
+            payload = json.dumps(arguments["json"]).encode("utf-8")
+            # requests only sets the content type for bodies it serializes itself
+            headers = set_header(headers, "Content-Type", "application/json", replace=False)
+        elif isinstance(data, bytes):
+            payload = data
+        elif isinstance(data, Iterator) and not hasattr(data, "read"):
+            data = _compress_stream(data, self.request_encoding, stats)
+            headers = set_header(headers, "Content-Encoding", self.request_encoding)
+            return {"data": data}, headers
+        else:
+            # file-like objects and mmap buffers are sent as-is
+            return arguments, headers
+
+        stats.request_original = stats.request_sent = len(payload)
+        if len(payload) < self.threshold:
+            return {"data": payload}, headers
+
+        payload = compress(payload, self.request_encoding)
+        stats.request_sent = len(payload)
+        headers = set_header(headers, "Content-Encoding", self.request_encoding)
+        return {"data": payload}, headers
+
+
+# ================================================================================================
+class CompressionStats:
+    """Sizes in bytes of the body of a request and its response, before and after compression.
+
+    The sizes of a streamed request body are known once it has been sent.
+
+    """
+
+    def __init__(self):
+        self.request_original = 0
+        self.request_sent = 0
+        self.response_received = 0
+        self.response_decoded = 0
+
+    @property
+    def bytes_saved(self) -> int:
+        """Return the number of bytes that did not have to be transferred."""
+        return (self.request_original - self.request_sent) + (
+            self.response_decoded - self.response_received
+        )
+
+    def __repr__(self):
+        return (
+            f"CompressionStats(request_original={self.request_original}, "
+            f"request_sent={self.request_sent}, response_received={self.response_received}, "
+            f"response_decoded={self.response_decoded})"
+        )
+
+
+# ================================================================================================
+def compress(payload: bytes, encoding: str) -> bytes:
+    """Return the given payload compressed using the given encoding."""
+    if encoding == "br":
+        return import_optional("brotli", extra="brotli").compress(payload)
+    compressor = _zlib_compressor(encoding)
+    return compressor.compress(payload) + compressor.flush()
+
+
+def _compress_stream(chunks: Iterable[bytes], encoding: str, stats: CompressionStats):
+    """Yield the given chunks compressed using the given encoding."""
+    if encoding == "br":
+        compressor = import_optional("brotli", extra="brotli").Compressor()
+        flush = compressor.finish
+        compress_chunk = compressor.process
+    else:
+        compressor = _zlib_compressor(encoding)
+        flush = compressor.flush
+        compress_chunk = compressor.compress
+
+    for chunk in chunks:
+        stats.request_original += len(chunk)
+        compressed = compress_chunk(chunk)
+        if compressed:
+            stats.request_sent += len(compressed)
+            yield compressed
+    compressed = flush()
+    stats.request_sent += len(compressed)
+    yield compressed
+
+
+def _zlib_compressor(encoding: str):
+    """Return a zlib compressor for encoding "gzip" or "deflate"."""
+    # gzip uses a gzip header and trailer, the HTTP deflate encoding uses the zlib format
+    wbits = 16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS
+    return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, wbits)
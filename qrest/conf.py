@@ -1,36 +1,79 @@
 """
 Contains the configuration classes to create a :class:`qrest.resource.API`.
 """
+import functools
+import weakref
 from collections import defaultdict
-from typing import Dict, Optional, Type
+from collections.abc import Mapping
+from typing import Callable, Dict, List, Optional, Type
 
 import logging
 
 # ================================================================================================
 # local imports
-from .auth import AuthConfig
+from .body import check_encoding
+from .compression import CompressionConfig
 from .resource import Resource, JSONResource
 from .exception import RestClientConfigurationError
 from .utils import URLValidator
 
-# ================================================================================================
-#  Interface tweak
-from requests.packages.urllib3 import disable_warnings
-from requests.packages.urllib3.exceptions import InsecureRequestWarning
-
 logger = logging.getLogger(__name__)
 
-disable_warnings(InsecureRequestWarning)
+OPTIONAL_ATTRIBUTES = (
+    "description",
+    "headers",
+    "path_description",
+    "processor",
+    "compression",
+    "hedging",
+)
+"""the optional class attributes of a ResourceConfig that are passed to its init dunder"""
+
+
+class _InterningType(type):
+    """Metaclass of ParameterConfig that freezes each new instance and interns it.
+
+    A parameter definition that is identical to an existing one results in the
+    existing instance, so configurations that repeat the same parameter for
+    many endpoints store it only once.
+
+    """
+
+    def __call__(cls, *args, **kwargs):
+        instance = super().__call__(*args, **kwargs)
+        object.__setattr__(instance, "_frozen", True)
+
+        key = instance._interning_key()
+        if key is None:
+            return instance
+        return cls._interned.setdefault(key, instance)
 
 
-class ParameterConfig:
+class ParameterConfig(metaclass=_InterningType):
     """Contain and validate parameters for a REST endpoint. As this is a
     configuration container only, the main purpose is to store the config and
     check if the input aligns with the intended use. There is no validation
     beyond this point
 
+    A ParameterConfig is immutable once it has been initialized, and identical
+    parameter definitions share a single instance.
+
     """
 
+    __slots__ = (
+        "name",
+        "required",
+        "multiple",
+        "exclusion_group",
+        "default",
+        "choices",
+        "description",
+        "_frozen",
+        "__weakref__",
+    )
+
+    _interned = weakref.WeakValueDictionary()
+
     # -----------------------------------------------------------------------------------------------------
     def __init__(
         self,
@@ -54,14 +97,17 @@ class ParameterConfig:
         :param default: the default entry if this parameter is not supplied
         :param choices: a list of possible values for this parameter
         :param description: any information about the parameter, such as data format
+
+        A list given as default or choices is stored as a tuple, because the instance can be
+        shared by the identical definitions of other endpoints.
         """
 
         self.name = name
         self.required = required
         self.multiple = multiple
         self.exclusion_group = exclusion_group
-        self.default = default
-        self.choices = choices
+        self.default = tuple(default) if isinstance(default, list) else default
+        self.choices = tuple(choices) if isinstance(choices, list) else choices
         self.description = description or ""
         self._validate()
 
@@ -86,8 +132,8 @@ class ParameterConfig:
             raise RestClientConfigurationError(
                 "you cannot combine required=True and a default setting"
             )
-        if self.choices and not isinstance(self.choices, list):
-            raise RestClientConfigurationError("choices must be a list")
+        if self.choices and not isinstance(self.choices, tuple):
+            raise RestClientConfigurationError("choices must be a list or tuple")
         if self.default and self.choices:
             if self.default not in self.choices:
                 raise RestClientConfigurationError(
@@ -99,6 +145,59 @@ class ParameterConfig:
             msg = "Query parameters can't have None as name attribute value"
             raise RestClientConfigurationError(msg)
 
+    # -----------------------------------------------------------------------------------------------------
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"{type(self).__name__} is immutable")
+        object.__setattr__(self, name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __setstate__(self, state):
+        # the default implementation would use __setattr__, which fails for a frozen instance
+        instance_dict, slots = state if isinstance(state, tuple) else (state, None)
+        for name, value in {**(instance_dict or {}), **(slots or {})}.items():
+            object.__setattr__(self, name, value)
+
+    def _interning_key(self) -> Optional[tuple]:
+        """Return the key that identifies identical parameter definitions, or None if this
+        definition cannot be shared
+        """
+        if hasattr(self, "__dict__"):
+            # a subclass without __slots__ may store anything
+            return None
+        values = [type(self)]
+        for cls in type(self).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if slot not in ("_frozen", "__weakref__"):
+                    values.append(_typed(getattr(self, slot)))
+        key = tuple(values)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+
+def _typed(value):
+    """Return the given value tagged with its type and, for a container, the types of its
+    elements, as the type distinguishes values that compare equal, such as 1 and True
+    """
+    if isinstance(value, (list, tuple)):
+        return (type(value), tuple(_typed(element) for element in value))
+    if isinstance(value, (set, frozenset)):
+        return (type(value), frozenset(_typed(element) for element in value))
+    if isinstance(value, dict):
+        return (type(value), tuple((_typed(k), _typed(v)) for k, v in value.items()))
+    return (type(value), value)
+
 
 # ================================================================================================
 class QueryParameter(ParameterConfig):
@@ -106,17 +205,39 @@ class QueryParameter(ParameterConfig):
     Subclass to specify parameters to be placed in the query part of the REST request
     """
 
+    __slots__ = ()
+
     call_location = "query"
 
 
 # ================================================================================================
 class BodyParameter(ParameterConfig):
     """
-    Subclass to specify parameters to be placed in the query part of the REST request
+    Subclass to specify parameters to be placed in the body part of the REST request
     """
 
+    __slots__ = ("encoding",)
+
     call_location = "body"
 
+    # -----------------------------------------------------------------------------------------------------
+    def __init__(self, *args, encoding: str = "json", **kwargs):
+        """
+        Body parameter configuration. Accepts the arguments of ParameterConfig and
+
+        :param encoding: how the body is serialized, one of "json", "ndjson", "msgpack" or
+            "cbor". If the value of a body parameter without a name is an iterator, the body is
+            serialized one record at a time, e.g. as a JSON array for "json" and as one line per
+            record for "ndjson"
+        """
+        self.encoding = encoding
+        super().__init__(*args, **kwargs)
+
+    # -----------------------------------------------------------------------------------------------------
+    def _validate(self):
+        super()._validate()
+        check_encoding(self.encoding)
+
 
 # ================================================================================================
 class ResourceConfig:
@@ -135,6 +256,9 @@ class ResourceConfig:
         processor: Optional[Type[Resource]] = None,
         description: Optional[str] = None,
         path_description: Optional[dict] = None,
+        compression: Optional[CompressionConfig] = None,
+        hedging=None,
+        validate: bool = True,
     ):
         """
         Constructor, stores externally supplied parameters and validate the quality of it
@@ -153,6 +277,12 @@ class ResourceConfig:
         :param description: A general description of the endpoint that can be obtained by the user
             through the description property of the endpointconfig instance
         :param path_description: a dictionary that provides a description for each path parameter.
+        :param compression: configures the compression of request bodies and responses. If not
+            set, the compression configured for the APIConfig is used
+        :param hedging: a qrest.hedging.HedgingConfig to send a second request when the response
+            is slow. Only allowed for GET and PUT
+        :param validate: False to skip the validation of a configuration that has been
+            validated before, such as a configuration that is restored from a cache file
 
         """
         self.path = path
@@ -161,42 +291,65 @@ class ResourceConfig:
         self.method = method
         self.parameters = parameters or {}
         self.headers = headers
+        self.compression = compression
+        self.hedging = hedging
 
         #  we cannot set default processor above in the parameters as this means all endpoints
         #  share the same processor instance, and they cross-contaminate . By setting this below
         #  we enforce recreation of a new unique Resource instance each time
         self.processor = processor if processor is not None else JSONResource()
-        self.validate()
+        if validate:
+            self.validate()
 
     @classmethod
-    def create(cls):
+    def create(cls, validate: bool = True):
         """Return a ResourceConfig initialized from its class attributes.
 
+        :param validate: False to skip the validation, see the init dunder
+
         :raises RestClientConfigurationError: when one of the required
             class attributes ``method`` or ``path`` is missing
 
         """
-        all_attributes = dir(cls)
+        # only the subclasses define configuration attributes, so the namespace of the base
+        # classes does not have to be searched
+        all_attributes = {}
+        for klass in reversed(cls.__mro__):
+            if klass not in (ResourceConfig, object):
+                all_attributes.update(vars(klass))
 
         required_attributes = ["method", "path"]
         for attribute in required_attributes:
             if attribute not in all_attributes:
                 raise RestClientConfigurationError(f"Required attribute '{attribute}' is missing")
-        args = [cls.path, cls.method]
 
-        kwargs = {}
-        optional_attributes = ["description", "headers", "path_description", "processor"]
-        for attribute in optional_attributes:
-            if attribute in all_attributes:
-                kwargs[attribute] = getattr(cls, attribute)
+        attributes = [a for a in OPTIONAL_ATTRIBUTES if a in all_attributes]
+        parameters = [
+            name
+            for name in sorted(all_attributes)
+            if isinstance(all_attributes[name], ParameterConfig)
+        ]
+        return cls._construct(attributes, parameters, validate)
 
-        for attribute_name in all_attributes:
-            attribute = getattr(cls, attribute_name)
-            if isinstance(attribute, ParameterConfig):
-                parameters = kwargs.setdefault("parameters", {})
-                parameters[attribute_name] = attribute
+    @classmethod
+    def _construct(cls, attributes: List[str], parameters: List[str], validate: bool = True):
+        """Return a ResourceConfig initialized from the given class attributes.
+
+        Method create determines these attributes, and module qrest.cache stores them.
+
+        :param attributes: the names of the optional class attributes that are defined, see
+            OPTIONAL_ATTRIBUTES
+        :param parameters: the names of the class attributes that are a ParameterConfig
+        :param validate: False to skip the validation, see the init dunder
+        """
+        kwargs = {attribute: getattr(cls, attribute) for attribute in attributes}
+        if parameters:
+            kwargs["parameters"] = {name: getattr(cls, name) for name in parameters}
 
-        return cls(*args, **kwargs)
+        if not validate:
+            # only passed when needed, so a subclass can override the init dunder without it
+            kwargs["validate"] = False
+        return cls(cls.path, cls.method, **kwargs)
 
     # ----------------------------------------------------
     def validate(self):
@@ -240,6 +393,24 @@ class ResourceConfig:
                     "Parameter '%s' must be ParameterConfig instance" % str(key)
                 )
 
+        # compression --------------------
+        if self.compression is not None:
+            if not isinstance(self.compression, CompressionConfig):
+                raise RestClientConfigurationError(
+                    "compression is not an instance of CompressionConfig"
+                )
+            self.compression.validate()
+
+        # hedging, which is only imported when it is used --------------------
+        if self.hedging is not None:
+            from .hedging import HedgingConfig
+
+            if not isinstance(self.hedging, HedgingConfig):
+                raise RestClientConfigurationError("hedging is not an instance of HedgingConfig")
+            self.hedging.validate()
+            if self.method not in ("GET", "PUT"):
+                raise RestClientConfigurationError("hedging is only allowed for GET and PUT")
+
         #  resource class ----------------------------------
         if self.processor:
             if not isinstance(self.processor, Resource):
@@ -251,14 +422,22 @@ class ResourceConfig:
                 if self.parameters[key].call_location == "body":
                     raise RestClientConfigurationError("body parameter not allowed in GET request")
 
+        encodings = {
+            p.encoding for p in self.parameters.values() if p.call_location == "body"
+        }
+        if len(encodings) > 1:
+            raise RestClientConfigurationError("body parameters must use the same encoding")
+
     # --------------------------------------------------------------------------------------------
-    def apply_default_headers(self, default):
+    def apply_default_headers(self, default, validate: bool = True):
         """For internal use. Update endpoint parameters from a shared default. This
         allows the user to set e.g. headers that are applicable to multiple
         endpoints in a single activity.
 
         Note that this default only provides functionality for headers
 
+        :param validate: False to skip the validation, see the init dunder
+
         """
 
         # check types
@@ -272,7 +451,8 @@ class ResourceConfig:
         self.headers = def_head
 
         # re-validate to be sure current data is OK
-        self.validate()
+        if validate:
+            self.validate()
 
     # ---------------------------------------------------------------------------------------------
     @property
@@ -293,6 +473,18 @@ class ResourceConfig:
                 path_parameters.append(part[1:-1])
         return path_parameters
 
+    # ---------------------------------------------------------------------------------------------
+    @property
+    def body_encoding(self) -> str:
+        """Returns the encoding of the body, which is "json" if there are no body parameters
+
+        :return: one of the keys of qrest.body.BODY_ENCODINGS
+        """
+        for item in self.parameters.values():
+            if item.call_location == "body":
+                return item.encoding
+        return "json"
+
     # ---------------------------------------------------------------------------------------------
     @property
     def query_parameter_groups(self) -> dict:
@@ -408,6 +600,48 @@ class ResourceConfig:
         return defaults
 
 
+# ==================================================================================================
+class LazyEndpoints(Mapping):
+    """Map endpoint names to ResourceConfig instances that are created on first access.
+
+    A ResourceConfig instance is created the first time it is looked up.
+    Iteration, membership tests and len() only use the endpoint names and do
+    not create any instance.
+
+    """
+
+    def __init__(self, factories: Dict[str, Callable[[], ResourceConfig]]):
+        """
+        :param factories: maps each endpoint name to a function that returns its
+            ResourceConfig, e.g. method create of the ResourceConfig subclass
+        """
+        self._factories = dict(factories)
+        self._endpoints = {}
+
+        self.on_create: Optional[Callable[[ResourceConfig], None]] = None
+        """called with each ResourceConfig instance right after its creation"""
+
+    def __getitem__(self, name: str) -> ResourceConfig:
+        try:
+            return self._endpoints[name]
+        except KeyError:
+            endpoint = self._factories[name]()
+            if self.on_create is not None:
+                self.on_create(endpoint)
+            # another thread may have created the same endpoint in the meantime
+            return self._endpoints.setdefault(name, endpoint)
+
+    def __iter__(self):
+        return iter(self._factories)
+
+    def __len__(self) -> int:
+        return len(self._factories)
+
+    def is_created(self, name: str) -> bool:
+        """Return True iff the ResourceConfig of the given endpoint has been created."""
+        return name in self._endpoints
+
+
 # ==================================================================================================
 class APIConfig:
     """
@@ -415,18 +649,36 @@ class APIConfig:
     """
 
     url = None
-    """base URL of the REST API"""
+    """base URL of the REST API, or a list of the base URLs of its replicas"""
+
+    balancing = None
+    """BalancingConfig of the load balancing across the replicas when url is a list"""
 
     authentication = None
 
     verify_ssl = False
     """False if and only if verification of the SSL certificate should be ignored"""
 
-    endpoints: Dict[str, ResourceConfig]
+    compression = None
+    """default CompressionConfig for the endpoints that do not configure their own"""
+
+    memory_lean = False
+    """True iff the resources should not keep the body, the response or the parameters of a call
+    after it. See method Resource.configure"""
 
-    def __init__(self, endpoints: Dict[str, ResourceConfig]):
+    endpoints: Mapping
+
+    @property
+    def urls(self) -> list:
+        """Return the base URLs of the REST API, which has more than one when it is replicated."""
+        return list(self.url) if isinstance(self.url, (list, tuple)) else [self.url]
+
+    def __init__(self, endpoints: Mapping):
         """Configure and validate the current APIConfig for the given endpoints.
 
+        :param endpoints: maps each endpoint name to its ResourceConfig. If this is a
+            LazyEndpoints, the defaults are applied to each endpoint when it is created
+
         :raises RestClientConfigurationError: when validation fails
 
         """
@@ -436,32 +688,77 @@ class APIConfig:
         self._apply_defaults()
         self._validate()
 
-    def _apply_defaults(self):
+    def _apply_defaults(self, validate: bool = True):
         """
         rotate through the endpoints and apply the default settings
+
+        :param validate: False to skip the validation of endpoints that have been validated
+            before, such as endpoints that are restored from a cache file
         """
-        if "default_headers" in dir(self):
+        if isinstance(self.endpoints, LazyEndpoints):
+            self.endpoints.on_create = functools.partial(
+                self._apply_endpoint_defaults, validate=validate
+            )
+        else:
             for endpoint in self.endpoints.values():
-                endpoint.apply_default_headers(self.default_headers)
+                self._apply_endpoint_defaults(endpoint, validate)
+
+    def _apply_endpoint_defaults(self, endpoint: ResourceConfig, validate: bool = True):
+        """
+        apply the default settings to the given endpoint
+        """
+        if hasattr(self, "default_headers"):
+            endpoint.apply_default_headers(self.default_headers, validate)
+        if self.compression is not None and endpoint.compression is None:
+            endpoint.compression = self.compression
 
     def _validate(self):
         """
         Validates a resources configuration and raises appropriate exceptions
         """
-        for resource_name, resource_config in self.endpoints.items():
+        for resource_name in self.endpoints:
             if resource_name == "data":
                 raise RestClientConfigurationError("resource name may not be named 'data'")
 
         # check url definition
         if not self.url:
             raise RestClientConfigurationError("url is not set")
-        URLValidator().check(self.url, require_path=False)
+        if isinstance(self.url, (list, tuple)):
+            for url in self.url:
+                if not isinstance(url, str):
+                    raise RestClientConfigurationError("url is not a string or list of strings")
+                URLValidator().check(url, require_path=False)
+        else:
+            URLValidator().check(self.url, require_path=False)
+
+        # optional load balancing, which is only imported when it is used
+        if self.balancing is not None:
+            from .balancer import BalancingConfig
+
+            if not isinstance(self.balancing, BalancingConfig):
+                raise RestClientConfigurationError(
+                    "balancing attribute is not an instance of BalancingConfig"
+                )
+            self.balancing.validate()
 
         if not isinstance(self.verify_ssl, bool):
             raise RestClientConfigurationError("verify_ssl is not True or False")
 
-        # optional auth module
-        if self.authentication and not isinstance(self.authentication, AuthConfig):
-            raise RestClientConfigurationError(
-                "authentication attribute is not an initiated instance of AuthConfig"
-            )
+        if not isinstance(self.memory_lean, bool):
+            raise RestClientConfigurationError("memory_lean is not True or False")
+
+        if self.compression is not None:
+            if not isinstance(self.compression, CompressionConfig):
+                raise RestClientConfigurationError(
+                    "compression attribute is not an instance of CompressionConfig"
+                )
+            self.compression.validate()
+
+        # optional auth module, which is only imported when it is used
+        if self.authentication:
+            from .auth import AuthConfig
+
+            if not isinstance(self.authentication, AuthConfig):
+                raise RestClientConfigurationError(
+                    "authentication attribute is not an initiated instance of AuthConfig"
+                )
@@ -2,9 +2,6 @@
 local exceptions
 """
 
-from requests import HTTPError
-from requests.models import Response
-
 
 # ================================================================================================
 class RestClientException(Exception):
@@ -31,6 +28,12 @@ class RestClientQueryError(RestClientException):
     pass
 
 
+class RestClientCassetteError(RestClientException):
+    """An error when a cassette has not recorded a response for a request."""
+
+    pass
+
+
 class InvalidTargetError(RestClientException):
     """An error when specifying an invalid target for a given REST API."""
 
@@ -102,32 +105,52 @@ class RestBadRequestError(RestClientResourceError):
     pass
 
 
-class RestResourceHTTPError(HTTPError):
-    """An error when specifying an invalid target for a given REST API."""
+def _create_rest_resource_http_error():
+    """Return class RestResourceHTTPError.
+
+    The class derives from requests.HTTPError, so it is only created when it
+    is accessed, see function __getattr__ of this module.
+
+    """
+    from requests import HTTPError
+    from requests.models import Response
+
+    class RestResourceHTTPError(HTTPError):
+        """An error when specifying an invalid target for a given REST API."""
+
+        def __init__(self, response_object, *args, **kwargs):
+            """
+            RestResourceError constructor
+            """
+
+            assert isinstance(response_object, Response)
+            self.response = response_object
+            self.code = self.response.status_code
+            self.reason = self.response.reason
+
+            if self.code == 400:
+                raise RestBadRequestError("Bad request for resource %s" % (self.response.url,))
+            elif self.code == 404:
+                raise RestResourceNotFoundError("Object could not be found in database")
+            elif self.code in (401, 402, 403):
+                raise RestAccessDeniedError(
+                    "error %d: Access is denied to resource %s" % (self.code, self.response.url)
+                )
+            elif self.code in (500,):
+                raise RestInternalServerError(
+                    "error %d: Internal Server error (%s)" % (self.code, self.reason)
+                )
+            else:
+                raise Exception("REST error %d: %s" % (self.code, self.reason))
+
+            super().__init__(*args, **kwargs)
+
+    RestResourceHTTPError.__module__ = __name__
+    return RestResourceHTTPError
 
-    def __init__(self, response_object, *args, **kwargs):
-        """
-        RestResourceError constructor
-        """
 
-        assert isinstance(response_object, Response)
-        self.response = response_object
-        self.code = self.response.status_code
-        self.reason = self.response.reason
-
-        if self.code == 400:
-            raise RestBadRequestError("Bad request for resource %s" % (self.response.url,))
-        elif self.code == 404:
-            raise RestResourceNotFoundError("Object could not be found in database")
-        elif self.code in (401, 402, 403):
-            raise RestAccessDeniedError(
-                "error %d: Access is denied to resource %s" % (self.code, self.response.url)
-            )
-        elif self.code in (500,):
-            raise RestInternalServerError(
-                "error %d: Internal Server error (%s)" % (self.code, self.reason)
-            )
-        else:
-            raise Exception("REST error %d: %s" % (self.code, self.reason))
-
-        super().__init__(*args, **kwargs)
+def __getattr__(name):
+    if name == "RestResourceHTTPError":
+        globals()[name] = _create_rest_resource_http_error()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
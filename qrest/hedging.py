@@ -0,0 +1,244 @@
+"""This module contains hedged requests, which cut the tail latency of idempotent endpoints.
+
+When the response to a request does not arrive within a delay, a hedged
+request sends a second, identical request and uses the response that arrives
+first. Hedging is configured per ResourceConfig::
+
+  class Posts(ResourceConfig):
+      name = "posts"
+      path = ["posts"]
+      method = "GET"
+      hedging = HedgingConfig(delay="p95", budget=0.05)
+
+The delay is a fixed number of seconds or a quantile of the latencies of the
+resource so far, such as ``"p95"``. Until ``min_samples`` latencies have
+been observed, the delay of a quantile is ``initial_delay``. The delay starts
+when the request is sent, and the quantile is computed from the latencies of
+the first request of each call, also when its hedge won, so the hedges do not
+lower the delay.
+
+The budget caps the extra load: the number of second requests is at most
+``budget`` times the number of requests. The requests of a resource are sent
+by a thread pool of at most ``max_workers`` threads. When all of them are
+busy, a request is sent by the calling thread without a hedge, so an
+overloaded server does not get even more requests. The second request of an
+API with several replicas is sent to the replica the load balancer selects,
+which is usually another one, see module qrest.balancer.
+
+The transport cannot abort a request that is in progress, so the request
+that loses is abandoned and its response is closed when it arrives. The
+hedges sent and won are counted in attributes ``hedges`` and ``hedge_won`` of
+the timing of the response, and by a MetricsRegistry.
+
+"""
+
+import concurrent.futures
+import contextvars
+import re
+import threading
+import time
+from typing import Callable, Optional, Union
+
+# ================================================================================================
+# local imports
+from .exception import RestClientConfigurationError
+from .metrics import Histogram
+
+_QUANTILE = re.compile(r"p(\d{1,2}(\.\d+)?)")
+
+
+# ================================================================================================
+class HedgingConfig:
+    """Configuration of the hedged requests of an endpoint.
+
+    An instance can be assigned to attribute ``hedging`` of a ResourceConfig
+    whose method is GET or PUT.
+
+    """
+
+    def __init__(
+        self,
+        delay: Union[float, str] = "p95",
+        budget: float = 0.05,
+        initial_delay: float = 0.1,
+        min_samples: int = 20,
+        max_workers: int = 16,
+    ):
+        """
+        :param delay: the number of seconds to wait for a response before the second request is
+            sent, or a quantile of the observed latencies such as "p95" or "p99.9"
+        :param budget: the maximum number of second requests as a fraction of the requests
+        :param initial_delay: the delay in seconds for a quantile until enough latencies have
+            been observed
+        :param min_samples: the number of latencies to observe before a quantile is used
+        :param max_workers: the maximum number of requests of the resource that are in progress
+            in the thread pool, beyond which requests are sent without a hedge
+        """
+        self.delay = delay
+        self.budget = budget
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.max_workers = max_workers
+
+    @property
+    def quantile(self) -> Optional[float]:
+        """Return the quantile of the delay as a fraction, or None for a fixed delay."""
+        if isinstance(self.delay, str):
+            return float(_QUANTILE.fullmatch(self.delay).group(1)) / 100
+        return None
+
+    def validate(self):
+        """Check the configuration and raise a RestClientConfigurationError if it is invalid."""
+        if isinstance(self.delay, str):
+            if not _QUANTILE.fullmatch(self.delay):
+                raise RestClientConfigurationError(
+                    'delay must be a number of seconds or a quantile like "p95"'
+                )
+        elif not isinstance(self.delay, (int, float)) or self.delay < 0:
+            raise RestClientConfigurationError("delay must be a non-negative number")
+        if not isinstance(self.budget, (int, float)) or not 0 <= self.budget <= 1:
+            raise RestClientConfigurationError("budget must be a number in [0, 1]")
+        if not isinstance(self.initial_delay, (int, float)) or self.initial_delay < 0:
+            raise RestClientConfigurationError("initial_delay must be a non-negative number")
+        if not isinstance(self.min_samples, int) or self.min_samples < 1:
+            raise RestClientConfigurationError("min_samples must be a positive integer")
+        if not isinstance(self.max_workers, int) or self.max_workers < 1:
+            raise RestClientConfigurationError("max_workers must be a positive integer")
+
+
+# ================================================================================================
+class Hedger:
+    """Sends the hedged requests of a single resource and keeps track of their latency."""
+
+    def __init__(self, config: HedgingConfig):
+        self.config = config
+        self.latency = Histogram()
+        """the latencies of the first request of each call of the resource"""
+
+        self.requests = 0
+        """the number of requests sent, not counting the second requests"""
+
+        self.hedges = 0
+        """the number of second requests sent"""
+
+        self.won = 0
+        """the number of second requests whose response was used"""
+
+        self._busy = 0
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        """Return the number of seconds to wait before the second request is sent."""
+        quantile = self.config.quantile
+        if quantile is None:
+            return self.config.delay
+        with self._lock:
+            if self.latency.count < self.config.min_samples:
+                return self.config.initial_delay
+            return self.latency.quantile(quantile)
+
+    def send(self, send: Callable, timing=None):
+        """Send the request, and a second one when it is slow, and return the first response.
+
+        :param send: the function that sends the request and returns the requests.Response, or
+            a tuple whose first item is the requests.Response. It is called from the threads of
+            a thread pool, or from the calling thread when all of them are busy
+        :param timing: the qrest.instrumentation.Timing of the request, which counts the hedges
+        """
+        with self._lock:
+            self.requests += 1
+            reserved = self._reserve()
+        if not reserved:
+            start = time.perf_counter()
+            response = send()
+            self._record(time.perf_counter() - start)
+            return response
+
+        first, start = self._submit(send)
+
+        def record(future: concurrent.futures.Future):
+            # the latency of the first request is recorded even when the second one wins
+            if future.exception() is None:
+                self._record(time.perf_counter() - start)
+
+        first.add_done_callback(record)
+        try:
+            return first.result(timeout=max(0.0, start + self.delay() - time.perf_counter()))
+        except concurrent.futures.TimeoutError:
+            pass
+
+        with self._lock:
+            hedge = self.hedges + 1 <= self.config.budget * self.requests and self._reserve()
+            if hedge:
+                self.hedges += 1
+        if not hedge:
+            return first.result()
+
+        second, _ = self._submit(send)
+        if timing is not None:
+            timing.hedges += 1
+        done, _ = concurrent.futures.wait((first, second), return_when="FIRST_COMPLETED")
+        winner, loser = (first, second) if first in done else (second, first)
+        if winner.exception() is not None:
+            # the other request may still succeed
+            winner, loser = loser, winner
+        response = winner.result()
+        loser.add_done_callback(_close)
+
+        if winner is second:
+            with self._lock:
+                self.won += 1
+            if timing is not None:
+                timing.hedge_won = True
+        return response
+
+    def _reserve(self) -> bool:
+        """Reserve a thread of the pool for a request, unless all of them are busy.
+
+        The caller holds the lock.
+        """
+        if self._busy >= self.config.max_workers:
+            return False
+        self._busy += 1
+        return True
+
+    def _submit(self, send: Callable):
+        """Send the request from a reserved thread of the pool.
+
+        :return: the future of the response and the time.perf_counter() at which the request
+            started, which is after the thread picked it up
+        """
+        started = threading.Event()
+        start = []
+
+        def run():
+            start.append(time.perf_counter())
+            started.set()
+            try:
+                return send()
+            finally:
+                with self._lock:
+                    self._busy -= 1
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.config.max_workers, thread_name_prefix="qrest-hedging"
+                )
+        # the request is sent in the context of the call, e.g. with the cassette in use
+        future = self._executor.submit(contextvars.copy_context().run, run)
+        # a reserved thread picks up the request right away
+        started.wait()
+        return future, start[0]
+
+    def _record(self, latency: float):
+        with self._lock:
+            self.latency.record(latency)
+
+
+def _close(future: concurrent.futures.Future):
+    """Close the response of the request that lost, which releases its connection."""
+    if future.exception() is None:
+        result = future.result()
+        (result[0] if isinstance(result, tuple) else result).close()
@@ -0,0 +1,182 @@
+"""This module contains the timing record of a request and the hooks that receive it.
+
+Each request of a Resource produces a Timing, which is attached to the
+returned Response as attribute ``timing``. Hooks can be registered on an API,
+which applies them to all its resources, or on a single Resource::
+
+  def log_slow_requests(resource, timing, response):
+      if timing.total > 1.0:
+          print(timing)
+
+  api.add_hook("post_response", log_slow_requests)
+
+The following events are supported:
+
+- ``pre_request``, called as ``hook(resource, timing)`` right before the request is sent,
+- ``post_response``, called as ``hook(resource, timing, response)`` after the response has
+  been received, where response is the qrest Response,
+- ``error``, called as ``hook(resource, timing, error)`` when the request raises an
+  exception.
+
+Each call ends with either ``post_response`` or ``error``. Calling a resource
+parses the body as part of the call, so a body that cannot be parsed is an
+error of the call. The body of a Response from method get_response is parsed
+on first access to its data, after the call, and an error then is only raised.
+
+An exception raised by a hook is logged and otherwise ignored.
+
+"""
+
+import logging
+import time
+from typing import Callable, Optional
+
+# ================================================================================================
+# local imports
+from .exception import RestClientConfigurationError
+from .tracing import Span, child_span
+
+logger = logging.getLogger(__name__)
+
+EVENTS = ("pre_request", "post_response", "error")
+"""the events for which hooks can be registered"""
+
+
+# ================================================================================================
+class Timing:
+    """The time spent in each phase of a single request, in seconds, and its sizes in bytes.
+
+    The transport does not report the time to resolve the host name and to
+    connect separately, so these are part of ``ttfb``. For a streamed response,
+    the time to download the body is part of ``parse``. The body of a Response
+    from method get_response is parsed on first access to its data, after the
+    hooks for ``post_response`` have been called, which then adds to ``parse``
+    and ``total``.
+
+    """
+
+    __slots__ = (
+        "resource",
+        "method",
+        "url",
+        "status",
+        "validation",
+        "encode",
+        "auth",
+        "ttfb",
+        "download",
+        "parse",
+        "total",
+        "bytes_out",
+        "bytes_in",
+        "retries",
+        "hedges",
+        "hedge_won",
+    )
+
+    def __init__(self, resource: str, method: str, url: str):
+        self.resource = resource
+        self.method = method
+        self.url = url
+
+        self.status: Optional[int] = None
+        """the HTTP status code, or None when no response has been received"""
+
+        self.validation = 0.0
+        """the time to check the parameters of the request"""
+
+        self.encode = 0.0
+        """the time to serialize and compress the request body"""
+
+        self.auth = 0.0
+        """the time spent in the authentication module, e.g. to request a CAS ticket"""
+
+        self.ttfb = 0.0
+        """the time from sending the request until the headers of the response were received"""
+
+        self.download = 0.0
+        """the time to download the body of a response that is not streamed"""
+
+        self.parse = 0.0
+        """the time to parse the body of the response"""
+
+        self.total = 0.0
+        """the time of the request from the check of its parameters until it is received, plus
+        the time to parse the body once that has been done"""
+
+        self.bytes_out: Optional[int] = None
+        """the size of the request body as sent, or None when it is streamed"""
+
+        self.bytes_in: Optional[int] = None
+        """the size of the response body as received, or None when it is streamed"""
+
+        self.retries = 0
+        """the number of times the request has been retried"""
+
+        self.hedges = 0
+        """the number of second requests sent because the response was slow, see qrest.hedging"""
+
+        self.hedge_won = False
+        """True iff the response is the one to the second request"""
+
+    def as_dict(self) -> dict:
+        """Return the fields of the timing record as a dictionary."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={value!r}" for name, value in self.as_dict().items())
+        return f"Timing({fields})"
+
+
+# ================================================================================================
+class Hooks:
+    """The hooks registered for each event."""
+
+    def __init__(self):
+        self._hooks = {event: [] for event in EVENTS}
+
+    def add(self, event: str, hook: Callable):
+        """Register the given hook for the given event.
+
+        :raises RestClientConfigurationError: when the event is unknown
+        """
+        if event not in self._hooks:
+            raise RestClientConfigurationError("event must be one of %s" % ", ".join(EVENTS))
+        self._hooks[event].append(hook)
+
+    def remove(self, event: str, hook: Callable):
+        """Unregister the given hook for the given event."""
+        self._hooks[event].remove(hook)
+
+    def emit(self, event: str, *args):
+        """Call the hooks of the given event with the given arguments."""
+        for hook in self._hooks[event]:
+            try:
+                hook(*args)
+            except Exception:
+                logger.exception("hook %r for event %s failed", hook, event)
+
+    def __bool__(self):
+        return any(self._hooks.values())
+
+
+# ================================================================================================
+class TimedAuth:
+    """Wraps an authentication module to add the time it takes to a Timing.
+
+    If a span is given, the authentication module runs in a child span ``auth``.
+
+    """
+
+    def __init__(self, auth, timing: Timing, span: Optional[Span] = None):
+        self.auth = auth
+        self.timing = timing
+        self.span = span
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        try:
+            with child_span(self.span, "auth"):
+                return self.auth(request)
+        finally:
+            self.timing.auth += time.perf_counter() - start
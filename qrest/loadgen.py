@@ -0,0 +1,398 @@
+"""This module contains a load generator that drives a resource of a configuration module.
+
+It is installed as console script ``qrest-bench``::
+
+  $ qrest-bench myapp.apiconfig all_posts --rate 50 --duration 30
+  $ qrest-bench myapp/apiconfig.py single_post --kwargs posts.ndjson --concurrency 8
+
+The load generator creates the API of the given configuration module and calls
+the given resource, using the same code as an application would. The keyword
+arguments of the calls are read from a JSON file that holds a list of objects,
+or from an NDJSON file with one object per line. The calls cycle through them.
+
+There are two ways to drive the load:
+
+- at a fixed rate, where a call is started at a fixed interval regardless of
+  how long the previous calls take. The latency of a call is measured from
+  the moment it was scheduled, so it includes the time a call had to wait for
+  a free worker,
+- at a fixed concurrency, where each of the workers starts a new call as soon
+  as its previous call has finished.
+
+The workers are threads, or with ``--mode asyncio``, coroutines of an asyncio
+event loop. As the calls of a resource block, each coroutine runs its call in a
+thread of a pool.
+
+The report contains the throughput, the latency percentiles, the number of
+errors by exception type and the bytes sent and received, as text or JSON.
+
+With option ``--cassette``, the responses are replayed from a cassette that
+has been recorded before, see module qrest.cassette, so the throughput of
+everything but the network can be measured on a machine without network.
+
+"""
+
+import argparse
+import asyncio
+import contextlib
+import contextvars
+import importlib
+import importlib.util
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+# ================================================================================================
+# local imports
+from .cassette import Cassette
+from .exception import RestClientConfigurationError
+from .metrics import Histogram
+
+DEFAULT_DURATION = 10.0
+"""the default duration of a run in seconds"""
+
+
+# ================================================================================================
+class LoadResult:
+    """The aggregated outcome of the calls of a run."""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.errors: Dict[str, int] = {}
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.duration = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, response=None, error: Optional[BaseException] = None):
+        """Record a call that took the given time and returned the given response or failed."""
+        timing = getattr(response, "timing", None)
+        with self._lock:
+            self.latency.record(latency)
+            if error is not None:
+                name = type(error).__name__
+                self.errors[name] = self.errors.get(name, 0) + 1
+            if timing is not None:
+                self.bytes_out += timing.bytes_out or 0
+                self.bytes_in += timing.bytes_in or 0
+
+    @property
+    def calls(self) -> int:
+        return self.latency.count
+
+    def as_dict(self) -> dict:
+        """Return the report of the run as a dictionary."""
+        return {
+            "calls": self.calls,
+            "errors": dict(sorted(self.errors.items())),
+            "duration_s": self.duration,
+            "throughput_per_s": self.calls / self.duration if self.duration else 0.0,
+            "latency_s": {
+                "p50": self.latency.quantile(0.5),
+                "p90": self.latency.quantile(0.9),
+                "p95": self.latency.quantile(0.95),
+                "p99": self.latency.quantile(0.99),
+                "max": self.latency.max,
+                "mean": self.latency.sum / self.calls if self.calls else 0.0,
+            },
+            "bytes_out": self.bytes_out,
+            "bytes_in": self.bytes_in,
+        }
+
+    def format_text(self) -> str:
+        """Return the report of the run as text."""
+        report = self.as_dict()
+        latency = "  ".join(f"{key} {s * 1000:.1f} ms" for key, s in report["latency_s"].items())
+        errors = ", ".join(f"{name} {count}" for name, count in report["errors"].items())
+        return "\n".join(
+            [
+                f"calls       {report['calls']} in {report['duration_s']:.2f} s",
+                f"throughput  {report['throughput_per_s']:.1f} calls/s",
+                f"latency     {latency}",
+                f"bytes       {report['bytes_out']} sent, {report['bytes_in']} received",
+                f"errors      {errors or 'none'}",
+            ]
+        )
+
+
+class _Plan:
+    """The calls of a run: which keyword arguments to use and when to stop."""
+
+    def __init__(self, kwargs_list: List[dict], duration: Optional[float], count: Optional[int]):
+        self._kwargs = itertools.cycle(kwargs_list)
+        self._remaining = count
+        self._lock = threading.Lock()
+        self.start = time.perf_counter()
+        self.end = None if duration is None else self.start + duration
+
+    def next_kwargs(self) -> Optional[dict]:
+        """Return the keyword arguments of the next call, or None if the run is over."""
+        with self._lock:
+            if self.end is not None and time.perf_counter() >= self.end:
+                return None
+            if self._remaining is not None:
+                if self._remaining == 0:
+                    return None
+                self._remaining -= 1
+            return next(self._kwargs)
+
+    def delay(self, scheduled: float) -> Optional[float]:
+        """Return the time in seconds until the given start of a call, or None if the run ends
+        before that start, so a run at a fixed rate never sleeps past its end.
+        """
+        if self.end is not None and scheduled >= self.end:
+            return None
+        return scheduled - time.perf_counter()
+
+
+def _in_context(call: Callable) -> Callable:
+    """Return the given call, which runs in a copy of the current context from any thread, so
+    for example the cassette in use applies to the calls of the threads of a run.
+    """
+    context = contextvars.copy_context()
+
+    def run(**kwargs):
+        # a context cannot be entered by several threads at once
+        return context.copy().run(call, **kwargs)
+
+    return run
+
+
+def _timed_call(call: Callable, kwargs: dict, scheduled: float, result: LoadResult):
+    try:
+        response = call(**kwargs)
+    except Exception as error:
+        result.record(time.perf_counter() - scheduled, error=error)
+    else:
+        result.record(time.perf_counter() - scheduled, response)
+
+
+def run_threads(
+    call: Callable,
+    kwargs_list: List[dict],
+    concurrency: int,
+    rate: Optional[float] = None,
+    duration: Optional[float] = DEFAULT_DURATION,
+    count: Optional[int] = None,
+) -> LoadResult:
+    """Drive the given call from a pool of threads and return the result.
+
+    :param call: the function to call, e.g. the get_response method of a resource
+    :param kwargs_list: the keyword arguments of the calls, which are used in turn
+    :param concurrency: the number of threads
+    :param rate: the number of calls to start per second, or None to let each thread start a
+        new call as soon as its previous call has finished
+    :param duration: the duration of the run in seconds, or None to stop after count calls
+    :param count: the maximum number of calls, or None to stop after the duration
+    """
+    result = LoadResult()
+    call = _in_context(call)
+    plan = _Plan(kwargs_list, duration, count)
+
+    if rate is None:
+
+        def worker():
+            kwargs = plan.next_kwargs()
+            while kwargs is not None:
+                _timed_call(call, kwargs, time.perf_counter(), result)
+                kwargs = plan.next_kwargs()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for index in itertools.count():
+                scheduled = plan.start + index / rate
+                delay = plan.delay(scheduled)
+                if delay is None:
+                    break
+                if delay > 0:
+                    time.sleep(delay)
+                kwargs = plan.next_kwargs()
+                if kwargs is None:
+                    break
+                executor.submit(_timed_call, call, kwargs, scheduled, result)
+
+    result.duration = time.perf_counter() - plan.start
+    return result
+
+
+def run_asyncio(
+    call: Callable,
+    kwargs_list: List[dict],
+    concurrency: int,
+    rate: Optional[float] = None,
+    duration: Optional[float] = DEFAULT_DURATION,
+    count: Optional[int] = None,
+) -> LoadResult:
+    """Drive the given call from coroutines of an asyncio event loop and return the result.
+
+    The arguments are the same as those of function run_threads.
+
+    """
+    result = LoadResult()
+    call = _in_context(call)
+
+    async def drive():
+        loop = asyncio.get_running_loop()
+        plan = _Plan(kwargs_list, duration, count)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+            async def one(kwargs: dict, scheduled: float):
+                await loop.run_in_executor(executor, _timed_call, call, kwargs, scheduled, result)
+
+            if rate is None:
+
+                async def worker():
+                    kwargs = plan.next_kwargs()
+                    while kwargs is not None:
+                        await one(kwargs, time.perf_counter())
+                        kwargs = plan.next_kwargs()
+
+                await asyncio.gather(*(worker() for _ in range(concurrency)))
+            else:
+                tasks = []
+                for index in itertools.count():
+                    scheduled = plan.start + index / rate
+                    delay = plan.delay(scheduled)
+                    if delay is None:
+                        break
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    kwargs = plan.next_kwargs()
+                    if kwargs is None:
+                        break
+                    tasks.append(asyncio.ensure_future(one(kwargs, scheduled)))
+                await asyncio.gather(*tasks)
+        result.duration = time.perf_counter() - plan.start
+
+    asyncio.run(drive())
+    return result
+
+
+# ================================================================================================
+def load_module(name: str):
+    """Return the module with the given dotted name or the module in the given Python file."""
+    if not name.endswith(".py"):
+        return importlib.import_module(name)
+    module_name = os.path.splitext(os.path.basename(name))[0]
+    spec = importlib.util.spec_from_file_location(module_name, name)
+    module = importlib.util.module_from_spec(spec)
+    # qrest only retrieves the classes that are defined in the module itself
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def resource_caller(module, name: str) -> Callable:
+    """Return a function that calls the given resource of an API for the given module.
+
+    A resource keeps the parameters of the call in progress, so each thread
+    that calls the function uses its own API. The body of each response is
+    parsed as part of the call, as it would be by a client that uses the data.
+
+    """
+    import qrest
+
+    local = threading.local()
+
+    def call(**kwargs):
+        try:
+            resource = local.resource
+        except AttributeError:
+            resource = local.resource = getattr(qrest.API(module, lazy=True), name)
+        # the body is otherwise only parsed on first access to the data, after the call
+        return resource._get_response(kwargs, parse=True)
+
+    return call
+
+
+def load_kwargs(path: Optional[str]) -> List[dict]:
+    """Return the keyword arguments in the given JSON or NDJSON file.
+
+    :raises RestClientConfigurationError: when the file does not contain JSON objects
+    """
+    if path is None:
+        return [{}]
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    if text.lstrip().startswith("["):
+        kwargs_list = json.loads(text)
+    else:
+        kwargs_list = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if not kwargs_list or not all(isinstance(kwargs, dict) for kwargs in kwargs_list):
+        raise RestClientConfigurationError(f"{path} must contain one or more JSON objects")
+    return kwargs_list
+
+
+def main(argv=None) -> int:
+    """Run the load generator with the given command-line arguments."""
+    import qrest
+
+    parser = argparse.ArgumentParser(
+        prog="qrest-bench", description="Drive a resource of a qrest configuration module."
+    )
+    parser.add_argument("module", help="the dotted name or the file of the configuration module")
+    parser.add_argument("resource", help="the name of the resource to call")
+    parser.add_argument("--kwargs", help="a JSON or NDJSON file with the keyword arguments")
+    parser.add_argument("--rate", type=float, help="the number of calls to start per second")
+    parser.add_argument(
+        "--concurrency", type=int, default=1, help="the number of workers (default: 1)"
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        help=f"the duration of the run in seconds (default: {DEFAULT_DURATION:g})",
+    )
+    parser.add_argument("--requests", type=int, help="the maximum number of calls")
+    parser.add_argument("--mode", choices=["threads", "asyncio"], default="threads")
+    parser.add_argument("--format", choices=["text", "json"], default="text")
+    parser.add_argument("--cassette", help="replay the responses from this cassette")
+    parser.add_argument(
+        "--emulate-latency",
+        action="store_true",
+        help="let replayed responses take as long as when they were recorded",
+    )
+    arguments = parser.parse_args(argv)
+
+    duration = arguments.duration
+    if duration is None and arguments.requests is None:
+        duration = DEFAULT_DURATION
+
+    module = load_module(arguments.module)
+    resources = qrest.API(module, lazy=True).resources
+    if arguments.resource not in resources:
+        parser.error(f"unknown resource {arguments.resource}, choose from {resources}")
+
+    replay = contextlib.nullcontext()
+    if arguments.cassette:
+        replay = Cassette(arguments.cassette, emulate_latency=arguments.emulate_latency)
+
+    run = run_asyncio if arguments.mode == "asyncio" else run_threads
+    with replay:
+        result = run(
+            resource_caller(module, arguments.resource),
+            load_kwargs(arguments.kwargs),
+            concurrency=arguments.concurrency,
+            rate=arguments.rate,
+            duration=duration,
+            count=arguments.requests,
+        )
+
+    if arguments.format == "json":
+        print(json.dumps(result.as_dict(), indent=2))
+    else:
+        print(result.format_text())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+"""This module contains a registry of aggregated statistics of the requests of each resource.
+
+The registry is optional and is enabled on an API::
+
+  metrics = api.enable_metrics()
+  ...
+  print(metrics.snapshot()["all_posts"]["latency"]["p95"])
+  print(metrics.prometheus())
+
+It uses the post_response and error hooks of module qrest.instrumentation. For
+each resource, it counts the calls, the errors by status class, or "parse" for
+a successful response whose body cannot be parsed, the cache hits and the
+hedged requests sent and won, it sums the bytes sent and received and it keeps
+a histogram of the latencies.
+
+Each thread records into its own shard, so recording does not take a lock.
+The shards are only merged when the statistics are read.
+
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional
+
+LATENCY_QUANTILES = (0.5, 0.95, 0.99)
+"""the quantiles of the latency in a snapshot and in the Prometheus output"""
+
+_SUB_BUCKET_BITS = 5
+_SUB_BUCKET_COUNT = 1 << _SUB_BUCKET_BITS
+_SUB_BUCKET_HALF = _SUB_BUCKET_COUNT >> 1
+
+
+def _bucket_index(value: int) -> int:
+    """Return the index of the bucket of the given non-negative value."""
+    if value < _SUB_BUCKET_COUNT:
+        return value
+    shift = value.bit_length() - _SUB_BUCKET_BITS
+    return _SUB_BUCKET_COUNT + (shift - 1) * _SUB_BUCKET_HALF + (value >> shift) - _SUB_BUCKET_HALF
+
+
+def _bucket_value(index: int) -> int:
+    """Return the value halfway the bucket with the given index."""
+    if index < _SUB_BUCKET_COUNT:
+        return index
+    shift, sub_bucket = divmod(index - _SUB_BUCKET_COUNT, _SUB_BUCKET_HALF)
+    shift += 1
+    return ((sub_bucket + _SUB_BUCKET_HALF) << shift) + (1 << (shift - 1))
+
+
+# ================================================================================================
+class Histogram:
+    """A histogram of durations with a fixed relative precision.
+
+    Like an HDR histogram, each power of two is divided into buckets of equal
+    width, so a quantile deviates at most about 3% from the actual value,
+    regardless of its magnitude. The durations are recorded in microseconds.
+
+    """
+
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        """Record the given duration."""
+        index = _bucket_index(int(seconds * 1e6))
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def merge(self, other: "Histogram"):
+        """Add the durations of the other histogram to this one."""
+        for index, count in other.counts.copy().items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Return the duration in seconds below which the given fraction of the durations lie.
+
+        This method returns 0.0 when no durations have been recorded.
+
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(1, round(q * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(_bucket_value(index) / 1e6, self.max)
+        return self.max
+
+
+# ================================================================================================
+class ResourceMetrics:
+    """The statistics of a single resource."""
+
+    __slots__ = (
+        "calls",
+        "errors",
+        "cache_hits",
+        "hedges",
+        "hedges_won",
+        "bytes_out",
+        "bytes_in",
+        "latency",
+    )
+
+    def __init__(self):
+        self.calls = 0
+        self.errors: Dict[str, int] = {}
+        self.cache_hits = 0
+        self.hedges = 0
+        self.hedges_won = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.latency = Histogram()
+
+    def merge(self, other: "ResourceMetrics"):
+        """Add the statistics of the other instance to this one."""
+        self.calls += other.calls
+        for status_class, count in other.errors.copy().items():
+            self.errors[status_class] = self.errors.get(status_class, 0) + count
+        self.cache_hits += other.cache_hits
+        self.hedges += other.hedges
+        self.hedges_won += other.hedges_won
+        self.bytes_out += other.bytes_out
+        self.bytes_in += other.bytes_in
+        self.latency.merge(other.latency)
+
+    def as_dict(self) -> dict:
+        """Return the statistics as a dictionary."""
+        latency = {f"p{round(q * 100)}": self.latency.quantile(q) for q in LATENCY_QUANTILES}
+        latency.update(count=self.latency.count, sum=self.latency.sum, max=self.latency.max)
+        return {
+            "calls": self.calls,
+            "errors": dict(self.errors),
+            "cache_hits": self.cache_hits,
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won,
+            "bytes_out": self.bytes_out,
+            "bytes_in": self.bytes_in,
+            "latency": latency,
+        }
+
+
+def status_class(status: Optional[int]) -> str:
+    """Return the class of the given HTTP status code, e.g. "4xx", or "none" without status."""
+    return f"{status // 100}xx" if status else "none"
+
+
+# ================================================================================================
+class MetricsRegistry:
+    """Aggregated statistics of the requests of each resource."""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[Dict[str, ResourceMetrics]] = []
+        self._lock = threading.Lock()
+
+    def _resource(self, name: str) -> ResourceMetrics:
+        """Return the statistics of the given resource in the shard of the current thread."""
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        try:
+            return shard[name]
+        except KeyError:
+            metrics = shard[name] = ResourceMetrics()
+            return metrics
+
+    def _record(self, timing) -> ResourceMetrics:
+        metrics = self._resource(timing.resource)
+        metrics.calls += 1
+        if timing.hedges:
+            metrics.hedges += timing.hedges
+            metrics.hedges_won += timing.hedge_won
+        if timing.bytes_out:
+            metrics.bytes_out += timing.bytes_out
+        if timing.bytes_in:
+            metrics.bytes_in += timing.bytes_in
+        metrics.latency.record(timing.total)
+        return metrics
+
+    def post_response(self, resource, timing, response):
+        """Record the given response, the hook for event post_response."""
+        self._record(timing)
+
+    def error(self, resource, timing, error):
+        """Record the given error, the hook for event error."""
+        metrics = self._record(timing)
+        status = timing.status
+        key = "parse" if status is not None and status < 400 else status_class(status)
+        metrics.errors[key] = metrics.errors.get(key, 0) + 1
+
+    def cache_hit(self, resource_name: str):
+        """Record that a call of the given resource was answered without a request."""
+        self._resource(resource_name).cache_hits += 1
+
+    def install(self, api):
+        """Register the hooks of this registry on the given API."""
+        api.add_hook("post_response", self.post_response)
+        api.add_hook("error", self.error)
+
+    def collect(self) -> Dict[str, ResourceMetrics]:
+        """Return the statistics of each resource, merged over all threads."""
+        with self._lock:
+            shards = list(self._shards)
+        merged: Dict[str, ResourceMetrics] = {}
+        for shard in shards:
+            for name, metrics in shard.copy().items():
+                merged.setdefault(name, ResourceMetrics()).merge(metrics)
+        return merged
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Return the statistics of each resource as a dictionary."""
+        return {name: metrics.as_dict() for name, metrics in sorted(self.collect().items())}
+
+    def prometheus(self, prefix: str = "qrest") -> str:
+        """Return the statistics in the Prometheus text exposition format."""
+        collected = sorted(self.collect().items())
+        lines: List[str] = []
+
+        def family(name: str, kind: str, description: str, samples: Iterable[tuple]):
+            lines.append(f"# HELP {prefix}_{name} {description}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+                lines.append(f"{prefix}_{name}{suffix}{{{label_text}}} {value}")
+
+        def per_resource(attribute: str):
+            return (("", [("resource", name)], getattr(m, attribute)) for name, m in collected)
+
+        family("requests_total", "counter", "Number of calls.", per_resource("calls"))
+        family(
+            "errors_total",
+            "counter",
+            "Number of calls that failed, by HTTP status class.",
+            (
+                ("", [("resource", name), ("status_class", key)], count)
+                for name, m in collected
+                for key, count in sorted(m.errors.items())
+            ),
+        )
+        family(
+            "cache_hits_total",
+            "counter",
+            "Number of calls answered without a request.",
+            per_resource("cache_hits"),
+        )
+        family(
+            "hedges_total",
+            "counter",
+            "Number of second requests sent because the response was slow.",
+            per_resource("hedges"),
+        )
+        family(
+            "hedges_won_total",
+            "counter",
+            "Number of second requests whose response was used.",
+            per_resource("hedges_won"),
+        )
+        family("sent_bytes_total", "counter", "Bytes sent.", per_resource("bytes_out"))
+        family("received_bytes_total", "counter", "Bytes received.", per_resource("bytes_in"))
+
+        samples = []
+        for name, m in collected:
+            for q in LATENCY_QUANTILES:
+                labels = [("resource", name), ("quantile", q)]
+                samples.append(("", labels, m.latency.quantile(q)))
+            samples.append(("_sum", [("resource", name)], m.latency.sum))
+            samples.append(("_count", [("resource", name)], m.latency.count))
+        family("request_duration_seconds", "summary", "Duration of calls.", samples)
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,476 @@
+"""This module contains a local stand-in for a REST API that is generated from its configuration.
+
+The mock server reads the same configuration module as qrest.API and serves
+synthetic responses for each of its endpoints. It can inject latency, errors,
+429 responses, slow bodies and connection resets, so the retry, timeout and
+concurrency behavior of a service that uses qrest can be exercised locally::
+
+  faults = Faults(latency="exponential:0.05", error_rate=0.01, throttle_rate=0.05)
+  with MockServer(myapiconfig, faults=faults, records=100) as server:
+      print(server.url)
+
+The same is available from the command line::
+
+  $ python -m qrest.mockserver myapp.apiconfig --port 8080 --records 100 \\
+        --latency exponential:0.05 --error-rate 0.01 --throttle-rate 0.05
+
+Point the url of the APIConfig at the mock server to use it. The mock server
+serves the endpoints under the path of the configured url. A request for an
+endpoint that is not configured gets a 404 response, a request that lacks a
+required query parameter a 400 response.
+
+The content type of a response follows from the processor of the endpoint: a
+CSVResource gets CSV, an NDJSONResource NDJSON and all others get JSON. A JSON
+response is wrapped in the extract_section of its JSONResource. A POST or PUT
+request whose body is a JSON object gets that object back with an id.
+
+The latency is specified as a distribution, one of
+
+- ``fixed:<seconds>``,
+- ``uniform:<minimum>,<maximum>``,
+- ``exponential:<mean>``,
+- ``lognormal:<median>,<sigma>``.
+
+"""
+
+import argparse
+import itertools
+import json
+import math
+import random
+import re
+import socket
+import struct
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# ================================================================================================
+# local imports
+from .exception import RestClientConfigurationError
+
+LATENCY_DISTRIBUTIONS = {
+    # name: (number of parameters, function that draws a sample from a random.Random)
+    "fixed": (1, lambda rng, seconds: seconds),
+    "uniform": (2, lambda rng, low, high: rng.uniform(low, high)),
+    "exponential": (1, lambda rng, mean: rng.expovariate(1 / mean) if mean else 0.0),
+    "lognormal": (2, lambda rng, median, sigma: rng.lognormvariate(math.log(median), sigma)),
+}
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Return a function that draws a latency from the distribution with the given spec.
+
+    :raises RestClientConfigurationError: when the spec is invalid
+    """
+    name, _, arguments = spec.partition(":")
+    if name not in LATENCY_DISTRIBUTIONS:
+        raise RestClientConfigurationError(
+            "latency must be one of %s" % ", ".join(LATENCY_DISTRIBUTIONS)
+        )
+    count, sample = LATENCY_DISTRIBUTIONS[name]
+    try:
+        parameters = [float(value) for value in arguments.split(",")] if arguments else []
+    except ValueError:
+        parameters = []
+    if len(parameters) != count or any(value < 0 for value in parameters):
+        raise RestClientConfigurationError(
+            f"latency {name} requires {count} non-negative number(s), e.g. {name}:0.05"
+        )
+    return lambda rng: max(0.0, sample(rng, *parameters))
+
+
+# ================================================================================================
+class Faults:
+    """The faults the mock server injects into its responses.
+
+    Each rate is the fraction of the requests that is affected.
+
+    """
+
+    def __init__(
+        self,
+        latency: Optional[str] = None,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: int = 1,
+        slow_body_rate: float = 0.0,
+        bandwidth: int = 10000,
+        reset_rate: float = 0.0,
+    ):
+        """
+        :param latency: the distribution of the time before the server responds, see the module
+            documentation, or None to respond immediately
+        :param error_rate: the fraction of requests that get a 500, 502 or 503 response
+        :param throttle_rate: the fraction of requests that get a 429 response
+        :param retry_after: the value of header Retry-After of a 429 response, in seconds
+        :param slow_body_rate: the fraction of responses whose body is sent slowly
+        :param bandwidth: the number of bytes per second at which a slow body is sent
+        :param reset_rate: the fraction of requests whose connection is reset without response
+
+        :raises RestClientConfigurationError: when one of the arguments is invalid
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.slow_body_rate = slow_body_rate
+        self.bandwidth = bandwidth
+        self.reset_rate = reset_rate
+        self.validate()
+        self._latency = parse_latency(latency) if latency else None
+
+    def validate(self):
+        """Check the configuration and raise a RestClientConfigurationError if it is invalid."""
+        for name in ("error_rate", "throttle_rate", "slow_body_rate", "reset_rate"):
+            value = getattr(self, name)
+            if not isinstance(value, (int, float)) or not 0 <= value <= 1:
+                raise RestClientConfigurationError(f"{name} must be a number between 0 and 1")
+        if not isinstance(self.retry_after, int) or self.retry_after < 0:
+            raise RestClientConfigurationError("retry_after must be a non-negative integer")
+        if not isinstance(self.bandwidth, int) or self.bandwidth <= 0:
+            raise RestClientConfigurationError("bandwidth must be a positive integer")
+
+    def delay(self, rng: random.Random) -> float:
+        """Return the time in seconds to wait before responding."""
+        return self._latency(rng) if self._latency else 0.0
+
+
+# ================================================================================================
+class _Endpoint:
+    """A configured endpoint and the synthetic response the mock server serves for it."""
+
+    def __init__(self, name: str, config, base_path: str, records: int, record_size: int):
+        from .conf import QueryParameter
+        from .response import CSVResponse, NDJSONResponse
+
+        self.name = name
+        self.method = config.method.upper()
+        segments = [
+            "([^/]+)" if re.fullmatch(r"\{\w+\}", segment) else re.escape(segment)
+            for segment in config.path
+        ]
+        self.pattern = re.compile("/".join([base_path.rstrip("/")] + segments) + "/?")
+        self.required_query = [
+            parameter.name
+            for parameter in config.parameters.values()
+            if isinstance(parameter, QueryParameter) and parameter.required
+        ]
+
+        rows = _synthetic_records(name, records, record_size)
+        response = config.processor.response
+        if isinstance(response, CSVResponse):
+            self.content_type = "text/csv; charset=utf-8"
+            lines = [",".join(rows[0])] if rows else []
+            lines += [",".join(str(value) for value in row.values()) for row in rows]
+            self.body = "\n".join(lines).encode("utf-8")
+        elif isinstance(response, NDJSONResponse):
+            self.content_type = "application/x-ndjson"
+            self.body = "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+        else:
+            self.content_type = "application/json"
+            data = rows
+            for key in reversed(getattr(response, "extract_section", None) or []):
+                data = {key: data}
+            self.body = json.dumps(data).encode("utf-8")
+
+
+def _synthetic_records(name: str, count: int, size: int) -> List[dict]:
+    """Return the given number of records of about the given size in bytes when serialized."""
+    filler = ("lorem ipsum dolor sit amet " * (size // 27 + 1))[: max(0, size - 60)]
+    return [
+        {"id": i, "name": f"{name} {i}", "value": i * 0.5, "text": filler} for i in range(count)
+    ]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    server: "_Server"
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def do_PUT(self):
+        self._handle()
+
+    def do_DELETE(self):
+        self._handle()
+
+    def do_PATCH(self):
+        self._handle()
+
+    def _handle(self):
+        try:
+            request_body = self._read_body()
+        except ValueError:
+            # the rest of the request cannot be found, so the connection cannot be reused
+            self.close_connection = True
+            self._send(400, b'{"error": "malformed body"}')
+            return
+        parts = urlsplit(self.path)
+        endpoint = self.server.match(self.command, parts.path)
+        if endpoint is None:
+            self._send(404, b'{"error": "not found"}')
+            return
+
+        faults = self.server.faults_for(endpoint.name)
+        rng = self.server.request_rng()
+        if rng.random() < faults.reset_rate:
+            self._reset()
+            return
+        delay = faults.delay(rng)
+        if delay:
+            time.sleep(delay)
+        if rng.random() < faults.throttle_rate:
+            self._send(429, b'{"error": "too many requests"}', retry_after=faults.retry_after)
+            return
+        if rng.random() < faults.error_rate:
+            self._send(rng.choice([500, 502, 503]), b'{"error": "injected error"}')
+            return
+
+        query = parse_qs(parts.query)
+        missing = [name for name in endpoint.required_query if name not in query]
+        if missing:
+            message = {"error": "missing query parameters", "parameters": missing}
+            self._send(400, json.dumps(message).encode("utf-8"))
+            return
+
+        status, body, content_type = 200, endpoint.body, endpoint.content_type
+        if self.command in ("POST", "PUT"):
+            status = 201 if self.command == "POST" else 200
+            try:
+                posted = json.loads(request_body)
+            except ValueError:
+                posted = None
+            if isinstance(posted, dict):
+                body = json.dumps(dict(posted, id=1)).encode("utf-8")
+                content_type = "application/json"
+        bandwidth = faults.bandwidth if rng.random() < faults.slow_body_rate else None
+        self._send(status, body, content_type=content_type, bandwidth=bandwidth)
+
+    def _read_body(self) -> bytes:
+        """Return the body of the request, which is read completely, so the next request on the
+        connection starts at the right place.
+
+        :raises ValueError: when the chunked body is malformed
+        """
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            chunks = []
+            while True:
+                size = int(self.rfile.readline(65537).split(b";")[0], 16)
+                if size == 0:
+                    break
+                chunks.append(self.rfile.read(size))
+                if self.rfile.readline(3) != b"\r\n":
+                    raise ValueError("chunk is not terminated")
+            # the trailer ends with an empty line
+            while self.rfile.readline(65537) not in (b"\r\n", b"\n", b""):
+                pass
+            return b"".join(chunks)
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(
+        self,
+        status: int,
+        body: bytes,
+        content_type: str = "application/json",
+        retry_after: Optional[int] = None,
+        bandwidth: Optional[int] = None,
+    ):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if retry_after is not None:
+            self.send_header("Retry-After", str(retry_after))
+        self.end_headers()
+        if bandwidth is None:
+            self.wfile.write(body)
+            return
+        # send the body in chunks of a tenth of a second each, so the pause precedes each chunk
+        # and the handler is done as soon as the last chunk is written
+        chunk_size = max(1, bandwidth // 10)
+        for start in range(0, len(body), chunk_size):
+            end = start + chunk_size
+            time.sleep(0.1)
+            self.wfile.write(body[start:end])
+            self.wfile.flush()
+
+    def _reset(self):
+        """Close the connection so the client receives a TCP reset instead of a response."""
+        self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        self.close_connection = True
+        self.connection.close()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], mock: "MockServer"):
+        super().__init__(address, _Handler)
+        self.mock = mock
+        self._requests = itertools.count()
+
+    def request_rng(self) -> random.Random:
+        """Return the random generator of the next request.
+
+        Each request gets a generator of its own that is derived from the seed and the number
+        of the request, so concurrent requests do not share the state of a single generator.
+        """
+        if self.mock.seed is None:
+            return random.Random()
+        return random.Random(f"{self.mock.seed}:{next(self._requests)}")
+
+    def match(self, method: str, path: str) -> Optional[_Endpoint]:
+        for endpoint in self.mock.endpoints:
+            if endpoint.method == method and endpoint.pattern.fullmatch(path):
+                return endpoint
+        return None
+
+    def faults_for(self, name: str) -> Faults:
+        return self.mock.resource_faults.get(name, self.mock.faults)
+
+
+# ================================================================================================
+class MockServer:
+    """An HTTP server on localhost that serves the endpoints of a configuration module."""
+
+    def __init__(
+        self,
+        imported_module,
+        faults: Optional[Faults] = None,
+        resource_faults: Optional[Dict[str, Faults]] = None,
+        records: int = 10,
+        record_size: int = 100,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None,
+    ):
+        """
+        :param imported_module: the configuration module, or modules, as accepted by qrest.API
+        :param faults: the faults to inject into the responses of all endpoints
+        :param resource_faults: the faults to inject into the responses of specific endpoints,
+            by the name of their resource, instead of the faults for all endpoints
+        :param records: the number of records in each response
+        :param record_size: the approximate size of each record in bytes
+        :param host: the host name or address to listen on
+        :param port: the port to listen on, or 0 to use a free port
+        :param seed: the seed from which the random generator of each request, which decides on
+            the faults, is derived
+        """
+        import qrest
+
+        config = qrest.API(imported_module, lazy=True).config
+        base_path = urlsplit(config.urls[0]).path
+        endpoints = [
+            _Endpoint(name, endpoint, base_path, records, record_size)
+            for name, endpoint in config.endpoints.items()
+        ]
+        # a path segment that is not a parameter takes precedence over one that is
+        self.endpoints = sorted(endpoints, key=lambda endpoint: endpoint.pattern.groups)
+        self.faults = faults or Faults()
+        self.resource_faults = resource_faults or {}
+        self.host = host
+        self.port = port
+        self.seed = seed
+        self._server: Optional[_Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Return the base URL of the running server."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Start the server in a background thread."""
+        self._server = _Server((self.host, self.port), self)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the server and wait for its thread to finish."""
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def serve_forever(self):
+        """Run the server in the current thread until it is interrupted."""
+        self._server = _Server((self.host, self.port), self)
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def __enter__(self) -> "MockServer":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main(argv=None) -> int:
+    """Run the mock server with the given command-line arguments."""
+    from .loadgen import load_module
+
+    parser = argparse.ArgumentParser(
+        prog="python -m qrest.mockserver",
+        description="Serve synthetic responses for the endpoints of a configuration module.",
+    )
+    parser.add_argument("module", help="the dotted name or the file of the configuration module")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--records", type=int, default=10, help="the records per response")
+    parser.add_argument("--record-size", type=int, default=100, help="the bytes per record")
+    parser.add_argument("--latency", help="the latency distribution, e.g. exponential:0.05")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--slow-body-rate", type=float, default=0.0)
+    parser.add_argument("--bandwidth", type=int, default=10000, help="bytes/s of a slow body")
+    parser.add_argument("--reset-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int)
+    arguments = parser.parse_args(argv)
+
+    try:
+        faults = Faults(
+            latency=arguments.latency,
+            error_rate=arguments.error_rate,
+            throttle_rate=arguments.throttle_rate,
+            retry_after=arguments.retry_after,
+            slow_body_rate=arguments.slow_body_rate,
+            bandwidth=arguments.bandwidth,
+            reset_rate=arguments.reset_rate,
+        )
+    except RestClientConfigurationError as e:
+        parser.error(str(e))
+    server = MockServer(
+        load_module(arguments.module),
+        faults=faults,
+        records=arguments.records,
+        record_size=arguments.record_size,
+        host=arguments.host,
+        port=arguments.port,
+        seed=arguments.seed,
+    )
+    print(f"serving {len(server.endpoints)} endpoints at http://{arguments.host}:{arguments.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,56 @@
 """Implements ModuleClassRegistry."""
-import inspect
+import importlib
+import pkgutil
 
 
 class ModuleClassRegistry:
-    """Allows you to retrieve the classes that are defined in an imported module."""
+    """Allows you to retrieve the classes that are defined in one or more imported modules.
 
-    def __init__(self, imported_module):
-        """Store the module from which the classes should be retrieved."""
-        self._module = imported_module
+    The classes are indexed once, when a module is registered. Each call of
+    retrieve only checks the indexed classes, so the namespace of a module is
+    scanned a single time no matter how many base classes are queried.
+
+    """
+
+    def __init__(self, *imported_modules, submodules: bool = False):
+        """Register the modules from which the classes should be retrieved.
+
+        :param submodules: if True, the submodules of each module that is a package are
+            registered as well, see method register
+        """
+        self._classes = []
+        self._indexed = set()
+        self._registered = set()
+        for imported_module in imported_modules:
+            self.register(imported_module, submodules=submodules)
+
+    def register(self, imported_module, submodules: bool = False):
+        """Add the classes that are defined in the given module to the index.
+
+        :param submodules: if True and the module is a package, the classes defined in its
+            submodules are added as well, where the submodules are imported when necessary
+        """
+        name = imported_module.__name__
+        if name in self._registered:
+            return
+        self._registered.add(name)
+
+        for value in vars(imported_module).values():
+            # the class should be defined in the given module and not be imported into it
+            if isinstance(value, type) and value.__module__ == name and value not in self._indexed:
+                self._classes.append(value)
+                self._indexed.add(value)
+
+        package_path = getattr(imported_module, "__path__", None)
+        if submodules and package_path is not None:
+            for module_info in pkgutil.iter_modules(package_path, prefix=f"{name}."):
+                self.register(importlib.import_module(module_info.name), submodules=True)
 
     def retrieve(self, base_class):
         """Return all subclasses of the given base class.
 
-        The classes returned are defined in the imported module.
+        The classes returned are defined in the registered modules, in the
+        order in which they are defined.
 
         """
-        classes = []
-        for name, value in inspect.getmembers(self._module):
-            # the member should be defined in the given module
-            if inspect.getmodule(value) == self._module:
-                # issubclass requires its first argument to be a class
-                if inspect.isclass(value) and issubclass(value, base_class):
-                    classes.append(value)
-        return classes
+        return [c for c in self._classes if issubclass(c, base_class)]
@@ -0,0 +1,400 @@
+"""This module generates a qrest configuration module from an OpenAPI 3 document.
+
+Each operation of the document becomes a ResourceConfig subclass. Its query
+parameters become QueryParameter attributes and the properties of its JSON
+request body become BodyParameter attributes, where enums map to ``choices``.
+The descriptions of path parameters end up in ``path_description``. Header and
+cookie parameters are not supported by qrest and are left out, as are the
+operations whose HTTP method is not GET, POST or PUT.
+
+The code of each ResourceConfig is cached, keyed by a hash of its operation,
+so when the document changes, only the changed operations are generated again.
+The module is only written when its code changes, which keeps its compiled
+bytecode and an API cache file (see :mod:`qrest.cache`) valid.
+
+The generator can be run from the command line::
+
+  $ python -m qrest.openapi openapi.json myapiconfig.py --cache .myapiconfig-cache.json
+
+Documents in YAML require the optional package PyYAML, which you can install
+using ``pip install qrest[openapi]``.
+
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import keyword
+import logging
+import re
+from typing import Dict, List, Optional
+
+# ================================================================================================
+# local imports
+from .conf import ResourceConfig
+from .exception import RestClientConfigurationError
+from .utils import import_optional
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+"""the version of the format of the cache file"""
+
+METHODS = ("get", "post", "put")
+"""the HTTP methods of the operations that are generated"""
+
+RESERVED_NAMES = {
+    "name",
+    # the attributes that an instance of a ResourceConfig sets
+    *(name for name in inspect.signature(ResourceConfig.__init__).parameters if name != "self"),
+    # the attributes and methods of the class
+    *(name for name in vars(ResourceConfig) if not name.startswith("__")),
+}
+"""the names that a parameter attribute of a ResourceConfig cannot use"""
+
+_HEADER = '''"""Generated by qrest.openapi from {title} {version}.
+
+Do not edit this module by hand, generate it again instead.
+
+"""
+
+from qrest import APIConfig, BodyParameter, QueryParameter, ResourceConfig
+
+
+class {class_name}(APIConfig):
+    url = {url!r}
+'''
+
+
+# ================================================================================================
+def generate(document: dict, cache_path: Optional[str] = None) -> str:
+    """Return the source code of the configuration module for the given OpenAPI document.
+
+    :param document: the OpenAPI 3 document
+    :param cache_path: the path to the file that caches the code of each operation. The file is
+        created when it does not exist and only contains the operations of the document
+        afterwards
+    """
+    resolver = _Resolver(document)
+    info = document.get("info", {})
+    servers = document.get("servers") or [{}]
+    if not servers[0].get("url"):
+        raise RestClientConfigurationError("the OpenAPI document does not specify a server url")
+
+    api_class_name = _class_name(info.get("title", "")) + "Config"
+    snippets = [
+        _HEADER.format(
+            title=info.get("title", "an OpenAPI document"),
+            version=info.get("version", ""),
+            class_name=api_class_name,
+            url=servers[0]["url"],
+        )
+    ]
+
+    cache = _load_cache(cache_path)
+    used = {}
+    names = set()
+    class_names = {api_class_name}
+    for path, path_item in document.get("paths", {}).items():
+        path_item = resolver.resolve(path_item)
+        for method in METHODS:
+            if method not in path_item:
+                continue
+            operation = resolver.resolve_all(path_item[method])
+            shared = resolver.resolve_all(path_item.get("parameters", []))
+
+            name = _unique(_operation_name(operation, method, path), names)
+            class_name = _unique(_class_name(name), class_names)
+            key = _operation_key(path, method, name, class_name, operation, shared)
+            snippet = cache.get(key)
+            if snippet is None:
+                snippet = render_operation(path, method, name, class_name, operation, shared)
+            used[key] = snippet
+            snippets.append(snippet)
+
+    if cache_path:
+        _save_cache(cache_path, used)
+    return "".join(snippets)
+
+
+def render_operation(
+    path: str,
+    method: str,
+    name: str,
+    class_name: str,
+    operation: dict,
+    shared_parameters: List[dict],
+) -> str:
+    """Return the source code of the ResourceConfig subclass of the given operation.
+
+    :param path: the path of the operation, e.g. "/posts/{post_id}"
+    :param method: the HTTP method of the operation in lower case
+    :param name: the name of the resource
+    :param class_name: the name of the ResourceConfig subclass
+    :param operation: the operation, in which all references have been resolved
+    :param shared_parameters: the parameters of the path item of the operation
+    """
+    parameters = {p["name"]: p for p in shared_parameters if "name" in p}
+    parameters.update({p["name"]: p for p in operation.get("parameters", []) if "name" in p})
+
+    path_description = {
+        p["name"]: p["description"]
+        for p in parameters.values()
+        if p.get("in") == "path" and p.get("description")
+    }
+
+    lines = [
+        "",
+        "",
+        f"class {class_name}(ResourceConfig):",
+        f"    name = {name!r}",
+        f"    path = {[part for part in path.split('/') if part]!r}",
+        f"    method = {method.upper()!r}",
+    ]
+    description = operation.get("summary") or operation.get("description")
+    if description:
+        lines.append(f"    description = {description.strip()!r}")
+    if path_description:
+        lines.append(f"    path_description = {path_description!r}")
+
+    attributes = []
+    attribute_names = set()
+    for parameter in parameters.values():
+        if parameter.get("in") == "query":
+            arguments = _parameter_arguments(
+                parameter["name"],
+                parameter.get("schema", {}),
+                parameter.get("required", False),
+                parameter.get("description"),
+            )
+            attribute = _unique(_attribute_name(parameter["name"]), attribute_names)
+            attributes.append(f"    {attribute} = QueryParameter({arguments})")
+
+    if method != "get":
+        attributes.extend(_body_attributes(operation.get("requestBody"), attribute_names))
+
+    if attributes:
+        lines.append("")
+        lines.extend(attributes)
+    return "\n".join(lines) + "\n"
+
+
+def write_module(code: str, module_path: str) -> bool:
+    """Write the given code to the given path, unless the file already contains that code.
+
+    :return: True iff the file has been written
+    """
+    try:
+        with open(module_path, "r", encoding="utf-8") as f:
+            if f.read() == code:
+                return False
+    except OSError:
+        pass
+    with open(module_path, "w", encoding="utf-8") as f:
+        f.write(code)
+    return True
+
+
+def load_document(document_path: str) -> dict:
+    """Return the OpenAPI document in the given JSON or YAML file."""
+    with open(document_path, "r", encoding="utf-8") as f:
+        if document_path.endswith((".yaml", ".yml")):
+            return import_optional("yaml", extra="openapi").safe_load(f)
+        return json.load(f)
+
+
+# ================================================================================================
+def _body_attributes(request_body: Optional[dict], attribute_names: set) -> List[str]:
+    """Return the lines that define the BodyParameter attributes of the given request body."""
+    if not request_body:
+        return []
+    content = request_body.get("content", {})
+    media_type = next((m for m in content if "json" in m), None)
+    if media_type is None:
+        logger.warning("only JSON request bodies are supported, not %s", ", ".join(content))
+        return []
+
+    schema = content[media_type].get("schema", {})
+    properties = schema.get("properties")
+    if schema.get("type", "object") != "object" or not properties:
+        # the body is not a dictionary, so it is passed as-is by a single body parameter
+        arguments = _parameter_arguments(
+            None, schema, request_body.get("required", False), request_body.get("description")
+        )
+        attribute = _unique("body", attribute_names)
+        return [f"    {attribute} = BodyParameter({arguments})"]
+
+    required = set(schema.get("required", []))
+    lines = []
+    for property_name, property_schema in properties.items():
+        arguments = _parameter_arguments(
+            property_name,
+            property_schema,
+            property_name in required,
+            property_schema.get("description"),
+        )
+        attribute = _unique(_attribute_name(property_name), attribute_names)
+        lines.append(f"    {attribute} = BodyParameter({arguments})")
+    return lines
+
+
+def _parameter_arguments(
+    name: Optional[str], schema: dict, required: bool, description: Optional[str]
+) -> str:
+    """Return the arguments of the ParameterConfig for the given parameter as source code."""
+    arguments = [f"name={name!r}"]
+    if required:
+        arguments.append("required=True")
+    if schema.get("type") == "array":
+        arguments.append("multiple=True")
+        schema = schema.get("items", {})
+
+    choices = schema.get("enum")
+    if choices:
+        arguments.append(f"choices={list(choices)!r}")
+    default = schema.get("default")
+    # qrest does not allow a default for a required parameter
+    if default is not None and not required and (not choices or default in choices):
+        arguments.append(f"default={default!r}")
+    if description:
+        arguments.append(f"description={description.strip()!r}")
+    return ", ".join(arguments)
+
+
+def _operation_name(operation: dict, method: str, path: str) -> str:
+    """Return the name of the resource of the given operation as a valid attribute name."""
+    name = operation.get("operationId") or "_".join([method] + re.findall(r"\w+", path))
+    name = _attribute_name(name)
+    # APIConfig does not allow a resource named "data"
+    return name + "_" if name == "data" else name
+
+
+def _attribute_name(name: str) -> str:
+    """Return the given name in snake case as a valid Python identifier that is not reserved."""
+    name = re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", name).lower()
+    name = re.sub(r"\W", "_", name)
+    if not name or name[0].isdigit():
+        name = "_" + name
+    if keyword.iskeyword(name) or name in RESERVED_NAMES:
+        name += "_"
+    return name
+
+
+def _class_name(name: str) -> str:
+    """Return the given name in camel case as a valid class name."""
+    class_name = "".join(word[:1].upper() + word[1:] for word in re.findall(r"[^\W_]+", name))
+    if not class_name or class_name[0].isdigit():
+        class_name = "Generated" + class_name
+    return class_name
+
+
+def _unique(name: str, names: set) -> str:
+    """Return the given name, with a number appended if it is already in the given names."""
+    unique_name = name
+    number = 2
+    while unique_name in names:
+        unique_name = f"{name}{number}"
+        number += 1
+    names.add(unique_name)
+    return unique_name
+
+
+def _operation_key(path, method, name, class_name, operation, shared) -> str:
+    """Return the key of the code of the given operation in the cache."""
+    data = [CACHE_VERSION, path, method, name, class_name, operation, shared]
+    serialized = json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(serialized).hexdigest()
+
+
+def _load_cache(cache_path: Optional[str]) -> Dict[str, str]:
+    """Return the cached code of each operation."""
+    if not cache_path:
+        return {}
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("operations", {})
+
+
+def _save_cache(cache_path: str, operations: Dict[str, str]):
+    """Write the code of each operation to the cache file."""
+    try:
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "operations": operations}, f)
+    except OSError as e:
+        logger.warning("could not write the cache to %s: %s", cache_path, e)
+
+
+# ================================================================================================
+class _Resolver:
+    """Resolves the local references of an OpenAPI document, such as "#/components/schemas/Post".
+    """
+
+    def __init__(self, document: dict):
+        self._document = document
+
+    def resolve(self, value):
+        """Return the given value, or the value it refers to if it is a reference."""
+        seen = set()
+        while isinstance(value, dict) and "$ref" in value:
+            reference = value["$ref"]
+            if reference in seen:
+                raise RestClientConfigurationError(f"reference {reference} refers to itself")
+            seen.add(reference)
+            value = self._lookup(reference)
+        return value
+
+    def resolve_all(self, value, depth: int = 0):
+        """Return the given value in which all references have been resolved.
+
+        Recursive schemas are resolved up to a limited depth.
+
+        """
+        value = self.resolve(value)
+        if depth > 32:
+            return {}
+        if isinstance(value, dict):
+            return {key: self.resolve_all(item, depth + 1) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self.resolve_all(item, depth + 1) for item in value]
+        return value
+
+    def _lookup(self, reference: str):
+        if not reference.startswith("#/"):
+            raise RestClientConfigurationError(f"only local references are supported: {reference}")
+        value = self._document
+        for part in reference[2:].split("/"):
+            part = part.replace("~1", "/").replace("~0", "~")
+            try:
+                value = value[part]
+            except (KeyError, TypeError):
+                raise RestClientConfigurationError(f"reference {reference} cannot be resolved")
+        return value
+
+
+# ================================================================================================
+def main(args: Optional[List[str]] = None):
+    """Generate a configuration module from the OpenAPI document given on the command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m qrest.openapi",
+        description="Generate a qrest configuration module from an OpenAPI 3 document.",
+    )
+    parser.add_argument("document", help="the OpenAPI document in JSON or YAML")
+    parser.add_argument("module", help="the path of the Python module to generate")
+    parser.add_argument("--cache", help="the path of the file that caches the generated code")
+    arguments = parser.parse_args(args)
+
+    code = generate(load_document(arguments.document), cache_path=arguments.cache)
+    if write_module(code, arguments.module):
+        print(f"wrote {arguments.module}")
+    else:
+        print(f"{arguments.module} is up-to-date")
+
+
+if __name__ == "__main__":
+    main()
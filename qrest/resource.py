@@ -5,31 +5,32 @@ to add functionality such as complex pagination or response processing
 
 """
 
-import requests
+import contextlib
+import copy
+import functools
 import logging
-from urllib.parse import quote, urljoin
+import time
 from abc import ABC
+from datetime import timedelta
 from typing import Optional
 
-from requests.packages.urllib3 import disable_warnings
-from requests.packages.urllib3.exceptions import InsecureRequestWarning
-
 # ================================================================================================
 # local imports
+from . import cassette, tracing
+from .body import content_type, encode_body, is_stream, release_body
+from .compression import CompressionStats
+from .instrumentation import Hooks, TimedAuth, Timing
 from .module_class_registry import ModuleClassRegistry
 from .response import Response
-from .utils import URLValidator
+from .utils import PathTemplate, import_requests, set_header
 from .exception import (
     RestClientQueryError,
     RestClientConfigurationError,
     RestCredentailsError,
-    RestResourceHTTPError,
     InvalidResourceError,
 )
-from .response import CSVResponse, JSONResponse
-from .auth import AuthConfig
-
-disable_warnings(InsecureRequestWarning)
+from .response import ArrowResponse, CBORResponse, CSVResponse, JSONResponse, MsgPackResponse
+from .response import NDJSONResponse
 
 logger = logging.getLogger(__name__)
 
@@ -43,8 +44,17 @@ class API:
     # placeholder for subclassed resources
     config = None
     auth = None
+    hooks = None
+    metrics = None
+    balancer = None
 
-    def __init__(self, imported_module):
+    def __init__(
+        self,
+        imported_module,
+        lazy: bool = False,
+        cache_path: Optional[str] = None,
+        submodules: bool = False,
+    ):
         """Initialize an API from the configurations in the given imported module.
 
         An API describes a REST server, and contains a list of resources. We
@@ -54,33 +64,69 @@ class API:
         non-standard responses such as pagination or a specific response format
         from which the payload needs to be derived
 
+        :param imported_module: the module that contains the APIConfig and ResourceConfig
+            subclasses, or a list of such modules for an API that is configured across several
+            modules
+        :param lazy: if True, each resource is created, validated and configured when it is
+            accessed for the first time instead of here. This reduces the startup time for
+            modules with many endpoints, but errors in the configuration of an endpoint only
+            surface when it is accessed
+        :param cache_path: the path to a file that caches the validated configuration. If the
+            configuration classes have not changed since the file was written, the endpoints
+            are created without validation. Otherwise, the file is (re)written
+        :param submodules: if True, the subclasses defined in the submodules of a package are
+            included as well, where the submodules are imported when necessary
+
         """
 
-        from .conf import APIConfig, ResourceConfig
+        from .conf import APIConfig, LazyEndpoints, ResourceConfig
+
+        if isinstance(imported_module, (list, tuple)):
+            imported_modules = imported_module
+        else:
+            imported_modules = [imported_module]
+        module_name = ", ".join(m.__name__ for m in imported_modules)
 
-        registry = ModuleClassRegistry(imported_module)
+        registry = ModuleClassRegistry(*imported_modules, submodules=submodules)
 
         api_configs = registry.retrieve(APIConfig)
         if not api_configs:
             raise RestClientConfigurationError(
-                f"Imported module '{imported_module.__name__}' does not contain a subclass of "
-                "APIConfig."
+                f"Imported module '{module_name}' does not contain a subclass of APIConfig."
             )
         elif len(api_configs) > 1:
             raise RestClientConfigurationError(
-                f"Imported module '{imported_module.__name__}' contains more than 1 subclass of "
-                "APIConfig."
+                f"Imported module '{module_name}' contains more than 1 subclass of APIConfig."
             )
 
         resource_configs = registry.retrieve(ResourceConfig)
         for c in resource_configs:
-            if "name" not in dir(c):
+            if not hasattr(c, "name"):
                 raise RestClientConfigurationError(
                     f"Imported class '{c.__name__}' does not have a 'name' attribute."
                 )
-        endpoints = {c.name: c.create() for c in resource_configs}
+        if cache_path:
+            from . import cache
+
+            key = cache.fingerprint(api_configs[0], resource_configs)
+            factories = key and cache.load(cache_path, key, resource_configs)
+            if factories:
+                if lazy:
+                    endpoints = LazyEndpoints(factories)
+                else:
+                    endpoints = {name: factory() for name, factory in factories.items()}
+                self._initialize(cache.restore_api_config(api_configs[0], endpoints))
+                return
 
-        self._initialize(api_configs[0](endpoints))
+        if lazy and not cache_path:
+            endpoints = LazyEndpoints({c.name: c.create for c in resource_configs})
+        else:
+            endpoints = {c.name: c.create() for c in resource_configs}
+
+        config = api_configs[0](endpoints)
+        if cache_path and key:
+            cache.save(cache_path, key, config.endpoints)
+        self._initialize(config)
 
     def _initialize(self, config):
         """Initialize the current API from the given APIConfig.
@@ -91,7 +137,7 @@ class API:
         """
 
         # check
-        from .conf import APIConfig
+        from .conf import APIConfig, LazyEndpoints
 
         if not isinstance(config, APIConfig):
             raise RestClientConfigurationError("configuration is not a APIConfig instance")
@@ -99,17 +145,70 @@ class API:
         self.config = config
         self.verifySSL = config.verify_ssl
         self.auth = self._get_authentication_module()
+        self.hooks = Hooks()
+        if len(config.urls) > 1:
+            from .balancer import LoadBalancer
 
-        #  process the endpoints
-        for name, item_config in self.config.endpoints.items():
-            if not isinstance(item_config.processor, Resource):
-                raise RestClientConfigurationError(
-                    f"defined resource class for {name} is not a Resource instance"
-                )
-            new_resource = self._create_rest_resource(
-                item_config.processor, resource_name=name, config=item_config, auth=self.auth
+            self.balancer = LoadBalancer(config.urls, config.balancing)
+
+        #  process the endpoints, lazy endpoints are processed on first access by __getattr__
+        if not isinstance(self.config.endpoints, LazyEndpoints):
+            for name, item_config in self.config.endpoints.items():
+                self._add_resource(name, item_config)
+
+    def __getattr__(self, name):
+        """Return the resource with the given name, which is created on first access.
+
+        This method is only called when the attribute is not found in the usual
+        ways, so it is called at most once for each lazy resource.
+
+        """
+        config = self.config
+        if config is None or name not in config.endpoints:
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+        return self._add_resource(name, config.endpoints[name])
+
+    def __dir__(self):
+        names = set(super().__dir__())
+        if self.config is not None:
+            names.update(self.config.endpoints)
+        return sorted(names)
+
+    def add_hook(self, event: str, hook):
+        """Register the given hook for the given event for all resources of this API.
+
+        See module qrest.instrumentation for the events and the arguments of each hook.
+
+        :raises RestClientConfigurationError: when the event is unknown
+        """
+        self.hooks.add(event, hook)
+
+    def enable_metrics(self, registry=None):
+        """Collect the statistics of the requests of each resource and return the registry.
+
+        The registry is also available as attribute ``metrics``.
+
+        :param registry: the qrest.metrics.MetricsRegistry to use, for example to share it
+            between APIs. If None, a new one is created
+        """
+        from .metrics import MetricsRegistry
+
+        if self.metrics is None:
+            self.metrics = MetricsRegistry() if registry is None else registry
+            self.metrics.install(self)
+        return self.metrics
+
+    def _add_resource(self, name, item_config):
+        """Create the resource with the given name and add it as an attribute."""
+        if not isinstance(item_config.processor, Resource):
+            raise RestClientConfigurationError(
+                f"defined resource class for {name} is not a Resource instance"
             )
-            setattr(self, name, new_resource)
+        new_resource = self._create_rest_resource(
+            item_config.processor, resource_name=name, config=item_config, auth=self.auth
+        )
+        setattr(self, name, new_resource)
+        return new_resource
 
     # ---------------------------------------------------------------------------------------------
     @property
@@ -119,17 +218,9 @@ class API:
             :return: A list of the available resources for this REST API
             :rtype: ``list(string_type)``
         """
-
-        resources = []
-        fieldnames = dir(self)
-        for fieldname in fieldnames:
-            # this exclusion is to prevent endless loops
-            if fieldname == "resources":
-                continue
-            field = getattr(self, fieldname)
-            if isinstance(field, Resource):
-                resources.append(field.name)
-        return resources
+        if self.config is None:
+            return []
+        return sorted(self.config.endpoints)
 
     # ---------------------------------------------------------------------------------------------
     def _create_rest_resource(self, processor, resource_name, config, auth=None):
@@ -162,8 +253,14 @@ class API:
             raise RestClientConfigurationError(msg)
 
         processor.configure(
-            name=resource_name, config=config, server_url=self.config.url, auth=auth
+            name=resource_name,
+            config=config,
+            server_url=self.config.urls[0],
+            auth=auth,
+            memory_lean=self.config.memory_lean,
+            balancer=self.balancer,
         )
+        processor.api_hooks = self.hooks
         return processor
 
     def _get_authentication_module(self):
@@ -176,6 +273,9 @@ class API:
         else:
             if auth_config is None:
                 return None
+
+            from .auth import AuthConfig
+
             if not isinstance(auth_config, AuthConfig):
                 raise RestClientConfigurationError(
                     "authentication attribute is not an instance of AuthConfig"
@@ -184,6 +284,44 @@ class API:
             return auth_module(self, auth_config)
 
 
+def _start_span(tracer: tracing.Tracer, name: str, timing: Timing) -> tracing.Span:
+    """Return the span of the request of the given resource."""
+    span = tracer.start_span(name)
+    span.set_attribute("http.method", timing.method)
+    span.set_attribute("http.url", timing.url)
+    return span
+
+
+def _measure_transfer(timing: Timing, response, duration: float, stream: bool):
+    """Add the time to first byte, the download time and the sizes of the bodies to the given
+    timing, where duration is the time it took to send the request and receive the response.
+
+    The size of a streamed response body is not known until it has been read, so it is left out.
+
+    """
+    elapsed = getattr(response, "elapsed", None)
+    # requests measures the time from sending the request until the headers are parsed
+    if isinstance(elapsed, timedelta):
+        timing.ttfb = elapsed.total_seconds()
+        timing.download = max(0.0, duration - timing.auth - timing.ttfb)
+    else:
+        timing.ttfb = max(0.0, duration - timing.auth)
+
+    body = getattr(getattr(response, "request", None), "body", None)
+    if isinstance(body, (bytes, str)):
+        timing.bytes_out = len(body.encode("utf-8") if isinstance(body, str) else body)
+    elif body is None:
+        timing.bytes_out = 0
+
+    if not stream:
+        raw = getattr(response, "raw", None)
+        size = raw.tell() if hasattr(raw, "tell") else None
+        if not isinstance(size, int):
+            content = response.content
+            size = len(content) if isinstance(content, bytes) else None
+        timing.bytes_in = size
+
+
 # ===================================================================================================
 class Resource(ABC):
     """A resource is defined as a single REST endpoint.
@@ -198,15 +336,45 @@ class Resource(ABC):
     config = None
 
     server_url = None
+    path_template = None
     request_parameters = None
     verify_ssl = False
     auth = None
     cleaned_data = None
 
+    memory_lean = False
+    """True iff no data of a call should be kept on this resource after the call"""
+
+    balancer = None
+    """the qrest.balancer.LoadBalancer that selects the replica for each call, if any"""
+
+    path_templates = None
+    """the PathTemplate of the URL on each replica"""
+
+    hedger = None
+    """the qrest.hedging.Hedger that sends a second request when the response is slow, if any"""
+
+    hooks = None
+    """the hooks registered for this resource only"""
+
+    api_hooks = None
+    """the hooks registered for all resources of the API"""
+
+    _validation_time = 0.0
+
     response: Response
 
     # ---------------------------------------------------------------------------------------------
-    def configure(self, name: str, server_url: str, config, auth=None, verify_ssl: bool = False):
+    def configure(
+        self,
+        name: str,
+        server_url: str,
+        config,
+        auth=None,
+        verify_ssl: bool = False,
+        memory_lean: bool = False,
+        balancer=None,
+    ):
         """Configure the resource. This is a required procedure to set all parameters.
         Setting these parameters is not possible by using __init__, because
         this class is initialized within the config, to enable setting custom
@@ -220,14 +388,29 @@ class Resource(ABC):
         :type auth: subclass of AuthConfig
         :param config: which ResourceConfig to use
         :type config: subclass of ResourceConfig
+        :param memory_lean: if True, each call gets its own Response, which releases the body
+            once it has been parsed, and the parameters of a call are not kept
+        :param balancer: the qrest.balancer.LoadBalancer that selects the base URL of the replica
+            for each call. If None, server_url is used
 
         """
 
         self.name = name
         self.server_url = server_url
+        self.path_template = PathTemplate(server_url, config.path)
+        self.balancer = balancer
+        if balancer is not None:
+            self.path_templates = [
+                PathTemplate(replica.url, config.path) for replica in balancer.replicas
+            ]
+        if config.hedging is not None:
+            from .hedging import Hedger
+
+            self.hedger = Hedger(config.hedging)
         self.config = config
         self.auth = auth
         self.verify_ssl = verify_ssl
+        self.memory_lean = memory_lean
 
         self.cleaned_data = {}
         self.request_parameters = None
@@ -236,19 +419,53 @@ class Resource(ABC):
     # ---------------------------------------------------------------------------------------------
     def __call__(self, *args, **kwargs):
         """Execute the REST query and return the content of interest of the response."""
-        response = self.get_response(*args, **kwargs)
+        response = self._get_response(kwargs, parse=True)
         return response.fetch()
 
     def get_response(self, *args, **kwargs):
         """Execute the REST query and return the qrest.response.Response object.
 
         This method executes the REST query for the given arguments, checks
-        input quality and formats the REST parameters.
+        input quality and formats the REST parameters. The body of the response
+        is parsed on first access to its data.
 
         """
+        return self._get_response(kwargs)
+
+    def _get_response(self, kwargs: dict, parse: bool = False):
+        """Execute the REST query for the given arguments and return the Response.
+
+        :param parse: True to parse the body as part of the call, so its time and errors are
+            those of the call, see method _get
+        """
+        start = time.perf_counter()
         self.cleaned_data = {}
         self.check(**kwargs)
-        return self._get()
+        self._validation_time = time.perf_counter() - start
+        if not self.memory_lean:
+            return self._get(parse=parse)
+        try:
+            return self._get(parse=parse)
+        finally:
+            # the parameters can hold a large request body
+            self.cleaned_data = {}
+
+    def add_hook(self, event: str, hook):
+        """Register the given hook for the given event for this resource.
+
+        See module qrest.instrumentation for the events and the arguments of each hook.
+
+        :raises RestClientConfigurationError: when the event is unknown
+        """
+        if self.hooks is None:
+            self.hooks = Hooks()
+        self.hooks.add(event, hook)
+
+    def _emit(self, event: str, *args):
+        """Call the hooks of the API and of this resource for the given event."""
+        for hooks in (self.api_hooks, self.hooks):
+            if hooks:
+                hooks.emit(event, self, *args)
 
     # ---------------------------------------------------------------------------------------------
     @property
@@ -302,6 +519,13 @@ class Resource(ABC):
         """
         check the input request parameters before sending it to the remote service
         """
+        self.cleaned_data = self._clean(kwargs)
+
+    def _clean(self, kwargs: dict) -> dict:
+        """Check the given request parameters and return them with the defaults applied.
+
+        Unlike method check, this does not change the state of the resource.
+        """
 
         conf = self.config
 
@@ -369,37 +593,31 @@ class Resource(ABC):
             if item not in kwargs:
                 kwargs[item] = value
 
-        self.cleaned_data = kwargs
+        return kwargs
 
     # ---------------------------------------------------------------------------------------------
     @property
     def query_url(self):
         """
-        returns the URL that is actually queried
+        returns the URL that is actually queried, on the first replica when the API has several
+        replicas, see method replica_url
         """
+        return self.replica_url(None)
 
-        # url and parameters
-        if "cleaned_data" not in dir(self):
-            raise KeyError("request data is not cleaned. Run validate_request first")
-
-        resolved_path = "/".join(self.config.path)
-        selected_params = [
-            parameter
-            for parameter in self.cleaned_data
-            if parameter in self.config.path_parameters
-        ]
-        path_para = {p: quote(str(self.cleaned_data[p]), safe="") for p in selected_params}
-        resolved_path = resolved_path.format(**path_para)
+    def replica_url(self, replica) -> str:
+        """Return the URL that is queried on the given qrest.balancer.Replica.
 
-        # Construct URL using base URL and path
-        url = urljoin(base=self.server_url, url=resolved_path)
+        :param replica: the replica selected by the load balancer, or None for the first one
+        """
 
-        # Check if valid URL
-        # Only allow http or https schemes for the REST API base URL
-        url_validator = URLValidator(schemes=["http", "https"])
-        url_validator.check(url)
+        # url and parameters
+        if self.cleaned_data is None:
+            raise KeyError("request data is not cleaned. Run validate_request first")
 
-        return url
+        # the template has been validated by configure
+        if replica is not None:
+            return self.path_templates[replica.index].format(self.cleaned_data)
+        return self.path_template.format(self.cleaned_data)
 
     # ---------------------------------------------------------------------------------------------
     @property
@@ -407,12 +625,16 @@ class Resource(ABC):
         """
         generate the request and body parameters based on the validated input and the config
         """
+        return self._split_parameters(self.cleaned_data)
+
+    def _split_parameters(self, cleaned_data: dict) -> dict:
+        """Return the request and body parameters of the given validated input."""
         request_parameters = {}
         body_parameters = {}
 
         # process via the config
         config_parameters = self.config.parameters
-        for para_name, para_val in self.cleaned_data.items():
+        for para_name, para_val in cleaned_data.items():
             if para_name in self.config.path_parameters:
                 continue
             rest_name = config_parameters[para_name].name
@@ -437,12 +659,16 @@ class Resource(ABC):
         return return_structure
 
     # ---------------------------------------------------------------------------------------------
-    def _get(self, extra_request=None, extra_body=None):
+    def _get(self, extra_request=None, extra_body=None, parse: bool = False):
         """ This function builds and sends a request for a specified REST API resource.
             The parameters are validated in a previous call to validate_query().
             It returns a dictionary of the response or throws an appropriate
             error, depending on the HTTP return code.
 
+            If parse is True, the body is parsed within the span and the timing of the call,
+            and a body that cannot be parsed is an error of the call. Otherwise, the body is
+            parsed on first access to its data, after the call.
+
             This should be the *only* place in the module where the Requests module is called!
 
         """
@@ -452,9 +678,10 @@ class Resource(ABC):
             raise RestCredentailsError("user credentials are not set")
 
         # url and parameters
-        if "cleaned_data" not in dir(self):
+        if self.cleaned_data is None:
             raise KeyError("request data is not cleaned. Run validate_query first")
 
+        url = self.query_url
         query_parameters = self.query_parameters
 
         # add hooks to extend get function
@@ -468,36 +695,179 @@ class Resource(ABC):
                     raise RestClientQueryError("trying to overload parameter " + item)
             query_parameters[location].update(data_dict)
 
+        timing = Timing(self.name, self.config.method, url)
+        timing.validation = self._validation_time
+        start = time.perf_counter()
+
+        body = query_parameters["body"]
+        encoding = self.config.body_encoding
+        arguments = encode_body(body, encoding)
+        headers = self._request_headers(body, encoding)
+
+        compression = self.config.compression
+        stream = self.response.streaming
+        if stream:
+            arguments["stream"] = True
+        if compression is not None:
+            stats = CompressionStats()
+            arguments, headers = compression.apply(arguments, headers, stats)
+            if compression.stream_responses:
+                stream = arguments["stream"] = True
+        timing.encode = time.perf_counter() - start
+
+        # requests is imported on the first request to keep the import of qrest fast
+        requests = import_requests()
+        from .exception import RestResourceHTTPError
+
+        self._emit("pre_request", timing)
+        tracer = tracing.tracer
+        span = None if tracer is None else _start_span(tracer, self.name, timing)
+
         # Do HTTP request to REST API
-        logger.debug(" running %s" % self.query_url)
+        logger.debug(" running %s", url)
+        try:
+            try:
+                sent = time.perf_counter()
+                with tracing.child_span(span, "http") as http_span:
+                    auth = None if self.auth is None else TimedAuth(self.auth, timing, http_span)
+                    response = self._send(
+                        timing,
+                        idempotent=not is_stream(body),
+                        method=self.config.method,
+                        auth=auth,
+                        verify=self.verify_ssl,
+                        url=url,
+                        params=query_parameters["request"],
+                        headers=tracing.inject(headers, http_span),
+                        **arguments,
+                    )
+                    received = time.perf_counter()
+                    assert isinstance(response, requests.Response)
+                    timing.status = response.status_code
+                    if span is not None:
+                        span.set_attribute("http.status_code", response.status_code)
+
+                    if response.status_code > 399:  # Nicely catch exceptions
+                        raise RestResourceHTTPError(response_object=response)
+                    # for completeness sake: let requests check for valid output
+                    # code should not get here...
+                    response.raise_for_status()
+            except ValueError:
+                # Weird response errors: just give back the raw data. This has the risk of
+                # dismissing valid errors!
+                return response.content
+            except requests.HTTPError as http:
+                # This is a back-catcher for HTTP errors that were not caught before. Code shoul
+                # not get here
+                raise http
+            else:
+                _measure_transfer(timing, response, received - sent, stream)
+                processor = self.response
+                if self.memory_lean:
+                    # a Response of its own is not kept alive by this resource after the call
+                    processor = copy.copy(processor)
+                    processor.memory_lean = True
+                r = processor(response, stream=True) if stream else processor(response)
+                r.timing = timing
+                if compression is not None:
+                    # the size of a streamed body is updated once the body has been parsed
+                    r.compression = stats
+                    r.measure_compression()
+                    logger.debug(" compression saved %d bytes", stats.bytes_saved)
+                if parse:
+                    with tracing.child_span(span, "parse"):
+                        r.parse()
+                else:
+                    r.instrumentation = functools.partial(self._time_parse, timing)
+                timing.total = timing.validation + time.perf_counter() - start
+                self._emit("post_response", timing, r)
+                return r
+        except Exception as error:
+            timing.total = timing.validation + time.perf_counter() - start
+            if span is not None:
+                span.record_exception(error)
+            self._emit("error", timing, error)
+            raise
+        finally:
+            release_body(arguments)
+            if span is not None:
+                span.end()
+
+    @contextlib.contextmanager
+    def _time_parse(self, timing: Timing):
+        """Add the time to parse a response body after the call to the total time of the call.
+
+        The call has ended by then, so the parsing gets no span and its errors are only raised
+        to the caller: the hooks have received the end of the call already.
+
+        """
+        start = time.perf_counter()
         try:
-            response = requests.request(
-                method=self.config.method,
-                auth=self.auth,
-                verify=self.verify_ssl,
-                url=self.query_url,
-                params=query_parameters["request"],
-                json=query_parameters["body"],
-                headers=self.config.headers,
+            yield
+        finally:
+            timing.total += time.perf_counter() - start
+
+    # ---------------------------------------------------------------------------------------------
+    def _send(self, timing: Timing, idempotent: bool = True, **kwargs):
+        """Send the request with the given arguments of requests.request and return the response.
+
+        If the API has several replicas, the request is sent to the replica that the load
+        balancer selects, and sent again to another one after a failure if it is idempotent.
+        If the resource hedges its requests, a second request is sent when the response is slow.
+        If a cassette is in use, see module qrest.cassette, the cassette returns the response.
+
+        """
+        if self.hedger is not None and idempotent:
+            response, url = self.hedger.send(
+                lambda: self._send_balanced(timing, idempotent, kwargs), timing
             )
-            assert isinstance(response, requests.Response)
-
-            if response.status_code > 399:  # Nicely catch exceptions
-                raise RestResourceHTTPError(response_object=response)
-            # for completeness sake: let requests check for valid output
-            # code should not get here...
-            response.raise_for_status()
-        except ValueError:
-            # Weird response errors: just give back the raw data. This has the risk of dismissing
-            # valid errors!
-            return response.content
-        except requests.HTTPError as http:
-            # This is a back-catcher for HTTP errors that were not caught before. Code shoul
-            # not get here
-            raise http
         else:
-            r = self.response(response)
-            return r
+            response, url = self._send_balanced(timing, idempotent, kwargs)
+        # the hedged requests are sent from the threads of a pool, so only the caller sets it
+        timing.url = url
+        return response
+
+    def _send_balanced(self, timing: Timing, idempotent: bool, kwargs: dict):
+        """Send the request to the replica the load balancer selects, if any.
+
+        :return: the response and the URL to which it was sent
+        """
+        if self.balancer is None:
+            return self._transport(**kwargs), kwargs["url"]
+
+        from .balancer import RETRYABLE_METHODS
+
+        urls = []
+
+        def send(replica):
+            # the hedged requests of a call can be sent concurrently, so kwargs is not changed
+            urls.append(self.replica_url(replica))
+            return self._transport(**dict(kwargs, url=urls[-1]))
+
+        idempotent = idempotent and self.config.method in RETRYABLE_METHODS
+        return self.balancer.send(send, idempotent, timing), urls[-1]
+
+    def _transport(self, **kwargs):
+        """Return the response of requests.request, or of the cassette that is in use."""
+        replay = cassette.active.get()
+        if replay is not None:
+            return replay.request(**kwargs)
+        return import_requests().request(**kwargs)
+
+    # ---------------------------------------------------------------------------------------------
+    def _request_headers(self, body, encoding: str) -> dict:
+        """Return the headers to send with the given body.
+
+        requests sets the content type of a JSON body that it serializes itself, but not of
+        the payloads that qrest encodes. A configured content type is kept for JSON, as it
+        may specify a charset, but it is replaced for the other encodings.
+
+        """
+        headers = self.config.headers
+        body_type = content_type(body, encoding)
+        if body_type is None or (encoding == "json" and not is_stream(body)):
+            return headers
+        return set_header(headers, "Content-Type", body_type, replace=encoding != "json")
 
 
 # ###############################################################
@@ -523,11 +893,92 @@ class JSONResource(Resource):
         self.response = JSONResponse(extract_section, create_attribute)
 
 
+class MsgPackResource(Resource):
+    """ A REST Resource that expects an application/msgpack return. It requires the optional
+    package msgpack
+
+    """
+
+    def __init__(
+        self,
+        *,
+        extract_section: Optional[list] = None,
+        create_attribute: Optional[str] = "results",
+    ):
+        """
+        :param extract_section: see JSONResource
+        :param create_attribute: see JSONResource
+        """
+
+        self.response = MsgPackResponse(extract_section, create_attribute)
+
+
+class CBORResource(Resource):
+    """ A REST Resource that expects an application/cbor return. It requires the optional
+    package cbor2
+
+    """
+
+    def __init__(
+        self,
+        *,
+        extract_section: Optional[list] = None,
+        create_attribute: Optional[str] = "results",
+    ):
+        """
+        :param extract_section: see JSONResource
+        :param create_attribute: see JSONResource
+        """
+
+        self.response = CBORResponse(extract_section, create_attribute)
+
+
 class CSVResource(Resource):
     """ A REST Resource that expects a text/csv return
 
     """
 
-    def __init__(self):
-        """Set the use of a CSVResponse."""
-        self.response = CSVResponse()
+    def __init__(self, *, arrow: bool = False):
+        """Set the use of a CSVResponse.
+
+        :param arrow: if True, decode the CSV into a pyarrow.Table
+        """
+        self.response = CSVResponse(arrow=arrow)
+
+
+class ArrowResource(Resource):
+    """ A REST Resource that expects an Apache Arrow IPC stream or file return, or Parquet. It
+    requires the optional package pyarrow
+
+    """
+
+    def __init__(self, *, as_table: bool = False):
+        """
+        :param as_table: if True, return a pyarrow.Table instead of an iterator over the
+            pyarrow.RecordBatch instances
+        """
+        self.response = ArrowResponse(as_table=as_table)
+
+
+class NDJSONResource(Resource):
+    """ A REST Resource that expects an application/x-ndjson return, which it processes one
+    record at a time
+
+    """
+
+    def __init__(
+        self,
+        *,
+        extract_section: Optional[list] = None,
+        create_attribute: Optional[str] = "results",
+        batch_size: Optional[int] = None,
+    ):
+        """
+        :param extract_section: This indicates which part of each record contains the payload
+            that should be extracted. The tree is provided as a list of items to traverse
+        :param create_attribute: The "results_name" which is the property that will be generated
+            to contain the iterator over the records
+        :param batch_size: If set, the iterator yields lists of at most batch_size records
+        """
+
+        self.response = NDJSONResponse(extract_section, create_attribute, batch_size)
@@ -4,21 +4,27 @@ around the data the comes from the REST server after the client asks for it.
 """
 
 import copy
-import requests
+import io
+import json
 import logging
+import time
+import warnings
 from abc import ABC, abstractmethod
-from typing import List, Optional, Type
-
-from requests.packages.urllib3 import disable_warnings
-from requests.packages.urllib3.exceptions import InsecureRequestWarning
+from typing import TYPE_CHECKING, Iterator, List, Optional
 
 # ================================================================================================
 # local imports
 from .exception import RestResourceMissingContentError, RestClientConfigurationError
+from .utils import import_optional, import_requests
+
+if TYPE_CHECKING:
+    import requests
 
-disable_warnings(InsecureRequestWarning)
 logger = logging.getLogger(__name__)
 
+CHUNK_SIZE = 64 * 1024
+"""the size in bytes of the chunks in which a streamed response body is read"""
+
 # =================================================================================================
 
 
@@ -31,44 +37,230 @@ class Response(ABC):
 
     Attribute data is initialized to None and should be set in method _parse.
 
+    The body is parsed on first access to the data of interest, via attribute
+    data or raw, method fetch or the attribute that a JSONResponse creates. A
+    caller that only needs the status or a header, or that passes the body on
+    as bytes via attribute content, never pays for the parsing.
+
+    In memory-lean mode, the undecoded body, the decoded copy in attribute raw
+    and the response of the transport are released once the body has been
+    parsed, so only the data of interest remains.
+
     """
 
     _response = None
+    _stream = False
+    _body = None
+    _parsed = False
+    _data = None
+    _raw = None
+    _released = None
     headers = None
-    raw = None
     options = None
+    compression = None
+    timing = None
+
+    instrumentation = None
+    """the function that returns a context manager around the parsing of the body, which the
+    Resource sets to add the time of a parse after the call to the total time of the call"""
 
-    data = None
+    streaming = False
+    """True iff the body should always be parsed while it is read from the network"""
 
-    def __call__(self, response: Type[requests.models.Response]):
+    memory_lean = False
+    """True iff only the data of interest should be kept once the body has been parsed"""
+
+    def __call__(self, response: "requests.models.Response", stream: bool = False):
         """ RestResponse wrapper call
             :param response: The Requests Response object
+            :param stream: True iff the body of the Requests Response object has not been read
+                yet. In that case, the body is parsed while it is read and attribute raw is not
+                set to the undecoded body
         """
         if not self.options:
             # raise RestClientConfigurationError('configuration is not set for API Response')
             logger.warning("No options are provided")
 
+        requests = import_requests()
         if not isinstance(response, requests.models.Response):
             raise TypeError("RestResponse expects a requests.models.Response as input")
 
         self._response = response
-        self.headers = response.headers
-        self.raw = response.content
-
-        # We also store the headers with lowercase field names so we become
-        # independent of the case of each field name. For example, a response
-        # header can have field "Content-Type", but field "content-type" is
-        # also allowed.
-        self._headers_lowercase = {name.lower(): value for name, value in self.headers.items()}
+        self._stream = stream
+        self._body = None
+        self._parsed = False
+        self._released = None
+        self._data = None
+        self._raw = None if stream or self.memory_lean else response.content
+        self.instrumentation = None
+
+        # The headers are looked up independent of the case of each field name. For example, a
+        # response header can have field "Content-Type", but field "content-type" is also
+        # allowed. requests already provides such a view, so it is only created when missing.
+        headers = response.headers
+        if not isinstance(headers, requests.structures.CaseInsensitiveDict):
+            headers = requests.structures.CaseInsensitiveDict(headers)
+        self.headers = headers
 
         self._check_content()
-        self._parse()
         return self
 
+    @property
+    def _headers_lowercase(self):
+        """Deprecated alias of attribute headers, which is looked up independent of case."""
+        message = "_headers_lowercase is deprecated, use headers instead"
+        warnings.warn(message, DeprecationWarning, stacklevel=2)
+        return self.headers
+
+    @property
+    def data(self):
+        """the data of interest of the REST response, which is parsed on first access"""
+        self.parse()
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    @property
+    def raw(self):
+        """the decoded body of the REST response, which is parsed on first access
+
+        Before the body is parsed, the private attribute holds the undecoded body, or None when
+        the response is streamed.
+
+        """
+        self.parse()
+        return self._raw
+
+    @raw.setter
+    def raw(self, value):
+        self._raw = value
+
+    @property
+    def content(self) -> Optional[bytes]:
+        """Return the body as bytes without parsing it, e.g. to pass it on unchanged.
+
+        The body of a streamed response is read when it is accessed, so it can no longer be
+        parsed afterwards. In memory-lean mode, the body is None once it has been parsed.
+
+        """
+        if self._released is not None:
+            return None
+        return self._response.content
+
+    @property
+    def status_code(self) -> int:
+        """Return the HTTP status code of the REST response."""
+        if self._released is not None:
+            return self._released["status_code"]
+        return self._response.status_code
+
+    def parse(self):
+        """Parse the body unless that has been done already.
+
+        The time it takes is added to the parse time of the timing of the response, and the
+        sizes of the body to the compression statistics, if any.
+
+        """
+        if self._parsed:
+            return
+        # _parse itself can use attributes data and raw
+        self._parsed = True
+        start = time.perf_counter()
+        try:
+            if self.instrumentation is None:
+                self._parse()
+            else:
+                with self.instrumentation():
+                    self._parse()
+        except BaseException:
+            self._parsed = False
+            raise
+        if self.timing is not None:
+            self.timing.parse += time.perf_counter() - start
+        self.instrumentation = None
+        self.measure_compression()
+        if self.memory_lean:
+            self._release()
+
+    def measure_compression(self):
+        """Record the size of the body before and after decompression in attribute compression.
+
+        The size of a streamed body is only known as far as it has been read.
+
+        """
+        if self.compression is not None:
+            self.compression.response_received = self.bytes_received
+            self.compression.response_decoded = self.bytes_decoded
+
+    def _release(self):
+        """Drop the references to the body and to the response of the transport.
+
+        The body of a streamed response is still being read by the data of interest, so only
+        the decoded copy is dropped.
+
+        """
+        self._raw = None
+        if self._stream:
+            return
+        self._released = {
+            "status_code": getattr(self._response, "status_code", None),
+            "bytes_received": self.bytes_received,
+            "bytes_decoded": self.bytes_decoded,
+        }
+        self._response = None
+
     def fetch(self):
         """Return the data of interest of the REST response."""
         return self.data
 
+    def close(self):
+        """Release the connection of a streamed response whose body has not been read in full."""
+        if self._response is not None:
+            self._response.close()
+
+    @property
+    def bytes_received(self) -> int:
+        """Return the number of bytes of the body as it was transferred, so before decompression.
+        """
+        if self._released is not None:
+            return self._released["bytes_received"]
+        raw = getattr(self._response, "raw", None)
+        if hasattr(raw, "tell"):
+            return raw.tell()
+        return self.bytes_decoded
+
+    @property
+    def bytes_decoded(self) -> int:
+        """Return the number of bytes of the body after decompression that have been read."""
+        if self._stream:
+            return self._body.bytes_read if self._body else 0
+        if self._released is not None:
+            return self._released["bytes_decoded"]
+        return len(self._response.content)
+
+    def _open_body(self) -> io.BufferedReader:
+        """Return a binary file-like object that reads the decompressed body.
+
+        If the response is streamed, the body is read from the network while the
+        file-like object is read.
+
+        """
+        self._body = _ChunkReader(self._response.iter_content(CHUNK_SIZE))
+        return io.BufferedReader(self._body, CHUNK_SIZE)
+
+    def _open_text(self) -> io.TextIOWrapper:
+        """Return a text file-like object that reads the decompressed body.
+
+        The body is decoded using the charset in the Content-Type header, or UTF-8 without one,
+        which is how a body that has been read in full is decoded. The transport would default
+        to ISO-8859-1 for text/* content types.
+
+        """
+        encoding = _charset(self.headers.get("content-type", "")) or "utf-8"
+        return io.TextIOWrapper(self._open_body(), encoding=encoding)
+
     @abstractmethod
     def _check_content(self):
         pass
@@ -103,10 +295,25 @@ class JSONResponse(Response):
         self.extract_section = extract_section
         self.create_attribute = create_attribute
 
+    def __call__(self, response: "requests.models.Response", stream: bool = False):
+        # the payload subsection of the previous response must not be returned for this one
+        self.__dict__.pop(self.create_attribute, None)
+        return super().__call__(response, stream)
+
+    def __getattr__(self, name: str):
+        # the attribute with the payload subsection is created when the body is parsed
+        if name == self.__dict__.get("create_attribute") and self._response is not None:
+            self.parse()
+            if name in self.__dict__:
+                return self.__dict__[name]
+        raise AttributeError(name)
+
     def _check_content(self):
-        content_type = self._headers_lowercase.get("content-type", "unknown")
+        content_type = self.headers.get("content-type", "unknown")
         if "json" not in content_type:
             raise TypeError(f"the REST response did not give a JSON but a {content_type}")
+        if "ndjson" in content_type:
+            raise TypeError("the REST response gave NDJSON, use an NDJSONResource to process it")
 
     def _parse(self):
         """ Returns the JSON contained in the Requests Response object, following the options
@@ -117,19 +324,164 @@ class JSONResponse(Response):
         :rtype: ``dict``
         """
 
-        # replace content by decoded content
-        self.raw = copy.deepcopy(self._response.json())
+        if self._stream:
+            # the body is decompressed while it is read, but json.load reads the decompressed
+            # text in one piece, as the json module cannot decode incrementally
+            content = json.load(self._open_text())
+            self.raw = content
+        elif self.memory_lean:
+            # the decoded body is not kept in attribute raw, so a single copy suffices
+            content = self._response.json()
+        else:
+            # replace content by decoded content
+            self.raw = copy.deepcopy(self._response.json())
+            content = copy.deepcopy(self._response.json())
 
         # subset the response dictionary
-        json = copy.deepcopy(self._response.json())
-        if isinstance(json, dict) and self.extract_section:
-            for element in self.extract_section:
-                if element in json:
-                    json = json[element]
-                else:
-                    raise RestResourceMissingContentError(f"Element {element} could not be found")
-        setattr(self, self.create_attribute, json)
-        self.data = json
+        content = _extract_section(content, self.extract_section)
+        setattr(self, self.create_attribute, content)
+        self.data = content
+
+
+class NDJSONResponse(JSONResponse):
+    """Wrap a REST response for content type application/x-ndjson, also known as JSON Lines.
+
+    The data of interest is an iterator over the records in the response. The
+    body is read from the network and decoded one line at a time while the
+    iterator is consumed, so memory use does not depend on the number of
+    records. As a consequence, the iterator can be consumed only once.
+
+    """
+
+    streaming = True
+
+    def __init__(
+        self,
+        extract_section: Optional[list] = None,
+        create_attribute: Optional[str] = "results",
+        batch_size: Optional[int] = None,
+    ):
+        """
+        :param extract_section: This indicates which part of each record contains the payload
+            that should be extracted. The tree is provided as a list of items to traverse
+        :param create_attribute: The name of the attribute that will contain the iterator over
+            the records.
+        :param batch_size: If set, the iterator yields lists of at most batch_size records
+            instead of single records.
+
+        """
+        super().__init__(extract_section, create_attribute)
+        if batch_size is not None and (not isinstance(batch_size, int) or batch_size < 1):
+            raise RestClientConfigurationError("batch_size option is not a positive integer")
+        self.batch_size = batch_size
+
+    def _check_content(self):
+        content_type = self.headers.get("content-type", "unknown")
+        if not any(subtype in content_type for subtype in ("ndjson", "jsonl", "json-lines")):
+            raise TypeError(f"the REST response did not give NDJSON but a {content_type}")
+
+    def _parse(self):
+        """Let the data of interest be an iterator over the (extracted) records."""
+        # the stream is opened here, as the Response can receive another body before the
+        # iterator is consumed
+        records = self._iter_records(self._open_text())
+        if self.batch_size:
+            records = _batch(records, self.batch_size)
+        setattr(self, self.create_attribute, records)
+        self.data = records
+
+    def _iter_records(self, text: io.TextIOWrapper) -> Iterator:
+        """Yield the decoded records in the given text of the body, one line at a time."""
+        for line in text:
+            if line.strip():
+                yield _extract_section(json.loads(line), self.extract_section)
+
+
+class MsgPackResponse(JSONResponse):
+    """Wrap a REST response for content type application/msgpack.
+
+    MessagePack is a binary serialization of the same data structures as JSON,
+    so this class supports the same options as JSONResponse. It requires the
+    optional package msgpack.
+
+    """
+
+    def __init__(
+        self, extract_section: Optional[list] = None, create_attribute: Optional[str] = "results"
+    ):
+        super().__init__(extract_section, create_attribute)
+        self._msgpack = import_optional("msgpack", extra="msgpack")
+
+    def _check_content(self):
+        content_type = self.headers.get("content-type", "unknown")
+        if "msgpack" not in content_type:
+            raise TypeError(f"the REST response did not give MessagePack but a {content_type}")
+
+    def _parse(self):
+        if self._stream:
+            content = self._msgpack.Unpacker(self._open_body(), raw=False).unpack()
+        else:
+            content = self._msgpack.unpackb(self._response.content, raw=False)
+        self.raw = content
+
+        content = _extract_section(content, self.extract_section)
+        setattr(self, self.create_attribute, content)
+        self.data = content
+
+
+class CBORResponse(JSONResponse):
+    """Wrap a REST response for content type application/cbor.
+
+    CBOR is a binary serialization of the same data structures as JSON, so this
+    class supports the same options as JSONResponse. It requires the optional
+    package cbor2.
+
+    """
+
+    def __init__(
+        self, extract_section: Optional[list] = None, create_attribute: Optional[str] = "results"
+    ):
+        super().__init__(extract_section, create_attribute)
+        self._cbor2 = import_optional("cbor2", extra="cbor")
+
+    def _check_content(self):
+        content_type = self.headers.get("content-type", "unknown")
+        if "cbor" not in content_type:
+            raise TypeError(f"the REST response did not give CBOR but a {content_type}")
+
+    def _parse(self):
+        if self._stream:
+            content = self._cbor2.load(self._open_body())
+        else:
+            content = self._cbor2.loads(self._response.content)
+        self.raw = content
+
+        content = _extract_section(content, self.extract_section)
+        setattr(self, self.create_attribute, content)
+        self.data = content
+
+
+def _extract_section(content, extract_section: Optional[list]):
+    """Return the subsection of the decoded JSON content that extract_section points to."""
+    if isinstance(content, dict) and extract_section:
+        for element in extract_section:
+            if element in content:
+                content = content[element]
+            else:
+                raise RestResourceMissingContentError(f"Element {element} could not be found")
+    return content
+
+
+def _batch(records: Iterator, batch_size: int) -> Iterator[list]:
+    """Yield lists of at most batch_size records."""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
 
 class CSVResponse(Response):
@@ -140,16 +492,152 @@ class CSVResponse(Response):
 
     """
 
+    def __init__(self, arrow: bool = False):
+        """
+        :param arrow: if True, the data of interest is a pyarrow.Table instead of a list of
+            lines, where the first line of the CSV holds the column names. This requires the
+            optional package pyarrow
+        """
+        self.arrow = arrow
+        if arrow:
+            import_optional("pyarrow", extra="arrow")
+
     def _check_content(self):
-        content_type = self._headers_lowercase.get("content-type", "unknown")
+        content_type = self.headers.get("content-type", "unknown")
         if "text/csv" not in content_type:
             raise TypeError(f"the REST response did not give a CSV but a {content_type}")
 
     def _parse(self) -> List[List[str]]:
         """ processes a raw CSV into lines. For very large content this may be better served by a generator
         """
+        if self.arrow:
+            pyarrow_csv = import_optional("pyarrow.csv", extra="arrow")
+            self.data = pyarrow_csv.read_csv(_arrow_source(self))
+            return
+
+        if self._stream:
+            self.data = _split_lines(self._open_text())
+            return
+
         content = self._response.content
         self.raw = content.decode("UTF-8")
 
         lines = self.raw.strip().split("\n")
         self.data = [line.split(",") for line in lines]
+
+
+class ArrowResponse(Response):
+    """Wrap a REST response in the Apache Arrow IPC stream or file format, or in Parquet.
+
+    The data of interest is an iterator over the pyarrow.RecordBatch instances
+    in the response, or a pyarrow.Table that holds all of them. The batches of
+    an IPC stream are read from the network one at a time, so when they are
+    consumed one at a time, memory use is bounded by the size of a batch. The
+    IPC file format and Parquet require access to the complete body, which the
+    batches reference without copying it.
+
+    This class requires the optional package pyarrow.
+
+    """
+
+    streaming = True
+
+    def __init__(self, as_table: bool = False):
+        """
+        :param as_table: if True, the data of interest is a pyarrow.Table with all record
+            batches instead of an iterator over the batches
+        """
+        self.as_table = as_table
+        self._pyarrow = import_optional("pyarrow", extra="arrow")
+
+    def _check_content(self):
+        content_type = self.headers.get("content-type", "unknown")
+        if "vnd.apache.arrow" not in content_type and "parquet" not in content_type:
+            raise TypeError(f"the REST response did not give Arrow data but a {content_type}")
+
+    def _parse(self):
+        content_type = self.headers["content-type"]
+        if "parquet" in content_type:
+            parquet = import_optional("pyarrow.parquet", extra="arrow")
+            reader = parquet.ParquetFile(_arrow_source(self, random_access=True))
+            batches = reader.iter_batches()
+            read_all = reader.read
+        elif "vnd.apache.arrow.file" in content_type:
+            reader = self._pyarrow.ipc.open_file(_arrow_source(self, random_access=True))
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+            read_all = reader.read_all
+        else:
+            reader = self._pyarrow.ipc.open_stream(_arrow_source(self))
+            batches = iter(reader)
+            read_all = reader.read_all
+
+        self.data = read_all() if self.as_table else batches
+
+
+# =================================================================================================
+def _arrow_source(response: Response, random_access: bool = False):
+    """Return a pyarrow input for the body of the given response.
+
+    A response that has not been read yet is read while pyarrow consumes it,
+    unless random access is required. A body in memory is wrapped without
+    copying it.
+
+    """
+    pyarrow = import_optional("pyarrow", extra="arrow")
+    if response._stream and not random_access:
+        return response._open_body()
+    return pyarrow.BufferReader(pyarrow.py_buffer(response._response.content))
+
+
+def _charset(content_type: str) -> Optional[str]:
+    """Return the charset parameter of the given Content-Type header value, if any."""
+    for parameter in content_type.split(";")[1:]:
+        name, _, value = parameter.partition("=")
+        if name.strip().lower() == "charset":
+            return value.strip().strip("\"'") or None
+    return None
+
+
+def _split_lines(text: io.TextIOWrapper) -> List[List[str]]:
+    """Return the comma-separated values of each line of the given text.
+
+    Leading and trailing empty lines are skipped, which is how CSVResponse
+    processes a body that it has read in full.
+
+    """
+    rows = []
+    blank_lines = []
+    for line in text:
+        line = line.rstrip("\n")
+        if not line.strip():
+            blank_lines.append(line)
+            continue
+        if rows:
+            rows.extend(blank_line.split(",") for blank_line in blank_lines)
+        blank_lines = []
+        rows.append(line.split(","))
+    return rows
+
+
+class _ChunkReader(io.RawIOBase):
+    """Read-only binary stream over an iterator of chunks of bytes."""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._chunk = memoryview(b"")
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._chunk:
+            try:
+                self._chunk = memoryview(next(self._chunks))
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._chunk))
+        buffer[:size] = self._chunk[:size]
+        self._chunk = self._chunk[size:]
+        self.bytes_read += size
+        return size
@@ -0,0 +1,212 @@
+"""This module contains the integration of qrest with distributed tracing.
+
+Tracing is disabled until a tracer is set::
+
+  from qrest import tracing
+
+  tracing.set_tracer(tracing.OpenTelemetryTracer())
+
+From then on, each call of a resource opens a span that is named after the
+resource, with child spans ``http`` for the request and ``parse`` for the
+parsing of the response. The authentication module runs in a child span
+``auth`` of the ``http`` span. The W3C trace context of the ``http`` span is
+sent in header ``traceparent``, so the server can continue the trace.
+
+Without a tracer, the resource only checks that no tracer is set.
+
+OpenTelemetryTracer requires the opentelemetry-api package, which you can
+install using ``pip install qrest[opentelemetry]``. InMemoryTracer keeps the
+finished spans in a list, which is useful in tests.
+
+"""
+
+import random
+import time
+from typing import List, Optional
+
+tracer = None
+"""the Tracer of all resources, or None when tracing is disabled"""
+
+
+def set_tracer(new_tracer: Optional["Tracer"]):
+    """Set the Tracer of all resources, or disable tracing when it is None."""
+    global tracer
+    tracer = new_tracer
+
+
+# ================================================================================================
+class Span:
+    """A unit of work in a trace.
+
+    A span is a context manager that ends the span on exit and records the
+    exception when the block raises one.
+
+    """
+
+    def start_child(self, name: str) -> "Span":
+        """Return a new span that is a child of this span."""
+        raise NotImplementedError
+
+    def set_attribute(self, key: str, value):
+        """Set the given attribute of this span."""
+        raise NotImplementedError
+
+    def record_exception(self, exception: BaseException):
+        """Mark this span as failed because of the given exception."""
+        raise NotImplementedError
+
+    def end(self):
+        """Finish this span."""
+        raise NotImplementedError
+
+    @property
+    def traceparent(self) -> str:
+        """Return the W3C traceparent header value that identifies this span."""
+        raise NotImplementedError
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_value is not None:
+            self.record_exception(exc_value)
+        self.end()
+
+
+class Tracer:
+    """Starts the span of each call of a resource."""
+
+    def start_span(self, name: str) -> Span:
+        """Return a new span that is a child of the current span of the caller, if any."""
+        raise NotImplementedError
+
+
+class _NoSpan:
+    """The context manager that takes the place of a child span when tracing is disabled."""
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+def child_span(parent: Optional[Span], name: str):
+    """Return a child span of the given parent span, or a no-op if the parent is None."""
+    return _NO_SPAN if parent is None else parent.start_child(name)
+
+
+def inject(headers: dict, span: Optional[Span]) -> dict:
+    """Return the given headers with the traceparent header of the given span, if any."""
+    if span is None:
+        return headers
+    return dict(headers, traceparent=span.traceparent)
+
+
+# ================================================================================================
+class InMemorySpan(Span):
+    """A span that is kept in memory by its InMemoryTracer."""
+
+    def __init__(self, tracer: "InMemoryTracer", name: str, parent: Optional["InMemorySpan"]):
+        self.tracer = tracer
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else random.getrandbits(128)
+        self.span_id = random.getrandbits(64)
+        self.attributes = {}
+        self.exception: Optional[BaseException] = None
+        self.start_time = time.perf_counter()
+        self.end_time: Optional[float] = None
+
+    def start_child(self, name: str) -> "InMemorySpan":
+        return InMemorySpan(self.tracer, name, self)
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exception: BaseException):
+        self.exception = exception
+
+    def end(self):
+        if self.end_time is None:
+            self.end_time = time.perf_counter()
+            self.tracer.spans.append(self)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id:032x}-{self.span_id:016x}-01"
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Return the duration of the span in seconds, or None if it has not ended."""
+        return None if self.end_time is None else self.end_time - self.start_time
+
+    def __repr__(self):
+        return f"InMemorySpan({self.name!r}, span_id={self.span_id:016x})"
+
+
+class InMemoryTracer(Tracer):
+    """A tracer that keeps its finished spans in memory."""
+
+    def __init__(self):
+        self.spans: List[InMemorySpan] = []
+        """the spans in the order in which they ended"""
+
+    def start_span(self, name: str) -> InMemorySpan:
+        return InMemorySpan(self, name, None)
+
+    def clear(self):
+        """Forget the finished spans."""
+        self.spans.clear()
+
+
+# ================================================================================================
+class _OpenTelemetrySpan(Span):
+    def __init__(self, tracer, span):
+        self._tracer = tracer
+        self._span = span
+
+    def start_child(self, name: str) -> "_OpenTelemetrySpan":
+        from opentelemetry import trace
+
+        context = trace.set_span_in_context(self._span)
+        return _OpenTelemetrySpan(self._tracer, self._tracer.start_span(name, context=context))
+
+    def set_attribute(self, key: str, value):
+        self._span.set_attribute(key, value)
+
+    def record_exception(self, exception: BaseException):
+        from opentelemetry.trace import Status, StatusCode
+
+        self._span.record_exception(exception)
+        self._span.set_status(Status(StatusCode.ERROR, str(exception)))
+
+    def end(self):
+        self._span.end()
+
+    @property
+    def traceparent(self) -> str:
+        context = self._span.get_span_context()
+        return f"00-{context.trace_id:032x}-{context.span_id:016x}-{context.trace_flags:02x}"
+
+
+class OpenTelemetryTracer(Tracer):
+    """A tracer that reports the spans to OpenTelemetry."""
+
+    def __init__(self, otel_tracer=None):
+        """Initialize the tracer.
+
+        :param otel_tracer: the OpenTelemetry tracer to use. If None, the tracer named "qrest"
+            of the global tracer provider is used
+        """
+        if otel_tracer is None:
+            from opentelemetry import trace
+
+            otel_tracer = trace.get_tracer("qrest")
+        self._tracer = otel_tracer
+
+    def start_span(self, name: str) -> Span:
+        return _OpenTelemetrySpan(self._tracer, self._tracer.start_span(name))
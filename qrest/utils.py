@@ -1,13 +1,68 @@
 """ Contains a set of related and unrelated functions and classes used elsewhere in this module
 """
 
+import functools
+import importlib
 import logging
-from urllib.parse import urlparse
+import re
+from typing import List
+from urllib.parse import quote, urljoin, urlparse
 from .exception import RestClientConfigurationError
 
 logger = logging.getLogger(__name__)
 
 
+# ###############################################################
+def import_optional(module_name: str, extra: str):
+    """Import and return a module that qrest only needs for optional functionality.
+
+    :param module_name: the name of the module to import
+    :param extra: the name of the qrest extra that installs the module
+
+    :raises RestClientConfigurationError: when the module is not installed
+    """
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        raise RestClientConfigurationError(
+            f"this functionality requires package '{module_name}', which can be installed "
+            f"using 'pip install qrest[{extra}]'"
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def import_requests():
+    """Return module requests, which is imported the first time this function is called.
+
+    qrest does not import requests when qrest itself is imported, as requests
+    and urllib3 take up most of the import time. The first call also silences
+    the warning urllib3 issues for each request to a server whose SSL
+    certificate is not verified, which APIConfig.verify_ssl allows.
+
+    """
+    import requests
+    from urllib3 import disable_warnings
+    from urllib3.exceptions import InsecureRequestWarning
+
+    disable_warnings(InsecureRequestWarning)
+    return requests
+
+
+def set_header(headers: dict, name: str, value: str, replace: bool = True) -> dict:
+    """Return a copy of the given headers in which header 'name' has the given value.
+
+    Header names are case-insensitive, so an existing header whose name only differs in case
+    is replaced, or kept if replace is False.
+
+    """
+    existing = [key for key in headers if key.lower() == name.lower()]
+    if existing and not replace:
+        return headers
+    result = {key: val for key, val in headers.items() if key not in existing}
+    result[name] = value
+    return result
+
+
 # ###############################################################
 class URLValidator:
     """
@@ -34,3 +89,72 @@ class URLValidator:
             raise RestClientConfigurationError(f"the URL {url} is has no domain indication")
         if require_path and not final_url.path:
             raise RestClientConfigurationError(f"the URL {url} has no valid path")
+
+
+@functools.lru_cache(maxsize=None)
+def _base_directory(server_url: str) -> str:
+    """Return the URL to which urljoin appends a relative path of the given base URL.
+
+    :raises RestClientConfigurationError: when the URL of a path is not valid
+    """
+    example_url = urljoin(base=server_url, url="x")
+    # only allow http or https schemes for the REST API base URL
+    URLValidator(schemes=["http", "https"]).check(example_url)
+    return example_url[:-1]
+
+
+# ###############################################################
+class PathTemplate:
+    """
+    the URL of an endpoint, compiled from the base URL of the server and the path of the endpoint.
+
+    The URL is joined and validated once, after which filling in the path parameters only
+    concatenates the literal parts of the URL and the quoted values of the parameters.
+    """
+
+    __slots__ = ("_literals", "parameters")
+
+    _PARAMETER = re.compile(r"{([^{}]*)}")
+    _SPECIAL = re.compile(r"^/|[:?#]|(^|/)\.\.?(/|$)")
+    """matches the relative URLs that urljoin does not simply append to the base URL"""
+
+    def __init__(self, server_url: str, path: List[str]):
+        """
+        :param server_url: the base server URL (e.g. http://localhost:8080)
+        :param path: the path components of the endpoint, where path parameters are in curly
+            brackets, e.g. ['api', 'v2', 'user', '{name}', 'stats']
+
+        :raises RestClientConfigurationError: when the resulting URL is not valid
+        """
+        relative_url = "/".join(path)
+        if relative_url and not self._SPECIAL.search(relative_url):
+            # joining such a path comes down to appending it to the directory of the base URL,
+            # which only has to be determined and validated once for all endpoints
+            url = _base_directory(server_url) + relative_url
+        else:
+            url = urljoin(base=server_url, url=relative_url)
+            example_url = self._PARAMETER.sub("x", url)
+            # only allow http or https schemes for the REST API base URL
+            URLValidator(schemes=["http", "https"]).check(example_url)
+
+        # the literal parts of the URL are the items at the even indices, the parameter names
+        # the ones at the odd indices
+        parts = self._PARAMETER.split(url)
+        self._literals = parts[0::2]
+        self.parameters = parts[1::2]
+
+    # ------------------------------------------------------------------
+    def format(self, values: dict) -> str:
+        """
+        return the URL in which each path parameter is replaced by its quoted value
+
+        :raises KeyError: when the value of a path parameter is missing
+        """
+        literals = self._literals
+        if len(literals) == 1:
+            return literals[0]
+        pieces = [literals[0]]
+        for name, literal in zip(self.parameters, literals[1:]):
+            pieces.append(quote(str(values[name]), safe=""))
+            pieces.append(literal)
+        return "".join(pieces)
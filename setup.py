@@ -64,19 +64,18 @@ setup(
         # Specify the Python versions you support here. In particular, ensure
         # that you indicate whether you support Python 2, Python 3 or both.
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
     ],
     # What does your project relate to?
     keywords="generic REST API client",
     # You can just specify the packages manually here if your project is
     # simple. Or you can use find_packages().
-    packages=find_packages(exclude=["docs", "test"]),
+    packages=find_packages(exclude=["docs", "test", "benchmark"]),
     # Alternatively, if you want to distribute just a my_module.py, uncomment
     # this:
     # py_modules=["rest_client"],
-    # qrest requires at least Python 3.6 (as it uses f-strings)
-    python_requires="~=3.6",
+    # qrest requires at least Python 3.7 (as it uses module __getattr__)
+    python_requires="~=3.7",
     # List run-time dependencies here.  These will be installed by pip when
     # your project is installed. For an analysis of "install_requires" vs pip's
     # requirements files see:
@@ -86,5 +85,18 @@ setup(
     # dependencies). You can install these using the following syntax,
     # for example:
     # $ pip install -e .[dev,test]
-    extras_require={"dev": ["Sphinx"], "test": ["requests-mock"]},
+    extras_require={
+        "dev": ["Sphinx"],
+        "test": ["requests-mock"],
+        "brotli": ["brotli"],
+        "msgpack": ["msgpack"],
+        "cbor": ["cbor2"],
+        "arrow": ["pyarrow"],
+        "openapi": ["PyYAML"],
+        "opentelemetry": ["opentelemetry-api"],
+    },
+    # To provide executable scripts, use entry points in preference to the
+    # "scripts" keyword. Entry points provide cross-platform support and allow
+    # pip to create the appropriate form of executable for the target platform.
+    entry_points={"console_scripts": ["qrest-bench = qrest.loadgen:main"]},
 )
@@ -0,0 +1 @@
+"""Configuration of the JSONPlaceholder API that is split across several submodules."""
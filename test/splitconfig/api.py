@@ -0,0 +1,5 @@
+from qrest import APIConfig
+
+
+class JsonPlaceHolderConfig(APIConfig):
+    url = "https://jsonplaceholder.typicode.com"
@@ -0,0 +1,7 @@
+from qrest import ResourceConfig
+
+
+class AllComments(ResourceConfig):
+    name = "all_comments"
+    path = ["comments"]
+    method = "GET"
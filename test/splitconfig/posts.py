@@ -0,0 +1,9 @@
+from qrest import ResourceConfig
+
+from .api import JsonPlaceHolderConfig  # noqa: F401
+
+
+class AllPosts(ResourceConfig):
+    name = "all_posts"
+    path = ["posts"]
+    method = "GET"
@@ -0,0 +1,193 @@
+import sys
+import threading
+import unittest
+import unittest.mock as mock
+
+import requests
+
+import qrest
+from qrest import APIConfig, BodyParameter, ResourceConfig
+from qrest.balancer import BalancingConfig, LoadBalancer, Policy
+from qrest.exception import RestClientConfigurationError, RestInternalServerError
+from qrest.hedging import HedgingConfig
+
+from .test_instrumentation import _mock_response
+
+REPLICAS = ["http://replica0.example.com/api/", "http://replica1.example.com/api/"]
+
+
+class ReplicatedConfig(APIConfig):
+    url = REPLICAS
+    balancing = BalancingConfig(max_failures=2, ejection_time=60.0)
+
+
+class AllPosts(ResourceConfig):
+    name = "all_posts"
+    path = ["posts"]
+    method = "GET"
+
+
+class HedgedPosts(ResourceConfig):
+    name = "hedged_posts"
+    path = ["posts"]
+    method = "GET"
+    hedging = HedgingConfig(delay=0.01, budget=1.0)
+
+
+class CreatePost(ResourceConfig):
+    name = "create_post"
+    path = ["posts"]
+    method = "POST"
+
+    title = BodyParameter(name="title", required=True)
+
+
+class LoadBalancingTests(unittest.TestCase):
+    def setUp(self):
+        self.api = qrest.API(sys.modules[__name__])
+        self.urls = []
+        self.failing = set()
+        self.connection_errors = False
+        self.slow = set()
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def request(self, url, **kwargs):
+        self.urls.append(url)
+        replica = url.split("/")[2]
+        if replica in self.slow:
+            self.release.wait(5)
+        if replica in self.failing:
+            if self.connection_errors:
+                raise requests.ConnectionError(replica)
+            return _mock_response(500)
+        return _mock_response()
+
+    def call(self, resource, count=1, **kwargs):
+        with mock.patch("requests.request", side_effect=self.request):
+            return [resource.get_response(**kwargs) for _ in range(count)]
+
+    def test_round_robin(self):
+        self.call(self.api.all_posts, count=3)
+
+        self.assertEqual(
+            [
+                "http://replica0.example.com/api/posts",
+                "http://replica1.example.com/api/posts",
+                "http://replica0.example.com/api/posts",
+            ],
+            self.urls,
+        )
+
+    def test_retry_on_another_replica(self):
+        self.failing.add("replica0.example.com")
+
+        (response,) = self.call(self.api.all_posts)
+
+        self.assertEqual(1, response.timing.retries)
+        self.assertEqual("http://replica1.example.com/api/posts", response.timing.url)
+        self.assertEqual(["replica0", "replica1"], [u.split("/")[2][:8] for u in self.urls])
+
+    def test_retry_after_connection_error(self):
+        self.failing.add("replica0.example.com")
+        self.connection_errors = True
+
+        (response,) = self.call(self.api.all_posts)
+
+        self.assertEqual(1, response.timing.retries)
+
+    def test_post_is_not_retried(self):
+        self.failing.add("replica0.example.com")
+
+        with self.assertRaises(RestInternalServerError):
+            self.call(self.api.create_post, title="foo")
+        self.assertEqual(1, len(self.urls))
+
+    def test_url_of_winning_hedged_request(self):
+        self.slow.add("replica0.example.com")
+
+        (response,) = self.call(self.api.hedged_posts)
+
+        self.assertTrue(response.timing.hedge_won)
+        self.assertEqual("http://replica1.example.com/api/posts", response.timing.url)
+
+    def test_failing_replica_is_ejected(self):
+        self.failing.add("replica0.example.com")
+
+        self.call(self.api.all_posts, count=4)
+
+        # the second failure ejects replica0, after which only replica1 is used
+        replicas = [url.split("/")[2][:8] for url in self.urls]
+        self.assertEqual(["replica0", "replica1"] * 2 + ["replica1"] * 2, replicas)
+
+
+class PolicyTests(unittest.TestCase):
+    def test_least_outstanding(self):
+        balancer = LoadBalancer(REPLICAS, BalancingConfig(policy="least_outstanding"))
+
+        first = balancer.acquire()
+        second = balancer.acquire()
+        self.assertNotEqual(first, second)
+        balancer.release(second, 0.01, failed=False)
+        self.assertIs(second, balancer.acquire())
+
+    def test_ewma(self):
+        balancer = LoadBalancer(REPLICAS, BalancingConfig(policy="ewma", decay=0.5))
+        fast, slow = balancer.replicas
+
+        for replica, latency in [(fast, 0.01), (slow, 0.1), (slow, 0.3)]:
+            replica.outstanding += 1
+            balancer.release(replica, latency, failed=False)
+
+        self.assertEqual(0.2, slow.latency)
+        self.assertEqual([fast] * 3, [balancer.acquire() for _ in range(3)])
+        # the expected latency of the fast replica is now 4 * 0.01, still less than 0.2
+        self.assertIs(fast, balancer.acquire())
+
+    def test_unexpected_error_releases_replica(self):
+        balancer = LoadBalancer(REPLICAS)
+        error = requests.exceptions.InvalidURL("invalid")
+
+        with self.assertRaises(requests.exceptions.InvalidURL):
+            balancer.send(mock.Mock(side_effect=error), idempotent=True)
+
+        replica = balancer.replicas[0]
+        self.assertEqual(0, replica.outstanding)
+        self.assertEqual(1, replica.failures)
+
+    def test_custom_policy(self):
+        class Last(Policy):
+            def select(self, replicas):
+                return replicas[-1]
+
+        balancer = LoadBalancer(REPLICAS, BalancingConfig(policy=Last()))
+
+        self.assertEqual(REPLICAS[1], balancer.acquire().url)
+
+    def test_all_replicas_ejected(self):
+        balancer = LoadBalancer(REPLICAS, BalancingConfig(max_failures=1))
+        for replica in balancer.replicas:
+            replica.outstanding += 1
+            balancer.release(replica, 0.01, failed=True)
+
+        self.assertIn(balancer.acquire(), balancer.replicas)
+
+
+class ConfigurationTests(unittest.TestCase):
+    def test_invalid_balancing(self):
+        for kwargs in [{"policy": "random"}, {"max_failures": 0}, {"retries": -1}, {"decay": 0}]:
+            with self.subTest(**kwargs):
+                with self.assertRaises(RestClientConfigurationError):
+                    BalancingConfig(**kwargs).validate()
+
+    def test_invalid_url_list(self):
+        with mock.patch.object(ReplicatedConfig, "url", [REPLICAS[0], 1]):
+            with self.assertRaises(RestClientConfigurationError):
+                qrest.API(sys.modules[__name__])
+
+    def test_single_url_has_no_balancer(self):
+        with mock.patch.object(ReplicatedConfig, "url", REPLICAS[0]):
+            api = qrest.API(sys.modules[__name__])
+
+        self.assertIsNone(api.balancer)
+        self.assertIsNone(api.all_posts.balancer)
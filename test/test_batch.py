@@ -0,0 +1,216 @@
+import asyncio
+import sys
+import unittest
+import unittest.mock as mock
+
+import qrest
+from qrest import APIConfig, QueryParameter, ResourceConfig, cassette
+from qrest.batch import MicroBatcher, RequestCollapser, request_scope
+from qrest.exception import (
+    RestClientConfigurationError,
+    RestClientQueryError,
+    RestClientResourceError,
+    RestResourceNotFoundError,
+)
+from qrest.metrics import MetricsRegistry
+
+from .test_instrumentation import _mock_response
+
+
+class UsersConfig(APIConfig):
+    url = "https://users.example.com"
+
+
+class Users(ResourceConfig):
+    name = "users"
+    path = ["users"]
+    method = "GET"
+
+    ids = QueryParameter(name="id", multiple=True)
+    active = QueryParameter(name="active")
+
+
+class RequestCollapserTests(unittest.TestCase):
+    def setUp(self):
+        self.api = qrest.API(sys.modules[__name__])
+        self.requested = []
+
+    def request(self, **kwargs):
+        ids = kwargs["params"]["id"]
+        self.requested.append(ids)
+        if isinstance(ids, str):
+            ids = ids.split(",")
+        response = _mock_response()
+        response.json.return_value = [{"id": int(i), "name": f"user {i}"} for i in ids if i != 4]
+        return response
+
+    def call_many(self, calls, **kwargs):
+        collapser = RequestCollapser(self.api.users, parameter="ids", key="id", **kwargs)
+        with mock.patch("requests.request", side_effect=self.request):
+            return collapser.call_many(calls)
+
+    def test_collapse(self):
+        results = self.call_many([{"ids": 1}, {"ids": 2}, {"ids": "3"}, {"ids": 1}])
+
+        self.assertEqual([[1, 2, "3"]], self.requested)
+        self.assertEqual(["user 1", "user 2", "user 3", "user 1"], [r["name"] for r in results])
+
+    def test_missing_record(self):
+        self.assertEqual([None], self.call_many([{"ids": 4}]))
+
+    def test_calls_with_other_arguments_are_not_collapsed(self):
+        results = self.call_many([{"ids": 1, "active": True}, {"ids": 2}, {"ids": 3}])
+
+        self.assertEqual([[1], [2, 3]], self.requested)
+        self.assertEqual([1, 2, 3], [r["id"] for r in results])
+
+    def test_max_ids(self):
+        self.call_many([{"ids": i} for i in range(5)], max_ids=2)
+
+        self.assertEqual([[0, 1], [2, 3], [4]], self.requested)
+
+    def test_max_url_length(self):
+        # each id after the first adds "&id=<i>" to the URL
+        base = len("https://users.example.com/users?id=0")
+        self.call_many([{"ids": i} for i in range(5)], max_url_length=base + 2 * 5)
+
+        self.assertEqual([[0, 1, 2], [3, 4]], self.requested)
+
+    def test_delimiter(self):
+        calls = [{"ids": i} for i in range(1, 4)]
+        results = self.call_many(calls, delimiter=",")
+
+        self.assertEqual(["1,2,3"], self.requested)
+        self.assertEqual([1, 2, 3], [r["id"] for r in results])
+
+    def test_no_single_id(self):
+        for item_id in ([1, 2], None, True):
+            with self.subTest(item_id=item_id):
+                with self.assertRaises(RestClientQueryError):
+                    self.call_many([{"ids": item_id}])
+
+    def test_url_length_leaves_resource_data_alone(self):
+        self.api.users.check(ids=[7])
+        base = len("https://users.example.com/users?id=0")
+        collapser = RequestCollapser(
+            self.api.users, parameter="ids", key="id", max_url_length=base + 5
+        )
+
+        self.assertEqual([[0, 1], [2, 3], [4]], list(collapser._chunks({}, list(range(5)))))
+        self.assertEqual({"ids": [7]}, self.api.users.cleaned_data)
+
+    def test_response_without_records(self):
+        collapser = RequestCollapser(self.api.users, parameter="ids", key="user_id")
+        with mock.patch("requests.request", side_effect=self.request):
+            with self.assertRaises(RestClientResourceError):
+                collapser.call_many([{"ids": 1}])
+
+    def test_parameter_is_not_multiple(self):
+        with self.assertRaises(RestClientConfigurationError):
+            RequestCollapser(self.api.users, parameter="active", key="id")
+        with self.assertRaises(RestClientConfigurationError):
+            RequestCollapser(self.api.users, parameter="ids", key="id", max_ids=0)
+
+
+class MicroBatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.api = qrest.API(sys.modules[__name__])
+        self.collapser = RequestCollapser(self.api.users, parameter="ids", key="id")
+        self.requested = []
+        patcher = mock.patch("requests.request", side_effect=self.request)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def request(self, **kwargs):
+        ids = kwargs["params"]["id"]
+        self.requested.append(ids)
+        response = _mock_response(404 if 0 in ids else 200)
+        response.json.return_value = [{"id": i} for i in ids]
+        return response
+
+    def test_calls_within_window(self):
+        batcher = MicroBatcher(self.collapser, window=0.05)
+        futures = [batcher.submit(ids=i) for i in (1, 2, 3)]
+
+        self.assertEqual([{"id": 1}, {"id": 2}, {"id": 3}], [f.result(1) for f in futures])
+        self.assertEqual([[1, 2, 3]], self.requested)
+
+    def test_max_batch(self):
+        batcher = MicroBatcher(self.collapser, window=10, max_batch=2)
+        futures = [batcher.submit(ids=i) for i in (1, 2, 3)]
+
+        self.assertEqual({"id": 2}, futures[1].result(1))
+        self.assertFalse(futures[2].done())
+        batcher.flush()
+        self.assertEqual({"id": 3}, futures[2].result())
+        self.assertEqual([[1, 2], [3]], self.requested)
+
+    def test_asyncio(self):
+        batcher = MicroBatcher(self.collapser, window=0.01)
+
+        async def load():
+            return await asyncio.gather(batcher.load_async(ids=1), batcher.load_async(ids=2))
+
+        self.assertEqual([{"id": 1}, {"id": 2}], asyncio.run(load()))
+        self.assertEqual([[1, 2]], self.requested)
+
+    def test_request_scope(self):
+        metrics = MetricsRegistry()
+        batcher = MicroBatcher(self.collapser, window=0.01, metrics=metrics)
+
+        with request_scope():
+            self.assertEqual({"id": 1}, batcher.load(ids=1))
+            self.assertEqual({"id": 1}, batcher.load(ids=1))
+        self.assertEqual({"id": 1}, batcher.load(ids=1))
+
+        self.assertEqual([[1], [1]], self.requested)
+        self.assertEqual(1, metrics.snapshot()["users"]["cache_hits"])
+
+    def test_error_is_set_on_each_future(self):
+        batcher = MicroBatcher(self.collapser, window=10)
+        futures = [batcher.submit(ids=i) for i in (0, 1)]
+        batcher.flush()
+
+        for future in futures:
+            self.assertIsInstance(future.exception(), RestResourceNotFoundError)
+
+    def test_error_is_only_set_on_futures_of_failing_request(self):
+        collapser = RequestCollapser(self.api.users, parameter="ids", key="id", max_ids=2)
+        batcher = MicroBatcher(collapser, window=10, max_batch=10)
+        futures = [batcher.submit(ids=i) for i in (0, 1, 2)]
+        futures.append(batcher.submit(ids=3, active=True))
+        futures.append(batcher.submit(ids=[4, 5]))
+        batcher.flush()
+
+        self.assertEqual([[0, 1], [2], [3]], self.requested)
+        for future in futures[:2]:
+            self.assertIsInstance(future.exception(), RestResourceNotFoundError)
+        self.assertEqual([{"id": 2}, {"id": 3}], [f.result() for f in futures[2:4]])
+        self.assertIsInstance(futures[4].exception(), RestClientQueryError)
+
+    def test_request_scope_forgets_failed_calls(self):
+        batcher = MicroBatcher(self.collapser, window=0.01)
+
+        with request_scope():
+            for _ in range(2):
+                with self.assertRaises(RestResourceNotFoundError):
+                    batcher.load(ids=0)
+
+        self.assertEqual([[0], [0]], self.requested)
+
+    def test_batch_is_sent_with_cassette_in_use(self):
+        batcher = MicroBatcher(self.collapser, window=0.01)
+        replay = mock.Mock()
+        replay.request.side_effect = self.request
+
+        token = cassette.active.set(replay)
+        try:
+            self.assertEqual({"id": 1}, batcher.load(ids=1))
+        finally:
+            cassette.active.reset(token)
+
+        self.assertEqual(1, replay.request.call_count)
+
+    def test_invalid_window(self):
+        with self.assertRaises(RestClientConfigurationError):
+            MicroBatcher(self.collapser, window=-1)
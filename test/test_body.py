@@ -0,0 +1,194 @@
+import importlib.util
+import inspect
+import io
+import mmap
+import tempfile
+import unittest
+import unittest.mock as mock
+
+import requests
+
+import qrest
+from qrest import APIConfig, BodyParameter, ResourceConfig
+from qrest.body import encode_body
+from qrest.exception import RestClientConfigurationError
+
+
+class BulkUploadConfig(APIConfig):
+    url = "http://localhost"
+    default_headers = {"Content-type": "application/json; charset=UTF-8"}
+
+
+class UploadRecords(ResourceConfig):
+    name = "upload_records"
+    path = ["records"]
+    method = "POST"
+
+    records = BodyParameter(name=None, required=True)
+
+
+class UploadLines(ResourceConfig):
+    name = "upload_lines"
+    path = ["lines"]
+    method = "POST"
+
+    records = BodyParameter(name=None, required=True, encoding="ndjson")
+
+
+def _records(count):
+    return ({"id": i, "title": f"record {i}"} for i in range(count))
+
+
+class EncodeBodyTests(unittest.TestCase):
+    def test_let_requests_serialize_a_dictionary(self):
+        self.assertEqual({"json": {"a": 1}}, encode_body({"a": 1}))
+
+    def test_stream_an_iterator_as_json_array(self):
+        data = encode_body(_records(3))["data"]
+
+        self.assertEqual(
+            b'[{"id": 0, "title": "record 0"},{"id": 1, "title": "record 1"},'
+            b'{"id": 2, "title": "record 2"}]',
+            b"".join(data),
+        )
+
+    def test_stream_an_empty_iterator_as_empty_json_array(self):
+        self.assertEqual(b"[]", b"".join(encode_body(iter([]))["data"]))
+
+    def test_stream_an_iterator_as_ndjson(self):
+        data = encode_body(_records(2), encoding="ndjson")["data"]
+
+        self.assertEqual(
+            b'{"id": 0, "title": "record 0"}\n{"id": 1, "title": "record 1"}\n', b"".join(data)
+        )
+
+    def test_stream_an_iterator_in_large_chunks(self):
+        chunks = list(encode_body(_records(10000), encoding="ndjson")["data"])
+
+        self.assertLess(len(chunks), 10)
+        self.assertEqual(10000, b"".join(chunks).count(b"\n"))
+
+    def test_encode_a_list_as_ndjson(self):
+        data = encode_body([{"a": 1}, {"a": 2}], encoding="ndjson")["data"]
+
+        self.assertEqual(b'{"a": 1}\n{"a": 2}\n', data)
+
+    def test_pass_a_file_like_object_as_is(self):
+        body = io.BytesIO(b"[1, 2, 3]")
+        self.assertIs(body, encode_body(body)["data"])
+
+    def test_pass_an_mmap_without_copying(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(b"[1, 2, 3]")
+            f.flush()
+            with mmap.mmap(f.fileno(), 0) as body:
+                data = encode_body(body)["data"]
+
+                self.assertIsInstance(data, memoryview)
+                self.assertEqual(b"[1, 2, 3]", data.tobytes())
+                data.release()
+
+    def test_raise_proper_exception_for_unknown_encoding(self):
+        with self.assertRaisesRegex(RestClientConfigurationError, "encoding must be one of"):
+            encode_body({}, encoding="xml")
+
+
+@unittest.skipUnless(importlib.util.find_spec("msgpack"), "requires msgpack")
+class MsgPackBodyTests(unittest.TestCase):
+    def test_encode_a_dictionary(self):
+        import msgpack
+
+        data = encode_body({"a": 1}, encoding="msgpack")["data"]
+
+        self.assertEqual({"a": 1}, msgpack.unpackb(data))
+
+    def test_stream_an_iterator_as_concatenated_objects(self):
+        import msgpack
+
+        data = b"".join(encode_body(_records(3), encoding="msgpack")["data"])
+
+        self.assertEqual(list(_records(3)), list(msgpack.Unpacker(io.BytesIO(data))))
+
+
+@unittest.skipUnless(importlib.util.find_spec("cbor2"), "requires cbor2")
+class CBORBodyTests(unittest.TestCase):
+    def test_encode_a_dictionary(self):
+        import cbor2
+
+        data = encode_body({"a": 1}, encoding="cbor")["data"]
+
+        self.assertEqual({"a": 1}, cbor2.loads(data))
+
+    def test_stream_an_iterator_as_indefinite_length_array(self):
+        import cbor2
+
+        data = b"".join(encode_body(_records(3), encoding="cbor")["data"])
+
+        self.assertEqual(list(_records(3)), cbor2.loads(data))
+
+
+class BodyParameterEncodingTests(unittest.TestCase):
+    def test_raise_proper_exception_for_unknown_encoding(self):
+        with self.assertRaisesRegex(RestClientConfigurationError, "encoding must be one of"):
+            BodyParameter(name=None, encoding="xml")
+
+    def test_raise_proper_exception_for_different_encodings(self):
+        parameters = {
+            "a": BodyParameter(name="a"),
+            "b": BodyParameter(name="b", encoding="ndjson"),
+        }
+        with self.assertRaisesRegex(RestClientConfigurationError, "same encoding"):
+            ResourceConfig(path=["records"], method="POST", parameters=parameters)
+
+
+class StreamingUploadTests(unittest.TestCase):
+    def setUp(self):
+        self.api = qrest.API(inspect.getmodule(self))
+
+        self.mock_response = mock.Mock(spec=requests.Response)
+        self.mock_response.status_code = 200
+        self.mock_response.headers = {"Content-type": "application/json"}
+        self.mock_response.json = mock.Mock(return_value={})
+
+    def test_stream_generator_as_json_array(self):
+        with mock.patch("requests.request", return_value=self.mock_response) as mock_request:
+            self.api.upload_records(records=_records(2))
+
+            _, kwargs = mock_request.call_args
+            self.assertNotIn("json", kwargs)
+            self.assertEqual(
+                b'[{"id": 0, "title": "record 0"},{"id": 1, "title": "record 1"}]',
+                b"".join(kwargs["data"]),
+            )
+            self.assertEqual(
+                {"Content-type": "application/json; charset=UTF-8"}, kwargs["headers"]
+            )
+
+    def test_stream_generator_as_ndjson_with_ndjson_content_type(self):
+        with mock.patch("requests.request", return_value=self.mock_response) as mock_request:
+            self.api.upload_lines(records=_records(1))
+
+            _, kwargs = mock_request.call_args
+            self.assertEqual(b'{"id": 0, "title": "record 0"}\n', b"".join(kwargs["data"]))
+            self.assertEqual({"Content-Type": "application/x-ndjson"}, kwargs["headers"])
+
+    def test_close_mmap_after_the_call(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(b"[1, 2, 3]")
+            f.flush()
+            for outcome in (self.mock_response, requests.ConnectionError("refused")):
+                body = mmap.mmap(f.fileno(), 0)
+                with mock.patch("requests.request", side_effect=[outcome]):
+                    try:
+                        self.api.upload_records(records=body)
+                    except requests.ConnectionError:
+                        pass
+
+                body.close()
+
+    def test_let_requests_serialize_a_dictionary(self):
+        with mock.patch("requests.request", return_value=self.mock_response) as mock_request:
+            self.api.upload_records(records={"id": 0})
+
+            _, kwargs = mock_request.call_args
+            self.assertEqual({"id": 0}, kwargs["json"])
@@ -0,0 +1,151 @@
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import unittest
+import unittest.mock as mock
+
+import qrest
+from qrest import BodyParameter, ResourceConfig
+from qrest.cache import CACHE_VERSION
+
+from . import jsonplaceholderconfig
+
+_MODULE = '''
+from qrest import APIConfig, JSONResource, QueryParameter, ResourceConfig
+
+
+class Config(APIConfig):
+    url = "http://localhost"
+
+
+class Items(ResourceConfig):
+    name = "items"
+    path = ["items"]
+    method = "GET"
+    description = "{description}"
+    processor = JSONResource(extract_section=["items"])
+
+    page = QueryParameter(name="page")
+'''
+
+
+class APICacheTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.cache_path = os.path.join(directory.name, "api-cache.json")
+
+    def _read_cache(self):
+        with open(self.cache_path) as f:
+            return json.load(f)
+
+    def test_write_cache_on_first_creation(self):
+        qrest.API(jsonplaceholderconfig, cache_path=self.cache_path)
+
+        cache = self._read_cache()
+        self.assertEqual(CACHE_VERSION, cache["version"])
+        entry = cache["endpoints"]["create_post"]
+        self.assertEqual("test.jsonplaceholderconfig:CreatePost", entry["class"])
+        self.assertEqual(["description"], entry["attributes"])
+        self.assertEqual(["content", "title", "user_id"], list(entry["parameters"]))
+
+    def _load_module(self, description: str):
+        """Write a configuration module with the given endpoint description and import it."""
+        path = os.path.join(self.directory, "cachedconfig.py")
+        with open(path, "w") as f:
+            f.write(_MODULE.format(description=description))
+        spec = importlib.util.spec_from_file_location("cachedconfig", path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["cachedconfig"] = module
+        self.addCleanup(sys.modules.pop, "cachedconfig", None)
+        spec.loader.exec_module(module)
+        return module
+
+    def test_restore_endpoints_without_validation(self):
+        expected = qrest.API(jsonplaceholderconfig, cache_path=self.cache_path)
+
+        with mock.patch.object(ResourceConfig, "validate") as validate:
+            api = qrest.API(jsonplaceholderconfig, cache_path=self.cache_path)
+
+            validate.assert_not_called()
+
+        self.assertEqual(expected.resources, api.resources)
+        restored = api.create_post.config
+        self.assertEqual(expected.create_post.config.headers, restored.headers)
+        expected_parameters = expected.create_post.config.required_parameters
+        self.assertEqual(expected_parameters, restored.required_parameters)
+        self.assertIs(jsonplaceholderconfig.CreatePost.title, restored.parameters["title"])
+
+    def test_restore_endpoints_lazily(self):
+        qrest.API(jsonplaceholderconfig, cache_path=self.cache_path)
+
+        api = qrest.API(jsonplaceholderconfig, lazy=True, cache_path=self.cache_path)
+
+        self.assertFalse(api.config.endpoints.is_created("all_posts"))
+        self.assertEqual(["posts"], api.all_posts.config.path)
+
+    def test_rewrite_cache_when_modules_have_changed(self):
+        qrest.API(jsonplaceholderconfig, cache_path=self.cache_path)
+        cache = self._read_cache()
+        cache["key"] = "out-of-date"
+        cache["endpoints"] = {}
+        with open(self.cache_path, "w") as f:
+            json.dump(cache, f)
+
+        api = qrest.API(jsonplaceholderconfig, cache_path=self.cache_path)
+
+        self.assertIn("all_posts", api.resources)
+        self.assertIn("all_posts", self._read_cache()["endpoints"])
+
+    def test_validate_again_when_module_has_changed(self):
+        qrest.API(self._load_module("first"), cache_path=self.cache_path)
+
+        module = self._load_module("second")
+        with mock.patch.object(ResourceConfig, "validate") as validate:
+            api = qrest.API(module, cache_path=self.cache_path)
+
+        validate.assert_called()
+        self.assertEqual("second", api.items.config.description)
+
+    def test_validate_again_when_imported_parameter_has_changed(self):
+        qrest.API(jsonplaceholderconfig, cache_path=self.cache_path)
+
+        # e.g. a parameter that a configuration module imports from another module
+        title = BodyParameter(name="title", required=False)
+        with mock.patch.object(jsonplaceholderconfig.CreatePost, "title", title):
+            with mock.patch.object(ResourceConfig, "validate") as validate:
+                api = qrest.API(jsonplaceholderconfig, cache_path=self.cache_path)
+
+            validate.assert_called()
+            self.assertIs(title, api.create_post.config.parameters["title"])
+
+    def test_state_of_processor_does_not_change_fingerprint(self):
+        module = self._load_module("items")
+        qrest.API(module, cache_path=self.cache_path)
+
+        # the first API has configured the processor instance of the class
+        with mock.patch.object(ResourceConfig, "validate") as validate:
+            api = qrest.API(module, cache_path=self.cache_path)
+
+        validate.assert_not_called()
+        self.assertIs(module.Items.processor, api.items)
+
+    def test_restore_all_attributes_of_an_endpoint(self):
+        expected = qrest.API(jsonplaceholderconfig, cache_path=self.cache_path)
+
+        api = qrest.API(jsonplaceholderconfig, cache_path=self.cache_path)
+
+        attributes = vars(api.single_post.config).keys()
+        self.assertEqual(vars(expected.single_post.config).keys(), attributes)
+
+    def test_rewrite_invalid_cache(self):
+        with open(self.cache_path, "w") as f:
+            f.write("{")
+
+        api = qrest.API(jsonplaceholderconfig, cache_path=self.cache_path)
+
+        self.assertIn("all_posts", api.resources)
+        self.assertIn("all_posts", self._read_cache()["endpoints"])
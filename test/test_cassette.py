@@ -0,0 +1,149 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+import unittest.mock as mock
+from datetime import timedelta
+
+import requests
+from urllib3.response import HTTPResponse
+
+import qrest
+from qrest import cassette
+from qrest.cassette import Cassette
+from qrest.exception import (
+    RestClientCassetteError,
+    RestClientConfigurationError,
+    RestResourceNotFoundError,
+)
+
+from . import jsonplaceholderconfig
+
+
+def _network_response(body, status=200, headers=None):
+    """Return a streamed requests.Response as the transport returns it."""
+    headers = headers or {"Content-Type": "application/json; charset=utf-8"}
+    response = requests.Response()
+    response.status_code = status
+    response.reason = "OK" if status < 400 else "Not Found"
+    response.url = "https://jsonplaceholder.typicode.com/posts"
+    response.headers = requests.structures.CaseInsensitiveDict(headers)
+    response.elapsed = timedelta(milliseconds=30)
+    response.raw = HTTPResponse(
+        body=io.BytesIO(body), headers=headers, status=status, preload_content=False
+    )
+    return response
+
+
+class CassetteTests(unittest.TestCase):
+    def setUp(self):
+        self.api = qrest.API(jsonplaceholderconfig)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "cassette.zip")
+
+    def record(self, *responses, call=None):
+        with mock.patch("requests.request", side_effect=list(responses)) as mock_request:
+            with Cassette(self.path, mode="record"):
+                for _ in responses:
+                    (call or self.api.all_posts)()
+        return mock_request
+
+    def test_replay_without_network(self):
+        posts = [{"id": 1, "title": "foo"}]
+        mock_request = self.record(_network_response(json.dumps(posts).encode()))
+        self.assertTrue(mock_request.call_args[1]["stream"])
+
+        with mock.patch("requests.request", side_effect=AssertionError("no network")):
+            with Cassette(self.path):
+                response = self.api.all_posts.get_response()
+
+        self.assertEqual(posts, response.data)
+        self.assertEqual(0.03, response.timing.ttfb)
+        self.assertIsNone(cassette.active.get())
+
+    def test_compressed_body_is_stored_as_received(self):
+        body = gzip.compress(b'[{"id": 1}]')
+        headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        self.record(_network_response(body, headers=headers))
+
+        with Cassette(self.path):
+            response = self.api.all_posts.get_response()
+
+        self.assertEqual([{"id": 1}], response.data)
+        self.assertEqual(len(body), response.timing.bytes_in)
+
+    def test_responses_are_replayed_in_order(self):
+        self.record(
+            _network_response(b'[{"id": 1}]'),
+            _network_response(b'[{"id": 2}]'),
+        )
+
+        with Cassette(self.path):
+            self.assertEqual([{"id": 1}], self.api.all_posts())
+            self.assertEqual([{"id": 2}], self.api.all_posts())
+            self.assertEqual([{"id": 2}], self.api.all_posts())
+
+    def test_requests_are_identified_by_url_and_body(self):
+        def create_post():
+            self.api.create_post(title="foo", content="bar")
+
+        self.record(_network_response(b'{"id": 101}', status=201), call=create_post)
+
+        with Cassette(self.path):
+            self.assertEqual({"id": 101}, self.api.create_post(title="foo", content="bar"))
+            with self.assertRaises(RestClientCassetteError):
+                self.api.create_post(title="foo", content="baz")
+            with self.assertRaises(RestClientCassetteError):
+                self.api.single_post(item=1)
+
+    def test_error_status_is_replayed(self):
+        with self.assertRaises(RestResourceNotFoundError):
+            self.record(_network_response(b"{}", status=404))
+
+        with Cassette(self.path):
+            with self.assertRaises(RestResourceNotFoundError):
+                self.api.all_posts()
+
+    def test_emulate_latency(self):
+        self.record(_network_response(b"[]"))
+
+        with mock.patch("time.sleep") as mock_sleep:
+            with Cassette(self.path, emulate_latency=True):
+                self.api.all_posts()
+
+        (duration,), _ = mock_sleep.call_args
+        self.assertGreaterEqual(duration, 0.0)
+
+    def test_nested_cassette_restores_previous_one(self):
+        self.record(_network_response(b'[{"id": 1}]'))
+        other_path = os.path.join(os.path.dirname(self.path), "other.zip")
+
+        with Cassette(self.path) as outer:
+            with Cassette(other_path, mode="record") as inner:
+                self.assertIs(inner, cassette.active.get())
+            self.assertIs(outer, cassette.active.get())
+            self.assertEqual([{"id": 1}], self.api.all_posts())
+        self.assertIsNone(cassette.active.get())
+
+    def test_cassette_is_not_shared_with_other_threads(self):
+        self.record(_network_response(b"[]"))
+        seen = []
+
+        with Cassette(self.path):
+            thread = threading.Thread(target=lambda: seen.append(cassette.active.get()))
+            thread.start()
+            thread.join()
+
+        self.assertEqual([None], seen)
+
+    def test_missing_cassette(self):
+        with self.assertRaises(RestClientCassetteError):
+            Cassette(self.path)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(RestClientConfigurationError):
+            Cassette(self.path, mode="rewind")
@@ -0,0 +1,153 @@
+import gzip
+import io
+import json
+import unittest
+import zlib
+
+import requests
+from requests.packages.urllib3.response import HTTPResponse
+from requests.structures import CaseInsensitiveDict
+
+from qrest import APIConfig, ResourceConfig
+from qrest.compression import CompressionConfig, CompressionStats
+from qrest.exception import RestClientConfigurationError
+from qrest.response import CSVResponse, JSONResponse
+
+
+def _create_streamed_response(body: bytes, content_type: str) -> requests.Response:
+    """Return a requests.Response whose gzipped body has not been read yet."""
+    compressed = gzip.compress(body)
+    headers = {"Content-Type": content_type, "Content-Encoding": "gzip"}
+
+    response = requests.Response()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict(headers)
+    response.raw = HTTPResponse(
+        body=io.BytesIO(compressed), headers=headers, preload_content=False, decode_content=True
+    )
+    return response
+
+
+class CompressionConfigTests(unittest.TestCase):
+    def test_compress_json_body_above_threshold(self):
+        body = {"title": "a" * 2000}
+        stats = CompressionStats()
+
+        arguments, headers = CompressionConfig().apply({"json": body}, {}, stats)
+
+        self.assertEqual(body, json.loads(gzip.decompress(arguments["data"])))
+        self.assertEqual("gzip", headers["Content-Encoding"])
+        self.assertEqual("application/json", headers["Content-Type"])
+        self.assertEqual("gzip, deflate", headers["Accept-Encoding"])
+        self.assertGreater(stats.bytes_saved, 1500)
+
+    def test_do_not_compress_body_below_threshold(self):
+        arguments, headers = CompressionConfig().apply({"json": {"a": 1}}, {}, CompressionStats())
+
+        self.assertEqual(b'{"a": 1}', arguments["data"])
+        self.assertNotIn("Content-Encoding", headers)
+
+    def test_keep_configured_content_type(self):
+        headers = {"content-type": "application/json; charset=UTF-8"}
+        config = CompressionConfig(threshold=0)
+
+        _, headers = config.apply({"json": {"a": 1}}, headers, CompressionStats())
+
+        self.assertEqual("application/json; charset=UTF-8", headers["content-type"])
+        self.assertNotIn("Content-Type", headers)
+
+    def test_compress_streamed_body_with_deflate(self):
+        stats = CompressionStats()
+        config = CompressionConfig(request_encoding="deflate", accept_encoding=None)
+
+        arguments, headers = config.apply({"data": iter([b"[1,", b"2]"])}, {}, stats)
+
+        self.assertEqual(b"[1,2]", zlib.decompress(b"".join(arguments["data"])))
+        self.assertEqual({"Content-Encoding": "deflate"}, headers)
+        self.assertEqual(5, stats.request_original)
+
+    def test_send_file_like_object_as_is(self):
+        body = io.BytesIO(b"[1, 2]")
+
+        arguments, headers = CompressionConfig().apply({"data": body}, {}, CompressionStats())
+
+        self.assertIs(body, arguments["data"])
+        self.assertNotIn("Content-Encoding", headers)
+
+    def test_raise_proper_exception_for_invalid_configuration(self):
+        for kwargs in [
+            {"request_encoding": "zip"},
+            {"threshold": -1},
+            {"accept_encoding": "gzip"},
+            {"accept_encoding": ["zip"]},
+            {"stream_responses": 1},
+        ]:
+            with self.assertRaises(RestClientConfigurationError):
+                CompressionConfig(**kwargs).validate()
+
+    def test_apply_api_default_to_endpoints(self):
+        default = CompressionConfig()
+        own = CompressionConfig(request_encoding=None)
+
+        class Config(APIConfig):
+            url = "http://localhost"
+            compression = default
+
+        config = Config(
+            {
+                "ep1": ResourceConfig(path=["a"], method="GET"),
+                "ep2": ResourceConfig(path=["b"], method="GET", compression=own),
+            }
+        )
+
+        self.assertIs(default, config.endpoints["ep1"].compression)
+        self.assertIs(own, config.endpoints["ep2"].compression)
+
+
+class StreamedResponseTests(unittest.TestCase):
+    def test_parse_json_while_decompressing(self):
+        body = json.dumps({"posts": [{"id": i} for i in range(1000)]}).encode("utf-8")
+        response = _create_streamed_response(body, "application/json")
+
+        result = JSONResponse(extract_section=["posts"])(response, stream=True)
+
+        self.assertEqual([{"id": i} for i in range(1000)], result.fetch())
+        self.assertEqual(len(body), result.bytes_decoded)
+        self.assertLess(result.bytes_received, len(body))
+
+    def test_parse_csv_while_decompressing(self):
+        response = _create_streamed_response(b"\na,b\nc,d\n\n", "text/csv")
+
+        result = CSVResponse()(response, stream=True)
+
+        self.assertEqual([["a", "b"], ["c", "d"]], result.fetch())
+        self.assertIsNone(result.raw)
+
+    def test_decode_streamed_text_like_a_body_in_memory(self):
+        body = "naïve,café\n".encode("utf-8")
+        for content_type in ("text/csv", "text/csv; charset=utf-8"):
+            with self.subTest(content_type=content_type):
+                response = _create_streamed_response(body, content_type)
+                # the transport sets this for text/* content types without a charset
+                response.encoding = "ISO-8859-1"
+
+                result = CSVResponse()(response, stream=True)
+
+                self.assertEqual([["naïve", "café"]], result.fetch())
+
+        body = "naïve\n".encode("latin-1")
+        response = _create_streamed_response(body, "text/csv; charset=latin-1")
+        self.assertEqual([["naïve"]], CSVResponse()(response, stream=True).fetch())
+
+    def test_sizes_are_measured_when_parsed(self):
+        body = json.dumps([{"id": i} for i in range(1000)]).encode("utf-8")
+        response = _create_streamed_response(body, "application/json")
+
+        result = JSONResponse()(response, stream=True)
+        result.compression = CompressionStats()
+        result.measure_compression()
+        self.assertEqual(0, result.compression.response_decoded)
+
+        result.fetch()
+        self.assertEqual(len(body), result.compression.response_decoded)
+        self.assertGreater(result.compression.bytes_saved, 0)
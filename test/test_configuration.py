@@ -114,6 +114,61 @@ class TestParameters(unittest.TestCase):
             self.UrlApiConfig(_create_endpoints(parameters=parameters))
 
 
+class TestCompactParameters(unittest.TestCase):
+    def test_share_identical_parameters(self):
+        first = QueryParameter(name="userId", description="the user ID")
+        second = QueryParameter(name="userId", description="the user ID")
+
+        self.assertIs(first, second)
+
+    def test_do_not_share_different_parameters(self):
+        self.assertIsNot(QueryParameter(name="userId"), BodyParameter(name="userId"))
+        self.assertIsNot(
+            QueryParameter(name="page", default=1), QueryParameter(name="page", default=True)
+        )
+        self.assertIsNot(BodyParameter(name=None), BodyParameter(name=None, encoding="ndjson"))
+
+    def test_do_not_share_parameters_with_different_element_types(self):
+        first = QueryParameter(name="x", choices=[1, 2])
+        second = QueryParameter(name="x", choices=[True, 2])
+
+        self.assertIsNot(first, second)
+        self.assertIs(True, second.choices[0])
+        self.assertIsNot(
+            BodyParameter(name="x", default=((1,),)), BodyParameter(name="x", default=((1.0,),))
+        )
+
+    def test_parameters_are_immutable(self):
+        parameter = QueryParameter(name="sort", choices=["a", "b"])
+
+        with self.assertRaises(AttributeError):
+            parameter.default = "a"
+        with self.assertRaises(AttributeError):
+            parameter.extra = "a"
+
+    def test_lists_are_not_shared(self):
+        choices = ["a", "b"]
+        first = QueryParameter(name="sort", choices=choices)
+        choices.append("c")
+
+        self.assertIs(first, QueryParameter(name="sort", choices=("a", "b")))
+        self.assertEqual(("a", "b"), first.choices)
+        parameter = QueryParameter(name="ids", multiple=True, default=[1, 2])
+        self.assertEqual((1, 2), parameter.default)
+
+    def test_parameters_have_no_instance_dictionary(self):
+        self.assertFalse(hasattr(QueryParameter(name="sort"), "__dict__"))
+        self.assertFalse(hasattr(BodyParameter(name="sort"), "__dict__"))
+
+    def test_pickle_parameters(self):
+        import pickle
+
+        parameter = BodyParameter(name="body", required=True, encoding="ndjson")
+        copy = pickle.loads(pickle.dumps(parameter))
+
+        self.assertEqual((True, "ndjson"), (copy.required, copy.encoding))
+
+
 class TestEndpoint(unittest.TestCase):
     def setUp(self):
         class UrlApiConfig(APIConfig):
@@ -320,6 +375,15 @@ class TestMainConfiguration(unittest.TestCase):
 
         Config(_create_endpoints())
 
+    def test_bad_memory_lean(self):
+        with self.assertRaises(RestClientConfigurationError):
+
+            class Config(self.UrlApiConfig):
+                url = "http://localhost"
+                memory_lean = "yes"
+
+            Config(_create_endpoints())
+
     def test_bad_server(self):
         with self.assertRaises(RestClientConfigurationError):
 
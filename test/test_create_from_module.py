@@ -58,6 +58,47 @@ class CreateAPIFromModuleTests(unittest.TestCase):
                 _ = qrest.API(inspect.getmodule(self))
 
 
+class CreateLazyAPIFromModuleTests(unittest.TestCase):
+    def setUp(self):
+        self.api = qrest.API(inspect.getmodule(self), lazy=True)
+
+    def test_do_not_create_resource_before_first_access(self):
+        self.assertNotIn("all_posts", vars(self.api))
+        self.assertFalse(self.api.config.endpoints.is_created("all_posts"))
+        self.assertEqual(["all_posts"], self.api.resources)
+
+    def test_create_resource_on_first_access(self):
+        resource = self.api.all_posts
+
+        self.assertIsInstance(resource, JSONResource)
+        self.assertIs(resource, self.api.all_posts)
+        self.assertIn("all_posts", vars(self.api))
+
+    def test_apply_default_headers_on_first_access(self):
+        self.assertEqual(
+            {"Content-type": "application/json; charset=UTF-8"},
+            self.api.all_posts.config.headers,
+        )
+
+    def test_raise_attribute_error_for_unknown_resource(self):
+        with self.assertRaises(AttributeError):
+            _ = self.api.unknown_posts  # noqa
+
+    def test_raise_proper_exception_on_first_access_of_invalid_resource(self):
+        class InvalidMethod(ResourceConfig):
+            name = "invalid_method"
+            path = ["posts"]
+            method = "DELETE"
+
+        registry = mock.Mock()
+        registry.retrieve.side_effect = [[JsonPlaceHolderConfig], [InvalidMethod]]
+        with mock.patch("qrest.resource.ModuleClassRegistry", return_value=registry):
+            api = qrest.API(inspect.getmodule(self), lazy=True)
+
+        with self.assertRaisesRegex(RestClientConfigurationError, "method must be"):
+            _ = api.invalid_method  # noqa
+
+
 @ddt.ddt
 class ResourceConfigCreateTests(unittest.TestCase):
     def test_pass_required_attributes(self):
@@ -0,0 +1,193 @@
+import sys
+import threading
+import time
+import unittest
+import unittest.mock as mock
+
+import qrest
+from qrest import APIConfig, BodyParameter, ResourceConfig, cassette
+from qrest.exception import RestClientConfigurationError
+from qrest.hedging import Hedger, HedgingConfig
+
+from .test_instrumentation import _mock_response
+
+
+class HedgedConfig(APIConfig):
+    url = "https://hedged.example.com"
+
+
+class AllPosts(ResourceConfig):
+    name = "all_posts"
+    path = ["posts"]
+    method = "GET"
+    hedging = HedgingConfig(delay=0.01, budget=1.0)
+
+
+class HedgingTests(unittest.TestCase):
+    def setUp(self):
+        self.api = qrest.API(sys.modules[__name__])
+        self.metrics = self.api.enable_metrics()
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.slow = []
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def request(self, **kwargs):
+        """Let every other request, starting with the first, wait until it is released."""
+        with self.lock:
+            self.calls += 1
+            slow = self.calls % 2 == 1
+        response = _mock_response()
+        if slow:
+            self.slow.append(response)
+            self.release.wait(5)
+        return response
+
+    def call(self):
+        with mock.patch("requests.request", side_effect=self.request):
+            return self.api.all_posts.get_response()
+
+    def test_second_request_wins(self):
+        response = self.call()
+
+        self.assertEqual(2, self.calls)
+        self.assertEqual(1, response.timing.hedges)
+        self.assertTrue(response.timing.hedge_won)
+        snapshot = self.metrics.snapshot()["all_posts"]
+        self.assertEqual(1, snapshot["hedges"])
+        self.assertEqual(1, snapshot["hedges_won"])
+
+    def test_losing_response_is_closed(self):
+        self.call()
+
+        closed = threading.Event()
+        self.slow[0].close.side_effect = lambda: closed.set()
+        self.release.set()
+        self.assertTrue(closed.wait(5))
+
+    def test_fast_response_is_not_hedged(self):
+        self.release.set()
+
+        response = self.call()
+
+        self.assertEqual(1, self.calls)
+        self.assertEqual(0, response.timing.hedges)
+
+
+class HedgerTests(unittest.TestCase):
+    def test_delay_from_quantile(self):
+        hedger = Hedger(HedgingConfig(delay="p50", initial_delay=0.2, min_samples=3))
+
+        self.assertEqual(0.2, hedger.delay())
+        for latency in (0.01, 0.02, 0.03):
+            hedger._record(latency)
+        self.assertAlmostEqual(0.02, hedger.delay(), delta=0.001)
+
+    def test_budget(self):
+        hedger = Hedger(HedgingConfig(delay=0.0, budget=0.5))
+
+        for _ in range(4):
+            self.assertEqual("response", hedger.send(lambda: time.sleep(0.01) or "response"))
+
+        # the budget allows a second request for every other request
+        self.assertEqual(4, hedger.requests)
+        self.assertEqual(2, hedger.hedges)
+
+    def test_first_error_waits_for_second_request(self):
+        hedger = Hedger(HedgingConfig(delay=0.0, budget=1.0))
+        second_started = threading.Event()
+        calls = []
+
+        def send():
+            calls.append(None)
+            if len(calls) == 1:
+                second_started.wait(5)
+                raise ValueError("first")
+            second_started.set()
+            return "second"
+
+        self.assertEqual("second", hedger.send(send))
+
+    def test_latency_of_first_request_is_recorded(self):
+        hedger = Hedger(HedgingConfig(delay=0.0, budget=1.0))
+        calls = []
+        first_done = threading.Event()
+
+        def send():
+            calls.append(None)
+            if len(calls) == 1:
+                time.sleep(0.05)
+                first_done.set()
+                return "first"
+            return "second"
+
+        self.assertEqual("second", hedger.send(send))
+        self.assertTrue(first_done.wait(5))
+        while hedger.latency.count == 0:
+            time.sleep(0.001)
+
+        # the delay is not lowered by the hedge that won
+        self.assertEqual(1, hedger.latency.count)
+        self.assertGreaterEqual(hedger.latency.quantile(0.5), 0.04)
+
+    def test_requests_are_sent_with_cassette_in_use(self):
+        hedger = Hedger(HedgingConfig(delay=0.0, budget=1.0))
+        replay = object()
+        seen = []
+
+        def send():
+            seen.append(cassette.active.get())
+            return "response"
+
+        token = cassette.active.set(replay)
+        try:
+            hedger.send(send)
+        finally:
+            cassette.active.reset(token)
+
+        self.assertEqual(replay, seen[0])
+
+    def test_saturated_pool_sends_without_hedge(self):
+        hedger = Hedger(HedgingConfig(delay=0.0, budget=1.0, max_workers=1))
+        busy = threading.Event()
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def block():
+            busy.set()
+            return release.wait(5)
+
+        blocked = threading.Thread(target=hedger.send, args=(block,))
+        blocked.start()
+        self.assertTrue(busy.wait(5))
+
+        self.assertEqual("MainThread", hedger.send(lambda: threading.current_thread().name))
+        release.set()
+        blocked.join(5)
+        self.assertEqual(0, hedger.hedges)
+
+    def test_invalid_configuration(self):
+        kwargs_list = [
+            {"delay": "q95"},
+            {"delay": -1},
+            {"budget": 2},
+            {"min_samples": 0},
+            {"max_workers": 0},
+        ]
+        for kwargs in kwargs_list:
+            with self.subTest(**kwargs):
+                with self.assertRaises(RestClientConfigurationError):
+                    HedgingConfig(**kwargs).validate()
+
+    def test_post_cannot_be_hedged(self):
+        class CreatePost(ResourceConfig):
+            name = "create_post"
+            path = ["posts"]
+            method = "POST"
+            hedging = HedgingConfig()
+
+            title = BodyParameter(name="title")
+
+        with self.assertRaises(RestClientConfigurationError):
+            CreatePost.create()
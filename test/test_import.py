@@ -0,0 +1,32 @@
+import subprocess
+import sys
+import unittest
+
+
+def _imported_modules(statement: str) -> set:
+    """Return the names of the modules that are imported after the given statement."""
+    code = f"import sys; {statement}; print(' '.join(sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, stdout=subprocess.PIPE, universal_newlines=True
+    ).stdout
+    return set(output.split())
+
+
+class ImportTests(unittest.TestCase):
+    def test_do_not_import_requests_on_import_of_qrest(self):
+        modules = _imported_modules("import qrest")
+
+        self.assertIn("qrest", modules)
+        for name in ["requests", "urllib3", "netrc", "qrest.auth"]:
+            self.assertNotIn(name, modules)
+
+    def test_import_requests_on_access_of_http_error(self):
+        modules = _imported_modules("from qrest.exception import RestResourceHTTPError")
+
+        self.assertIn("requests", modules)
+
+    def test_derive_http_error_from_requests(self):
+        import requests
+        from qrest.exception import RestResourceHTTPError
+
+        self.assertTrue(issubclass(RestResourceHTTPError, requests.HTTPError))
@@ -0,0 +1,161 @@
+import datetime
+import unittest
+import unittest.mock as mock
+
+import requests
+
+import qrest
+from qrest.exception import RestClientConfigurationError, RestResourceNotFoundError
+from qrest.instrumentation import Hooks, TimedAuth, Timing
+
+from . import jsonplaceholderconfig
+
+
+def _mock_response(status_code=200, content=b"[]"):
+    response = mock.Mock(spec=requests.Response)
+    response.status_code = status_code
+    response.reason = "OK" if status_code < 400 else "Not Found"
+    response.headers = {"Content-type": "application/json"}
+    response.json = mock.Mock(return_value=[])
+    response.content = content
+    response.elapsed = datetime.timedelta(milliseconds=20)
+    response.request = mock.Mock(body=b'{"title": "foo"}')
+    response.raw = None
+    return response
+
+
+class TimingTests(unittest.TestCase):
+    def setUp(self):
+        self.api = qrest.API(jsonplaceholderconfig)
+
+    def test_response_has_timing(self):
+        with mock.patch("requests.request", return_value=_mock_response()):
+            response = self.api.create_post.get_response(title="foo", content="bar")
+
+        timing = response.timing
+        self.assertEqual("create_post", timing.resource)
+        self.assertEqual("POST", timing.method)
+        self.assertEqual("https://jsonplaceholder.typicode.com/posts", timing.url)
+        self.assertEqual(200, timing.status)
+        self.assertEqual(0.02, timing.ttfb)
+        self.assertEqual(16, timing.bytes_out)
+        self.assertEqual(2, timing.bytes_in)
+        self.assertEqual(0, timing.retries)
+        self.assertGreater(timing.validation, 0.0)
+        self.assertGreaterEqual(timing.total, timing.validation + timing.encode + timing.parse)
+
+    def test_timed_auth_adds_its_time(self):
+        timing = Timing("resource", "GET", "http://localhost")
+        auth = TimedAuth(lambda request: request, timing)
+
+        self.assertEqual("request", auth("request"))
+        self.assertGreater(timing.auth, 0.0)
+
+    def test_as_dict_contains_all_fields(self):
+        timing = Timing("resource", "GET", "http://localhost")
+
+        fields = timing.as_dict()
+        self.assertEqual("resource", fields["resource"])
+        self.assertIsNone(fields["status"])
+        self.assertEqual(set(Timing.__slots__), set(fields))
+
+
+class HookTests(unittest.TestCase):
+    def setUp(self):
+        self.api = qrest.API(jsonplaceholderconfig)
+        self.calls = []
+
+    def record(self, event):
+        def hook(resource, timing, *args):
+            self.calls.append((event, resource.name, timing.status) + args)
+
+        return hook
+
+    def test_hooks_of_api_and_resource_are_called(self):
+        self.api.add_hook("pre_request", self.record("api pre_request"))
+        self.api.add_hook("post_response", self.record("api post_response"))
+        self.api.all_posts.add_hook("post_response", self.record("resource post_response"))
+
+        with mock.patch("requests.request", return_value=_mock_response()):
+            response = self.api.all_posts.get_response()
+            self.api.single_post(item=1)
+
+        self.assertEqual(
+            [
+                ("api pre_request", "all_posts", None),
+                ("api post_response", "all_posts", 200, response),
+                ("resource post_response", "all_posts", 200, response),
+                ("api pre_request", "single_post", None),
+                ("api post_response", "single_post", 200, mock.ANY),
+            ],
+            self.calls,
+        )
+
+    def test_error_hook_receives_the_exception(self):
+        self.api.add_hook("error", self.record("error"))
+
+        with mock.patch("requests.request", return_value=_mock_response(404)):
+            with self.assertRaises(RestResourceNotFoundError) as context:
+                self.api.all_posts()
+
+        self.assertEqual([("error", "all_posts", 404, context.exception)], self.calls)
+
+    def test_error_hook_receives_connection_errors(self):
+        self.api.add_hook("error", self.record("error"))
+        error = requests.ConnectionError("refused")
+
+        with mock.patch("requests.request", side_effect=error):
+            with self.assertRaises(requests.ConnectionError):
+                self.api.all_posts()
+
+        self.assertEqual([("error", "all_posts", None, error)], self.calls)
+
+    def test_error_hook_receives_parse_errors(self):
+        self.api.add_hook("post_response", self.record("post_response"))
+        self.api.add_hook("error", self.record("error"))
+        mock_response = _mock_response()
+        error = ValueError("no JSON")
+        mock_response.json.side_effect = error
+
+        with mock.patch("requests.request", return_value=mock_response):
+            with self.assertRaises(ValueError):
+                self.api.all_posts()
+
+        self.assertEqual([("error", "all_posts", 200, error)], self.calls)
+
+    def test_lazy_parse_error_is_only_raised(self):
+        self.api.add_hook("error", self.record("error"))
+        mock_response = _mock_response()
+        mock_response.json.side_effect = ValueError("no JSON")
+
+        with mock.patch("requests.request", return_value=mock_response):
+            response = self.api.all_posts.get_response()
+        total = response.timing.total
+        with self.assertRaises(ValueError):
+            response.fetch()
+
+        self.assertEqual([], self.calls)
+        self.assertGreater(response.timing.total, total)
+
+    def test_failing_hook_is_logged(self):
+        def fail(resource, timing):
+            raise RuntimeError("hook failed")
+
+        self.api.add_hook("pre_request", fail)
+
+        with mock.patch("requests.request", return_value=_mock_response()):
+            with self.assertLogs("qrest.instrumentation", "ERROR"):
+                self.api.all_posts()
+
+    def test_unknown_event_raises(self):
+        with self.assertRaises(RestClientConfigurationError):
+            self.api.add_hook("post_request", self.record("post_request"))
+
+    def test_hooks_can_be_removed(self):
+        hooks = Hooks()
+        hook = self.record("pre_request")
+        hooks.add("pre_request", hook)
+        self.assertTrue(hooks)
+
+        hooks.remove("pre_request", hook)
+        self.assertFalse(hooks)
@@ -177,3 +177,21 @@ class TestJsonPlaceHolder(unittest.TestCase):
                 headers={"Content-type": "application/json; charset=UTF-8"},
             )
             self.assertIs(api.create_post.response, response)
+
+
+class TestMemoryLean(unittest.TestCase):
+    def setUp(self):
+        with mock.patch.object(jsonplaceholderconfig.JsonPlaceHolderConfig, "memory_lean", True):
+            self.api = qrest.API(jsonplaceholderconfig)
+
+    def test_resource_keeps_no_data_of_a_call(self):
+        from .test_instrumentation import _mock_response
+
+        with mock.patch("requests.request", return_value=_mock_response()):
+            response = self.api.create_post.get_response(title="foo", content="bar")
+
+        self.assertEqual([], response.fetch())
+        self.assertIsNot(self.api.create_post.response, response)
+        self.assertIsNone(self.api.create_post.response._response)
+        self.assertIsNone(response._response)
+        self.assertEqual({}, self.api.create_post.cleaned_data)
@@ -0,0 +1,160 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock as mock
+
+import qrest
+from qrest.cassette import Cassette
+from qrest.exception import RestClientConfigurationError
+from qrest.loadgen import load_kwargs, main, run_asyncio, run_threads
+
+from . import jsonplaceholderconfig
+from .test_cassette import _network_response
+from .test_instrumentation import _mock_response
+
+
+class RunTests(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+
+    def call(self, **kwargs):
+        self.calls.append(kwargs)
+        if kwargs.get("fail"):
+            raise KeyError("fail")
+
+    def test_fixed_concurrency_with_count(self):
+        for run in (run_threads, run_asyncio):
+            with self.subTest(run=run.__name__):
+                self.calls.clear()
+                result = run(self.call, [{"i": 0}, {"fail": True}], 3, duration=None, count=10)
+
+                self.assertEqual(10, len(self.calls))
+                self.assertEqual(10, result.calls)
+                self.assertEqual({"KeyError": 5}, result.errors)
+
+    def test_fixed_rate(self):
+        for run in (run_threads, run_asyncio):
+            with self.subTest(run=run.__name__):
+                self.calls.clear()
+                result = run(self.call, [{}], 2, rate=200, duration=None, count=20)
+
+                self.assertEqual(20, result.calls)
+                # the last call is scheduled at 19 / 200 seconds
+                self.assertGreaterEqual(result.duration, 0.095)
+
+    def test_fixed_duration(self):
+        result = run_threads(self.call, [{}], 1, rate=100, duration=0.05)
+
+        self.assertGreater(result.calls, 0)
+        self.assertLessEqual(result.calls, 6)
+
+    def test_fixed_rate_does_not_overrun_duration(self):
+        for run in (run_threads, run_asyncio):
+            with self.subTest(run=run.__name__):
+                # the second call would be scheduled after the end of the run
+                result = run(self.call, [{}], 1, rate=1, duration=0.1)
+
+                self.assertEqual(1, result.calls)
+                self.assertLess(result.duration, 0.5)
+
+
+class LoadKwargsTests(unittest.TestCase):
+    def load(self, text):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "kwargs.json")
+            with open(path, "w") as f:
+                f.write(text)
+            return load_kwargs(path)
+
+    def test_json_list(self):
+        self.assertEqual([{"item": 1}, {"item": 2}], self.load('[{"item": 1}, {"item": 2}]'))
+
+    def test_ndjson(self):
+        self.assertEqual([{"item": 1}, {"item": 2}], self.load('{"item": 1}\n\n{"item": 2}\n'))
+
+    def test_no_objects(self):
+        with self.assertRaises(RestClientConfigurationError):
+            self.load("[1, 2]")
+
+    def test_no_file(self):
+        self.assertEqual([{}], load_kwargs(None))
+
+
+class MainTests(unittest.TestCase):
+    def test_json_report(self):
+        output = io.StringIO()
+        with mock.patch("requests.request", return_value=_mock_response()) as mock_request:
+            with contextlib.redirect_stdout(output):
+                main(
+                    [
+                        "test.jsonplaceholderconfig",
+                        "all_posts",
+                        "--requests",
+                        "5",
+                        "--concurrency",
+                        "2",
+                        "--format",
+                        "json",
+                    ]
+                )
+
+        report = json.loads(output.getvalue())
+        self.assertEqual(5, mock_request.call_count)
+        self.assertEqual(5, report["calls"])
+        self.assertEqual({}, report["errors"])
+        self.assertEqual(10, report["bytes_in"])
+        self.assertIn("p99", report["latency_s"])
+
+    def test_text_report_with_errors(self):
+        output = io.StringIO()
+        with mock.patch("requests.request", return_value=_mock_response(404)):
+            with contextlib.redirect_stdout(output):
+                main(["test.jsonplaceholderconfig", "all_posts", "--requests", "2"])
+
+        self.assertIn("calls       2 in", output.getvalue())
+        self.assertIn("errors      RestResourceNotFoundError 2", output.getvalue())
+
+    def test_parse_errors_are_counted(self):
+        response = _mock_response()
+        response.json.side_effect = ValueError("no JSON")
+        output = io.StringIO()
+        with mock.patch("requests.request", return_value=response):
+            with contextlib.redirect_stdout(output):
+                main(["test.jsonplaceholderconfig", "all_posts", "--requests", "2"])
+
+        self.assertIn("errors      ValueError 2", output.getvalue())
+
+    def test_replay_from_cassette(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cassette.zip")
+            with mock.patch("requests.request", return_value=_network_response(b"[]")):
+                with Cassette(path, mode="record"):
+                    qrest.API(jsonplaceholderconfig).all_posts()
+
+            output = io.StringIO()
+            with mock.patch("requests.request", side_effect=AssertionError("no network")):
+                with contextlib.redirect_stdout(output):
+                    main(
+                        [
+                            "test.jsonplaceholderconfig",
+                            "all_posts",
+                            "--requests",
+                            "3",
+                            "--cassette",
+                            path,
+                            "--format",
+                            "json",
+                        ]
+                    )
+
+        report = json.loads(output.getvalue())
+        self.assertEqual(3, report["calls"])
+        self.assertEqual({}, report["errors"])
+
+    def test_unknown_resource(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                main(["test.jsonplaceholderconfig", "no_such_resource"])
@@ -0,0 +1,138 @@
+import threading
+import unittest
+import unittest.mock as mock
+
+import qrest
+from qrest.exception import RestResourceNotFoundError
+from qrest.instrumentation import Timing
+from qrest.metrics import Histogram, MetricsRegistry, status_class
+
+from . import jsonplaceholderconfig
+from .test_instrumentation import _mock_response
+
+
+def _timing(resource="all_posts", total=0.01, status=200, bytes_out=0, bytes_in=100):
+    timing = Timing(resource, "GET", "http://localhost")
+    timing.total = total
+    timing.status = status
+    timing.bytes_out = bytes_out
+    timing.bytes_in = bytes_in
+    return timing
+
+
+class HistogramTests(unittest.TestCase):
+    def test_quantiles_are_within_precision(self):
+        histogram = Histogram()
+        for i in range(1, 1001):
+            histogram.record(i / 1000)
+
+        for q in (0.5, 0.95, 0.99):
+            self.assertAlmostEqual(q, histogram.quantile(q), delta=q * 0.035)
+        self.assertEqual(1000, histogram.count)
+        self.assertAlmostEqual(500.5, histogram.sum)
+        self.assertEqual(1.0, histogram.max)
+
+    def test_empty_histogram(self):
+        self.assertEqual(0.0, Histogram().quantile(0.5))
+
+    def test_merge(self):
+        first, second = Histogram(), Histogram()
+        first.record(0.001)
+        second.record(0.002)
+        second.record(0.003)
+
+        first.merge(second)
+        self.assertEqual(3, first.count)
+        self.assertAlmostEqual(0.002, first.quantile(0.5), delta=0.0001)
+
+
+class MetricsRegistryTests(unittest.TestCase):
+    def test_snapshot(self):
+        registry = MetricsRegistry()
+        registry.post_response(None, _timing(bytes_out=10), None)
+        registry.error(None, _timing(status=404, bytes_in=None), None)
+        registry.error(None, _timing(status=None, bytes_in=None), None)
+        registry.cache_hit("all_posts")
+
+        snapshot = registry.snapshot()["all_posts"]
+        self.assertEqual(3, snapshot["calls"])
+        self.assertEqual({"4xx": 1, "none": 1}, snapshot["errors"])
+        self.assertEqual(1, snapshot["cache_hits"])
+        self.assertEqual(10, snapshot["bytes_out"])
+        self.assertEqual(100, snapshot["bytes_in"])
+        self.assertEqual(3, snapshot["latency"]["count"])
+        self.assertAlmostEqual(0.01, snapshot["latency"]["p99"], delta=0.0004)
+
+    def test_threads_are_merged(self):
+        registry = MetricsRegistry()
+
+        def record():
+            for _ in range(100):
+                registry.post_response(None, _timing(), None)
+
+        threads = [threading.Thread(target=record) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(400, registry.snapshot()["all_posts"]["calls"])
+
+    def test_prometheus(self):
+        registry = MetricsRegistry()
+        registry.post_response(None, _timing(), None)
+        registry.error(None, _timing(resource='say "hi"', status=503), None)
+
+        text = registry.prometheus()
+        self.assertIn("# TYPE qrest_requests_total counter\n", text)
+        self.assertIn('qrest_requests_total{resource="all_posts"} 1\n', text)
+        self.assertIn(
+            'qrest_errors_total{resource="say \\"hi\\"",status_class="5xx"} 1\n', text
+        )
+        self.assertIn('qrest_request_duration_seconds_count{resource="all_posts"} 1\n', text)
+        self.assertIn('qrest_request_duration_seconds{resource="all_posts",quantile="0.5"}', text)
+
+    def test_status_class(self):
+        self.assertEqual("2xx", status_class(204))
+        self.assertEqual("none", status_class(None))
+
+
+class EnableMetricsTests(unittest.TestCase):
+    def test_calls_of_api_are_recorded(self):
+        api = qrest.API(jsonplaceholderconfig)
+        metrics = api.enable_metrics()
+        self.assertIs(metrics, api.metrics)
+        self.assertIs(metrics, api.enable_metrics())
+
+        with mock.patch("requests.request", return_value=_mock_response()):
+            api.all_posts()
+            api.single_post(item=1)
+        with mock.patch("requests.request", return_value=_mock_response(404)):
+            with self.assertRaises(RestResourceNotFoundError):
+                api.all_posts()
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(["all_posts", "single_post"], list(snapshot))
+        self.assertEqual(2, snapshot["all_posts"]["calls"])
+        self.assertEqual({"4xx": 1}, snapshot["all_posts"]["errors"])
+        self.assertEqual(2, snapshot["single_post"]["bytes_in"])
+
+    def test_parse_error_is_counted_once(self):
+        api = qrest.API(jsonplaceholderconfig)
+        metrics = api.enable_metrics()
+        mock_response = _mock_response()
+        mock_response.json.side_effect = ValueError("no JSON")
+
+        with mock.patch("requests.request", return_value=mock_response):
+            with self.assertRaises(ValueError):
+                api.all_posts()
+
+        snapshot = metrics.snapshot()["all_posts"]
+        self.assertEqual(1, snapshot["calls"])
+        self.assertEqual({"parse": 1}, snapshot["errors"])
+
+    def test_registry_can_be_shared(self):
+        registry = MetricsRegistry()
+        api = qrest.API(jsonplaceholderconfig)
+
+        self.assertIs(registry, api.enable_metrics(registry))
@@ -0,0 +1,140 @@
+import http.client
+import json
+import random
+import sys
+import unittest
+import unittest.mock as mock
+
+import requests
+
+import qrest
+from qrest import APIConfig, QueryParameter, ResourceConfig
+from qrest.exception import RestClientConfigurationError
+from qrest.mockserver import Faults, MockServer, parse_latency
+from qrest.resource import CSVResource
+
+from . import jsonplaceholderconfig
+
+
+class ReportConfig(APIConfig):
+    url = "http://localhost/api/v1"
+
+
+class Report(ResourceConfig):
+    name = "report"
+    path = ["reports", "{report_id}"]
+    method = "GET"
+    processor = CSVResource()
+
+    year = QueryParameter(name="year", required=True)
+
+
+class MockServerTests(unittest.TestCase):
+    def serve(self, module=jsonplaceholderconfig, **kwargs):
+        server = MockServer(module, seed=1, **kwargs)
+        server.start()
+        self.addCleanup(server.stop)
+        return server
+
+    def test_api_calls(self):
+        server = self.serve(records=3)
+
+        with mock.patch.object(jsonplaceholderconfig.JsonPlaceHolderConfig, "url", server.url):
+            api = qrest.API(jsonplaceholderconfig)
+
+        posts = api.all_posts()
+        self.assertEqual(3, len(posts))
+        self.assertEqual("all_posts 0", posts[0]["name"])
+        self.assertEqual(3, len(api.comments(post_id=1)))
+        self.assertEqual(
+            {"title": "foo", "body": "bar", "userId": 101, "id": 1},
+            api.create_post(title="foo", content="bar"),
+        )
+
+    def test_csv_under_base_path(self):
+        server = self.serve(module=sys.modules[__name__], records=2, record_size=10)
+
+        response = requests.get(server.url + "/api/v1/reports/12", params={"year": 2020})
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("text/csv; charset=utf-8", response.headers["Content-Type"])
+        self.assertEqual(["id,name,value,text", "0,report 0,0.0,"], response.text.split("\n")[:2])
+
+        self.assertEqual(400, requests.get(server.url + "/api/v1/reports/12").status_code)
+        self.assertEqual(404, requests.get(server.url + "/reports/12").status_code)
+
+    def test_chunked_body_is_read(self):
+        server = self.serve()
+        host, port = server.url[len("http://"):].split(":")
+        connection = http.client.HTTPConnection(host, int(port), timeout=5)
+        self.addCleanup(connection.close)
+
+        body = iter([b'{"title": ', b'"foo"}'])
+        connection.request("POST", "/posts", body=body, encode_chunked=True)
+        response = connection.getresponse()
+        self.assertEqual({"title": "foo", "id": 1}, json.loads(response.read()))
+
+        # the next request on the connection starts after the body
+        connection.request("GET", "/posts")
+        self.assertEqual(200, connection.getresponse().status)
+
+    def test_throttle(self):
+        server = self.serve(faults=Faults(throttle_rate=1, retry_after=3))
+
+        response = requests.get(server.url + "/posts")
+        self.assertEqual(429, response.status_code)
+        self.assertEqual("3", response.headers["Retry-After"])
+
+    def test_errors(self):
+        server = self.serve(faults=Faults(error_rate=1))
+
+        self.assertIn(requests.get(server.url + "/posts").status_code, (500, 502, 503))
+
+    def test_faults_per_resource(self):
+        server = self.serve(resource_faults={"single_post": Faults(error_rate=1)})
+
+        self.assertEqual(200, requests.get(server.url + "/posts").status_code)
+        self.assertEqual(500, requests.get(server.url + "/posts/1").status_code // 100 * 100)
+
+    def test_connection_reset(self):
+        server = self.serve(faults=Faults(reset_rate=1))
+
+        with self.assertRaises(requests.ConnectionError):
+            requests.get(server.url + "/posts")
+
+    def test_slow_body(self):
+        server = self.serve(records=2, faults=Faults(slow_body_rate=1, bandwidth=1000))
+
+        with mock.patch("time.sleep") as mock_sleep:
+            response = requests.get(server.url + "/posts")
+
+        self.assertEqual(2, len(response.json()))
+        self.assertEqual(-(-len(response.content) // 100), mock_sleep.call_count)
+
+    def test_seed_reproduces_faults(self):
+        statuses = []
+        for _ in range(2):
+            server = self.serve(faults=Faults(error_rate=0.5))
+            statuses.append([requests.get(server.url + "/posts").status_code for _ in range(10)])
+
+        self.assertEqual(statuses[0], statuses[1])
+        self.assertGreater(len(set(statuses[0])), 1)
+
+
+class FaultsTests(unittest.TestCase):
+    def test_latency_distributions(self):
+        rng = random.Random(1)
+
+        self.assertEqual(0.05, parse_latency("fixed:0.05")(rng))
+        self.assertTrue(0.01 <= parse_latency("uniform:0.01,0.02")(rng) <= 0.02)
+        self.assertGreaterEqual(parse_latency("exponential:0.05")(rng), 0.0)
+        self.assertGreater(parse_latency("lognormal:0.05,0.5")(rng), 0.0)
+
+    def test_invalid_latency(self):
+        for spec in ["normal:0.1", "fixed", "uniform:0.1", "fixed:x", "fixed:-1"]:
+            with self.subTest(spec=spec):
+                with self.assertRaises(RestClientConfigurationError):
+                    parse_latency(spec)
+
+    def test_invalid_rate(self):
+        with self.assertRaises(RestClientConfigurationError):
+            Faults(error_rate=2)
@@ -1,9 +1,13 @@
 import inspect
 import unittest
 
+import qrest
 from qrest import APIConfig, ResourceConfig
 from qrest.module_class_registry import ModuleClassRegistry
 
+from . import splitconfig
+from .splitconfig import comments, posts
+
 
 class MyAPIConfig(APIConfig):
     pass
@@ -21,6 +25,9 @@ class SecondResourceConfig(ResourceConfig):
     method = "GET"
 
 
+AliasOfSecondResourceConfig = SecondResourceConfig
+
+
 class ModuleClassRegistryTests(unittest.TestCase):
     def setUp(self):
         self.current_module = inspect.getmodule(ModuleClassRegistryTests)
@@ -47,3 +54,50 @@ class ModuleClassRegistryTests(unittest.TestCase):
                 issubclass(config_class, ResourceConfig),
                 f"Class {config_class} should be a subclass of ResourceConfig",
             )
+
+    def test_return_classes_in_order_of_definition(self):
+        classes = ModuleClassRegistry(self.current_module)
+
+        self.assertEqual(
+            [FirstResourceConfig, SecondResourceConfig], classes.retrieve(ResourceConfig)
+        )
+
+
+class ModuleClassRegistryAcrossModulesTests(unittest.TestCase):
+    def test_ignore_imported_classes(self):
+        classes = ModuleClassRegistry(posts)
+
+        self.assertEqual([], classes.retrieve(APIConfig))
+        self.assertEqual([posts.AllPosts], classes.retrieve(ResourceConfig))
+
+    def test_find_classes_in_several_modules(self):
+        classes = ModuleClassRegistry(posts, comments)
+
+        self.assertEqual(
+            [posts.AllPosts, comments.AllComments], classes.retrieve(ResourceConfig)
+        )
+
+    def test_submodules_are_not_included_by_default(self):
+        classes = ModuleClassRegistry(splitconfig)
+
+        self.assertEqual([], classes.retrieve(object))
+
+    def test_find_classes_in_submodules_of_package(self):
+        classes = ModuleClassRegistry(splitconfig, submodules=True)
+
+        self.assertEqual(1, len(classes.retrieve(APIConfig)))
+        self.assertEqual(
+            {"all_posts", "all_comments"}, {c.name for c in classes.retrieve(ResourceConfig)}
+        )
+
+    def test_create_api_from_package(self):
+        api = qrest.API(splitconfig, submodules=True)
+
+        self.assertEqual(["all_comments", "all_posts"], api.resources)
+
+    def test_create_api_from_list_of_modules(self):
+        from .splitconfig import api as api_module
+
+        api = qrest.API([api_module, posts])
+
+        self.assertEqual(["all_posts"], api.resources)
@@ -0,0 +1,183 @@
+import os
+import sys
+import tempfile
+import types
+import unittest
+import unittest.mock as mock
+
+import qrest
+from qrest import openapi
+from qrest.conf import OPTIONAL_ATTRIBUTES
+from qrest.exception import RestClientConfigurationError
+
+_DOCUMENT = {
+    "openapi": "3.0.0",
+    "info": {"title": "JSON placeholder", "version": "1.0"},
+    "servers": [{"url": "https://jsonplaceholder.typicode.com"}],
+    "paths": {
+        "/posts": {
+            "get": {
+                "operationId": "listPosts",
+                "summary": "retrieve all posts",
+                "parameters": [
+                    {
+                        "name": "userId",
+                        "in": "query",
+                        "description": "the user ID of the author of the post",
+                        "schema": {"type": "integer"},
+                    },
+                    {"$ref": "#/components/parameters/Order"},
+                    {"name": "X-Trace", "in": "header", "schema": {"type": "string"}},
+                ],
+            },
+            "post": {
+                "operationId": "createPost",
+                "requestBody": {
+                    "required": True,
+                    "content": {
+                        "application/json": {"schema": {"$ref": "#/components/schemas/Post"}}
+                    },
+                },
+            },
+            "delete": {"operationId": "deletePosts"},
+        },
+        "/posts/{postId}/comments": {
+            "parameters": [
+                {
+                    "name": "postId",
+                    "in": "path",
+                    "required": True,
+                    "description": "select the post ID",
+                    "schema": {"type": "integer"},
+                }
+            ],
+            "get": {"summary": "retrieve the comments of a post"},
+        },
+    },
+    "components": {
+        "parameters": {
+            "Order": {
+                "name": "order",
+                "in": "query",
+                "schema": {"type": "string", "enum": ["asc", "desc"], "default": "asc"},
+            }
+        },
+        "schemas": {
+            "Post": {
+                "type": "object",
+                "required": ["title"],
+                "properties": {
+                    "title": {"type": "string", "description": "The title of the post"},
+                    "body": {"type": "string"},
+                    "tags": {"type": "array", "items": {"type": "string"}},
+                },
+            }
+        },
+    },
+}
+
+
+def _import_code(code: str, name: str = "generated_config") -> types.ModuleType:
+    module = types.ModuleType(name)
+    sys.modules[name] = module
+    exec(compile(code, name, "exec"), module.__dict__)
+    return module
+
+
+class GenerateTests(unittest.TestCase):
+    def setUp(self):
+        self.module = _import_code(openapi.generate(_DOCUMENT))
+        self.addCleanup(sys.modules.pop, self.module.__name__)
+
+    def test_create_api_from_generated_module(self):
+        api = qrest.API(self.module)
+
+        self.assertEqual(
+            ["create_post", "get_posts_post_id_comments", "list_posts"], api.resources
+        )
+        self.assertEqual("https://jsonplaceholder.typicode.com", api.config.url)
+
+    def test_map_query_parameters(self):
+        config = self.module.ListPosts
+
+        self.assertEqual("GET", config.method)
+        self.assertEqual("retrieve all posts", config.description)
+        self.assertEqual("userId", config.user_id.name)
+        self.assertEqual("the user ID of the author of the post", config.user_id.description)
+        self.assertEqual(("asc", "desc"), config.order.choices)
+        self.assertEqual("asc", config.order.default)
+        self.assertFalse(hasattr(config, "x_trace"))
+
+    def test_map_body_properties(self):
+        config = self.module.CreatePost
+
+        self.assertTrue(config.title.required)
+        self.assertFalse(config.body.required)
+        self.assertTrue(config.tags.multiple)
+        self.assertEqual("body", config.body.call_location)
+
+    def test_map_path_parameters(self):
+        config = self.module.GetPostsPostIdComments
+
+        self.assertEqual(["posts", "{postId}", "comments"], config.path)
+        self.assertEqual({"postId": "select the post ID"}, config.path_description)
+
+    def test_reserved_names_contain_resource_attributes(self):
+        attributes = set(OPTIONAL_ATTRIBUTES) | {"path", "method", "parameters", "create"}
+        attributes |= {"validate", "defaults", "query_parameters", "all_parameters", "as_dict"}
+
+        self.assertLessEqual(attributes, openapi.RESERVED_NAMES)
+
+    def test_rename_parameter_with_name_of_resource_method(self):
+        operation = {
+            "operationId": "getSettings",
+            "parameters": [{"name": "defaults", "in": "query", "schema": {"type": "boolean"}}],
+        }
+        document = dict(_DOCUMENT, paths={"/settings": {"get": operation}})
+
+        module = _import_code(openapi.generate(document), "generated_settings_config")
+        self.addCleanup(sys.modules.pop, module.__name__)
+        api = qrest.API(module)
+
+        self.assertEqual("defaults", module.GetSettings.defaults_.name)
+        self.assertEqual({"defaults_"}, set(api.get_settings.config.parameters))
+
+    def test_raise_proper_exception_for_missing_server(self):
+        document = dict(_DOCUMENT, servers=[])
+
+        with self.assertRaisesRegex(RestClientConfigurationError, "server url"):
+            openapi.generate(document)
+
+
+class CachedGenerateTests(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.cache_path = os.path.join(self.directory, "cache.json")
+
+    def test_only_render_changed_operations(self):
+        expected_code = openapi.generate(_DOCUMENT, cache_path=self.cache_path)
+
+        document = dict(_DOCUMENT, paths=dict(_DOCUMENT["paths"]))
+        document["paths"]["/posts/{postId}/comments"] = dict(
+            document["paths"]["/posts/{postId}/comments"],
+            get={"summary": "retrieve the comments"},
+        )
+        with mock.patch.object(
+            openapi, "render_operation", wraps=openapi.render_operation
+        ) as render:
+            code = openapi.generate(_DOCUMENT, cache_path=self.cache_path)
+            self.assertEqual(expected_code, code)
+            render.assert_not_called()
+
+            code = openapi.generate(document, cache_path=self.cache_path)
+            self.assertEqual(1, render.call_count)
+            self.assertIn("description = 'retrieve the comments'", code)
+
+    def test_only_write_changed_module(self):
+        module_path = os.path.join(self.directory, "config.py")
+        code = openapi.generate(_DOCUMENT)
+
+        self.assertTrue(openapi.write_module(code, module_path))
+        self.assertFalse(openapi.write_module(code, module_path))
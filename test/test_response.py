@@ -1,9 +1,17 @@
+import importlib.util
+import io
+import json
 import unittest
 import unittest.mock as mock
 
 import requests
+from requests.packages.urllib3.response import HTTPResponse
+from requests.structures import CaseInsensitiveDict
 
-from qrest.response import CSVResponse, JSONResponse
+from qrest.exception import RestClientConfigurationError
+from qrest.response import ArrowResponse, CBORResponse, CSVResponse, JSONResponse
+from qrest.response import MsgPackResponse
+from qrest.response import NDJSONResponse
 
 # the following content has been copied from the response to
 # https://jsonplaceholder.typicode.com/posts and extended
@@ -91,6 +99,13 @@ class JSONResponseTests(unittest.TestCase):
         self.assertEqual(expected_content, response.fetch())
         self.assertEqual(expected_content, response.results)
 
+    def test_raise_exception_on_ndjson_content_type(self):
+        mock_response = self._create_mock_response(_POSTS)
+        mock_response.headers = {"Content-type": "application/x-ndjson"}
+
+        with self.assertRaisesRegex(TypeError, ".* use an NDJSONResource"):
+            _ = JSONResponse()(mock_response)  # noqa
+
     def test_fetch_intro_of_single_post(self):
         single_post = _POSTS[0]
         mock_response = self._create_mock_response(single_post)
@@ -101,6 +116,74 @@ class JSONResponseTests(unittest.TestCase):
         self.assertEqual(expected_content, response.fetch())
         self.assertEqual(expected_content, response.results)
 
+    def test_body_is_parsed_on_first_access(self):
+        mock_response = self._create_mock_response(_POSTS)
+        mock_response.status_code = 200
+        mock_response.content = json.dumps(_POSTS).encode()
+
+        response = JSONResponse()(mock_response)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("application/json; charset=UTF-8", response.headers["content-type"])
+        self.assertEqual(mock_response.content, response.content)
+        mock_response.json.assert_not_called()
+
+        self.assertEqual(_POSTS, response.fetch())
+        self.assertEqual(_POSTS, response.raw)
+        self.assertEqual(2, mock_response.json.call_count)
+
+    def test_parse_error_is_raised_on_access(self):
+        mock_response = self._create_mock_response(None)
+        mock_response.json.side_effect = ValueError("no JSON")
+
+        response = JSONResponse()(mock_response)
+
+        for _ in range(2):
+            with self.assertRaisesRegex(ValueError, "no JSON"):
+                response.fetch()
+
+    def test_transport_headers_are_not_copied(self):
+        mock_response = self._create_mock_response(_POSTS)
+        mock_response.headers = CaseInsensitiveDict({"Content-Type": "application/json"})
+
+        response = JSONResponse()(mock_response)
+
+        self.assertIs(mock_response.headers, response.headers)
+
+    def test_reused_response_does_not_keep_previous_attribute(self):
+        response = JSONResponse()
+        response(self._create_mock_response(_POSTS[0]))
+        self.assertEqual(_POSTS[0], response.results)
+
+        response(self._create_mock_response(_POSTS[1]))
+
+        self.assertEqual(_POSTS[1], response.results)
+
+    def test_headers_lowercase_is_deprecated(self):
+        response = JSONResponse()(self._create_mock_response(_POSTS))
+
+        with self.assertWarns(DeprecationWarning):
+            headers = response._headers_lowercase
+        self.assertEqual("application/json; charset=UTF-8", headers.get("content-type"))
+
+    def test_memory_lean_releases_the_body(self):
+        mock_response = self._create_mock_response(_POSTS)
+        mock_response.status_code = 200
+        mock_response.content = b"[]"
+        mock_response.raw = None
+
+        response = JSONResponse()
+        response.memory_lean = True
+        response(mock_response)
+
+        self.assertEqual(_POSTS, response.fetch())
+        self.assertEqual(1, mock_response.json.call_count)
+        self.assertIsNone(response.raw)
+        self.assertIsNone(response.content)
+        self.assertIsNone(response._response)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(2, response.bytes_received)
+
 
 class CSVResponseTests(unittest.TestCase):
     def test_fetch_multiline_text_with_commas(self):
@@ -135,3 +218,222 @@ consequat."""
         regex = ".* response did not give a CSV but a application/json;.*"
         with self.assertRaisesRegex(TypeError, regex):
             _ = CSVResponse()(mock_response)  # noqa
+
+
+class NDJSONResponseTests(unittest.TestCase):
+    def _create_streamed_response(self, records, content_type="application/x-ndjson"):
+        body = "\n".join(json.dumps(record) for record in records).encode("utf-8") + b"\n"
+
+        response = requests.Response()
+        response.status_code = 200
+        response.headers = CaseInsensitiveDict({"Content-type": content_type})
+        response.raw = HTTPResponse(body=io.BytesIO(body), preload_content=False)
+        return response
+
+    def test_fetch_all_posts_one_at_a_time(self):
+        response = NDJSONResponse()(self._create_streamed_response(_POSTS), stream=True)
+
+        records = response.fetch()
+        self.assertEqual(_POSTS[0], next(records))
+        self.assertEqual(_POSTS[1:], list(records))
+
+    def test_fetch_intro_of_each_post(self):
+        ndjson_response = NDJSONResponse(extract_section=["body", "intro"])
+        response = ndjson_response(self._create_streamed_response(_POSTS), stream=True)
+
+        expected_content = [post["body"]["intro"] for post in _POSTS]
+        self.assertEqual(expected_content, list(response.results))
+
+    def test_fetch_posts_in_batches(self):
+        posts = [{"id": i} for i in range(5)]
+        ndjson_response = NDJSONResponse(batch_size=2, create_attribute="posts")
+        response = ndjson_response(self._create_streamed_response(posts), stream=True)
+
+        self.assertEqual([posts[0:2], posts[2:4], posts[4:]], list(response.posts))
+
+    def test_reused_response_keeps_records_of_each_body(self):
+        ndjson_response = NDJSONResponse()
+        first = ndjson_response(self._create_streamed_response(_POSTS[:1]), stream=True).fetch()
+        second = ndjson_response(self._create_streamed_response(_POSTS[1:]), stream=True).fetch()
+
+        self.assertEqual(_POSTS[:1], list(first))
+        self.assertEqual(_POSTS[1:], list(second))
+
+    def test_skip_empty_lines(self):
+        raw_response = self._create_streamed_response([])
+        raw_response.raw = HTTPResponse(
+            body=io.BytesIO(b'{"id": 1}\n\n{"id": 2}'), preload_content=False
+        )
+
+        response = NDJSONResponse()(raw_response, stream=True)
+
+        self.assertEqual([{"id": 1}, {"id": 2}], list(response.fetch()))
+
+    def test_raise_exception_on_incorrect_content_type(self):
+        raw_response = self._create_streamed_response(_POSTS, content_type="application/json")
+
+        regex = ".* response did not give NDJSON but a application/json"
+        with self.assertRaisesRegex(TypeError, regex):
+            _ = NDJSONResponse()(raw_response, stream=True)  # noqa
+
+    def test_raise_exception_on_invalid_batch_size(self):
+        with self.assertRaises(RestClientConfigurationError):
+            NDJSONResponse(batch_size=0)
+
+
+@unittest.skipUnless(importlib.util.find_spec("msgpack"), "requires msgpack")
+class MsgPackResponseTests(unittest.TestCase):
+    def _create_mock_response(self, content):
+        import msgpack
+
+        mock_response = mock.Mock(spec=requests.Response)
+        mock_response.headers = {"Content-type": "application/msgpack"}
+        mock_response.content = msgpack.packb(content)
+        return mock_response
+
+    def test_fetch_all_posts(self):
+        response = MsgPackResponse()(self._create_mock_response(_POSTS))
+
+        self.assertEqual(_POSTS, response.fetch())
+        self.assertEqual(_POSTS, response.raw)
+
+    def test_fetch_intro_of_single_post(self):
+        mock_response = self._create_mock_response(_POSTS[0])
+
+        response = MsgPackResponse(extract_section=["body", "intro"])(mock_response)
+
+        expected_content = _POSTS[0]["body"]["intro"]
+        self.assertEqual(expected_content, response.fetch())
+        self.assertEqual(expected_content, response.results)
+
+    def test_raise_exception_on_incorrect_content_type(self):
+        mock_response = self._create_mock_response(_POSTS)
+        mock_response.headers = {"Content-type": "application/json"}
+
+        regex = ".* response did not give MessagePack but a application/json"
+        with self.assertRaisesRegex(TypeError, regex):
+            _ = MsgPackResponse()(mock_response)  # noqa
+
+
+@unittest.skipUnless(importlib.util.find_spec("cbor2"), "requires cbor2")
+class CBORResponseTests(unittest.TestCase):
+    def _create_mock_response(self, content):
+        import cbor2
+
+        mock_response = mock.Mock(spec=requests.Response)
+        mock_response.headers = {"Content-type": "application/cbor"}
+        mock_response.content = cbor2.dumps(content)
+        return mock_response
+
+    def test_fetch_all_posts(self):
+        response = CBORResponse()(self._create_mock_response(_POSTS))
+
+        self.assertEqual(_POSTS, response.fetch())
+
+    def test_fetch_intro_of_single_post(self):
+        mock_response = self._create_mock_response(_POSTS[0])
+
+        response = CBORResponse(extract_section=["body", "intro"])(mock_response)
+
+        self.assertEqual(_POSTS[0]["body"]["intro"], response.fetch())
+
+    def test_raise_exception_on_incorrect_content_type(self):
+        mock_response = self._create_mock_response(_POSTS)
+        mock_response.headers = {"Content-type": "application/json"}
+
+        regex = ".* response did not give CBOR but a application/json"
+        with self.assertRaisesRegex(TypeError, regex):
+            _ = CBORResponse()(mock_response)  # noqa
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"), "requires pyarrow")
+class ArrowResponseTests(unittest.TestCase):
+    def setUp(self):
+        import pyarrow
+
+        titles = [f"post {i}" for i in range(10)]
+        self.table = pyarrow.table({"id": list(range(10)), "title": titles})
+
+    def _create_streamed_response(self, body, content_type):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers = CaseInsensitiveDict({"Content-type": content_type})
+        response.raw = HTTPResponse(body=io.BytesIO(body), preload_content=False)
+        return response
+
+    def _serialize(self, write):
+        import pyarrow
+
+        sink = pyarrow.BufferOutputStream()
+        write(sink)
+        return sink.getvalue().to_pybytes()
+
+    def _write_stream(self, sink):
+        import pyarrow
+
+        with pyarrow.ipc.new_stream(sink, self.table.schema) as writer:
+            writer.write_table(self.table, max_chunksize=4)
+
+    def test_iterate_over_batches_of_stream(self):
+        body = self._serialize(self._write_stream)
+        raw_response = self._create_streamed_response(body, "application/vnd.apache.arrow.stream")
+
+        response = ArrowResponse()(raw_response, stream=True)
+
+        batches = list(response.fetch())
+        self.assertEqual([4, 4, 2], [batch.num_rows for batch in batches])
+        self.assertEqual(self.table.to_pylist(), [r for b in batches for r in b.to_pylist()])
+
+    def test_read_stream_as_table(self):
+        body = self._serialize(self._write_stream)
+        raw_response = self._create_streamed_response(body, "application/vnd.apache.arrow.stream")
+
+        response = ArrowResponse(as_table=True)(raw_response, stream=True)
+
+        self.assertTrue(self.table.equals(response.fetch()))
+
+    def test_read_file_format_as_table(self):
+        import pyarrow
+
+        def write_file(sink):
+            with pyarrow.ipc.new_file(sink, self.table.schema) as writer:
+                writer.write_table(self.table, max_chunksize=4)
+
+        mock_response = mock.Mock(spec=requests.Response)
+        mock_response.headers = {"Content-type": "application/vnd.apache.arrow.file"}
+        mock_response.content = self._serialize(write_file)
+
+        response = ArrowResponse(as_table=True)(mock_response)
+
+        self.assertTrue(self.table.equals(response.fetch()))
+
+    def test_iterate_over_batches_of_parquet(self):
+        import pyarrow.parquet
+
+        def write_parquet(sink):
+            pyarrow.parquet.write_table(self.table, sink, row_group_size=5)
+
+        body = self._serialize(write_parquet)
+        raw_response = self._create_streamed_response(body, "application/vnd.apache.parquet")
+
+        response = ArrowResponse()(raw_response, stream=True)
+
+        rows = [row for batch in response.fetch() for row in batch.to_pylist()]
+        self.assertEqual(self.table.to_pylist(), rows)
+
+    def test_decode_csv_into_table(self):
+        mock_response = mock.Mock(spec=requests.Response)
+        mock_response.headers = {"Content-type": "text/csv"}
+        mock_response.content = b"id,title\n1,a\n2,b\n"
+
+        response = CSVResponse(arrow=True)(mock_response)
+
+        expected_content = [{"id": 1, "title": "a"}, {"id": 2, "title": "b"}]
+        self.assertEqual(expected_content, response.fetch().to_pylist())
+
+    def test_raise_exception_on_incorrect_content_type(self):
+        raw_response = self._create_streamed_response(b"", "application/json")
+
+        regex = ".* response did not give Arrow data but a application/json"
+        with self.assertRaisesRegex(TypeError, regex):
+            _ = ArrowResponse()(raw_response, stream=True)  # noqa
@@ -0,0 +1,105 @@
+import importlib.util
+import re
+import unittest
+import unittest.mock as mock
+
+import qrest
+from qrest import tracing
+from qrest.exception import RestResourceNotFoundError
+from qrest.instrumentation import TimedAuth, Timing
+from qrest.tracing import InMemoryTracer
+
+from . import jsonplaceholderconfig
+from .test_instrumentation import _mock_response
+
+
+class TracingTests(unittest.TestCase):
+    def setUp(self):
+        self.api = qrest.API(jsonplaceholderconfig)
+        self.tracer = InMemoryTracer()
+        tracing.set_tracer(self.tracer)
+        self.addCleanup(tracing.set_tracer, None)
+
+    def test_call_creates_spans(self):
+        with mock.patch("requests.request", return_value=_mock_response()):
+            self.api.single_post(item=1)
+
+        http, parse, root = self.tracer.spans
+        self.assertEqual(["http", "parse", "single_post"], [s.name for s in self.tracer.spans])
+        self.assertIsNone(root.parent)
+        self.assertIs(root, http.parent)
+        self.assertIs(root, parse.parent)
+        self.assertEqual({root.trace_id}, {http.trace_id, parse.trace_id})
+        self.assertEqual(
+            {
+                "http.method": "GET",
+                "http.url": "https://jsonplaceholder.typicode.com/posts/1",
+                "http.status_code": 200,
+            },
+            root.attributes,
+        )
+        self.assertGreaterEqual(root.duration, http.duration + parse.duration)
+
+    def test_parse_error_is_recorded_in_the_call(self):
+        mock_response = _mock_response()
+        mock_response.json.side_effect = ValueError("no JSON")
+
+        with mock.patch("requests.request", return_value=mock_response):
+            with self.assertRaises(ValueError):
+                self.api.single_post(item=1)
+
+        http, parse, root = self.tracer.spans
+        self.assertIs(root, parse.parent)
+        self.assertIsInstance(root.exception, ValueError)
+
+    def test_traceparent_is_sent(self):
+        with mock.patch("requests.request", return_value=_mock_response()) as mock_request:
+            self.api.all_posts()
+
+        http = self.tracer.spans[0]
+        _, kwargs = mock_request.call_args
+        traceparent = kwargs["headers"]["traceparent"]
+        self.assertRegex(traceparent, re.compile("^00-[0-9a-f]{32}-[0-9a-f]{16}-01$"))
+        self.assertEqual(http.traceparent, traceparent)
+        self.assertNotIn("traceparent", self.api.all_posts.config.headers)
+
+    def test_error_is_recorded(self):
+        with mock.patch("requests.request", return_value=_mock_response(404)):
+            with self.assertRaises(RestResourceNotFoundError) as context:
+                self.api.all_posts()
+
+        http, root = self.tracer.spans
+        self.assertIs(context.exception, http.exception)
+        self.assertIs(context.exception, root.exception)
+
+    def test_auth_runs_in_child_span(self):
+        root = self.tracer.start_span("resource")
+        auth = TimedAuth(lambda request: request, Timing("resource", "GET", "url"), root)
+
+        auth("request")
+        self.assertEqual(["auth"], [s.name for s in self.tracer.spans])
+        self.assertIs(root, self.tracer.spans[0].parent)
+
+    def test_no_spans_without_tracer(self):
+        tracing.set_tracer(None)
+
+        with mock.patch("requests.request", return_value=_mock_response()) as mock_request:
+            self.api.all_posts()
+
+        self.assertEqual([], self.tracer.spans)
+        _, kwargs = mock_request.call_args
+        self.assertNotIn("traceparent", kwargs["headers"])
+
+
+@unittest.skipUnless(importlib.util.find_spec("opentelemetry"), "requires opentelemetry-api")
+class OpenTelemetryTracerTests(unittest.TestCase):
+    def test_traceparent_of_child_span(self):
+        from opentelemetry.trace import NonRecordingSpan, SpanContext
+
+        context = SpanContext(trace_id=1, span_id=2, is_remote=False, trace_flags=1)
+        otel_tracer = mock.Mock()
+        otel_tracer.start_span.return_value = NonRecordingSpan(context)
+
+        span = tracing.OpenTelemetryTracer(otel_tracer).start_span("all_posts")
+        with span.start_child("http") as child:
+            self.assertEqual(f"00-{1:032x}-{2:016x}-01", child.traceparent)
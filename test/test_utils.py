@@ -1,5 +1,5 @@
 import unittest
-from qrest.utils import URLValidator
+from qrest.utils import PathTemplate, URLValidator
 from qrest.exception import RestClientConfigurationError
 
 
@@ -28,3 +28,30 @@ class TestURLValidator(unittest.TestCase):
 
         with self.assertRaises(RestClientConfigurationError):
             self.validator.check("test", require_path=True)
+
+
+class TestPathTemplate(unittest.TestCase):
+    def test_join_path_without_parameters(self):
+        template = PathTemplate("https://jsonplaceholder.typicode.com", ["posts"])
+
+        self.assertEqual([], template.parameters)
+        self.assertEqual("https://jsonplaceholder.typicode.com/posts", template.format({}))
+
+    def test_fill_in_quoted_path_parameters(self):
+        template = PathTemplate("https://example.com/api/", ["users", "{name}", "posts", "{id}"])
+
+        self.assertEqual(["name", "id"], template.parameters)
+        self.assertEqual(
+            "https://example.com/api/users/a%2Fb%20c/posts/1",
+            template.format({"name": "a/b c", "id": 1, "other": "ignored"}),
+        )
+
+    def test_raise_key_error_for_missing_path_parameter(self):
+        template = PathTemplate("https://example.com", ["users", "{name}"])
+
+        with self.assertRaises(KeyError):
+            template.format({})
+
+    def test_raise_proper_exception_for_invalid_url(self):
+        with self.assertRaises(RestClientConfigurationError):
+            PathTemplate("https://example", ["users"])